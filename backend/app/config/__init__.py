@@ -4,8 +4,8 @@
 统一管理应用的所有配置项，包括数据库、OSS、LLM、日志等配置。
 """
 
-from .config import settings
+from .config import settings, PremadeMode
 from .logging import setup_logging, get_logger, LoggingConfig
 
-__all__ = ["settings", "setup_logging", "get_logger", "LoggingConfig"]
+__all__ = ["settings", "PremadeMode", "setup_logging", "get_logger", "LoggingConfig"]
 
@@ -6,7 +6,10 @@
 """
 
 from pydantic_settings import BaseSettings
-from typing import Optional
+from typing import Literal, Optional
+
+# 查预制执行模式
+PremadeMode = Literal["full", "cascade"]
 
 
 class DatabaseConfig(BaseSettings):
@@ -21,6 +24,14 @@ class DatabaseConfig(BaseSettings):
     mysql_user: str
     mysql_password: str
     mysql_db: str
+    # 连接池大小（每个 worker 进程、每个引擎）
+    db_pool_size: int = 10
+    # 连接池满时允许额外创建的连接数
+    db_max_overflow: int = 10
+    # 从连接池获取连接的等待超时（秒）
+    db_pool_timeout: float = 30.0
+    # 连接最长复用时间（秒），应小于 MySQL 的 wait_timeout
+    db_pool_recycle: int = 1800
     
     class Config:
         # 环境变量名称大小写不敏感
@@ -41,6 +52,18 @@ class DatabaseConfig(BaseSettings):
             f"mysql+pymysql://{self.mysql_user}:{self.mysql_password}"
             f"@{self.mysql_host}:{self.mysql_port}/{self.mysql_db}"
         )
+    
+    @property
+    def async_database_url(self) -> str:
+        """构建异步数据库连接URL（aiomysql 驱动）
+        
+        Returns:
+            str: MySQL异步数据库连接字符串
+        """
+        return (
+            f"mysql+aiomysql://{self.mysql_user}:{self.mysql_password}"
+            f"@{self.mysql_host}:{self.mysql_port}/{self.mysql_db}"
+        )
 
 
 
@@ -128,6 +151,239 @@ class AppConfig(BaseSettings):
         return [origin.strip() for origin in self.cors_origins.split(",")]
 
 
+class StreamConfig(BaseSettings):
+    """流式响应配置类
+    
+    管理SSE流式输出的心跳、客户端断开检测和断线续传参数。
+    """
+    
+    # SSE 心跳间隔（秒），防止代理在长时间分析时断开空闲连接
+    sse_heartbeat_interval: float = 15.0
+    # 客户端断开检测的轮询间隔（秒）
+    sse_disconnect_poll_interval: float = 1.0
+    # 每次运行保留的最大事件数（重放缓冲区大小）
+    stream_replay_max_events: int = 2000
+    # 运行结束后重放缓冲区的保留时间（秒）
+    stream_replay_ttl_seconds: float = 300.0
+    # 最后一个订阅者断开后等待重连的宽限时间（秒），超时则取消运行
+    stream_resume_grace_seconds: float = 10.0
+    # 是否合并相同功能、相同图片、相同参数的并发请求
+    stream_coalesce_enabled: bool = True
+    # DEBUG 日志下每种事件每隔多少个输出一条（0 表示不输出逐事件日志）
+    stream_debug_log_sample_every: int = 50
+    
+    class Config:
+        case_sensitive = False
+        env_file = ".env"
+        # 忽略额外的环境变量
+        extra = "ignore"
+
+
+class CacheConfig(BaseSettings):
+    """缓存配置类
+    
+    管理分析结果缓存、LLM缓存和跨进程请求合并的后端参数。
+    """
+    
+    # 缓存后端：memory（进程内）或 sqlite（同主机多 worker 共享）
+    cache_backend: str = "memory"
+    # sqlite 后端的数据库文件路径，建议放在内存文件系统中
+    cache_sqlite_path: str = "/dev/shm/foodie_paradise_cache.db"
+    # 分析结果缓存有效期（秒），0 表示不缓存（默认关闭）；出错的运行不缓存
+    cache_result_ttl_seconds: float = 0.0
+    # 是否启用 LLM 调用缓存
+    llm_cache_enabled: bool = False
+    # LLM 缓存数据库路径（sqlite 后端使用）
+    llm_cache_sqlite_path: str = "/dev/shm/foodie_paradise_llm_cache.db"
+    # 跨进程合并时运行租约的有效期（秒），执行方会定期续期
+    cache_lease_ttl_seconds: float = 30.0
+    # 跨进程合并时跟随方轮询事件日志的间隔（秒）
+    cache_journal_poll_interval: float = 0.05
+    # 事件日志保留时间（秒）
+    cache_journal_retention_seconds: float = 600.0
+    
+    class Config:
+        case_sensitive = False
+        env_file = ".env"
+        # 忽略额外的环境变量
+        extra = "ignore"
+
+
+class PoiConfig(BaseSettings):
+    """本地POI索引配置类
+    
+    管理"去哪吃"功能使用的本地餐厅/POI数据集及检索参数。
+    """
+    
+    # POI 数据文件路径（CSV 或 JSONL），为空则不启用
+    poi_data_path: str = ""
+    # 空间网格边长（度）
+    poi_grid_cell_degrees: float = 0.01
+    # 根据用户位置预筛选候选店铺的半径（米）
+    poi_nearby_radius_m: float = 3000.0
+    # 写入提示词的候选店铺数量
+    poi_nearby_limit: int = 10
+    # 店名校准的最低相似度
+    poi_snap_min_score: float = 0.5
+    # 店名校准时参考坐标周边的匹配半径（米）
+    poi_snap_radius_m: float = 50000.0
+    
+    class Config:
+        case_sensitive = False
+        env_file = ".env"
+        # 忽略额外的环境变量
+        extra = "ignore"
+
+
+class JobConfig(BaseSettings):
+    """异步任务配置类
+    
+    管理异步分析任务的工作池并发度和队列容量。
+    """
+    
+    # 并发执行任务的工作协程数
+    job_workers: int = 4
+    # 队列最大长度，超出后拒绝提交
+    job_queue_max_size: int = 100
+    # 任务结果保留时间（秒）
+    job_result_ttl_seconds: float = 3600.0
+    # 应用关闭时等待执行中任务完成的最长时间（秒）
+    job_shutdown_timeout: float = 30.0
+    
+    class Config:
+        case_sensitive = False
+        env_file = ".env"
+        # 忽略额外的环境变量
+        extra = "ignore"
+
+
+class CaloriesConfig(BaseSettings):
+    """吃多少功能配置类
+    
+    管理运动消耗换算使用的默认体重和展示的运动项目。
+    """
+    
+    # 换算运动时间使用的默认体重（公斤）
+    calories_body_weight_kg: float = 60.0
+    # 运动消耗报告中展示的运动项目（逗号分隔，需在 MET 表中）
+    calories_exercise_activities: str = "慢跑,游泳,快走"
+    
+    class Config:
+        case_sensitive = False
+        env_file = ".env"
+        # 忽略额外的环境变量
+        extra = "ignore"
+
+
+class PremadeConfig(BaseSettings):
+    """查预制功能配置类
+    
+    管理查预制工作流的执行模式：
+    - full: 始终执行视觉分析 + 工艺分析 + 聚合（默认）
+    - cascade: 先做一次快速判断，把握度低于阈值时才升级到完整分析
+    """
+    
+    # 执行模式：full 或 cascade，其他值在启动时校验失败
+    premade_mode: PremadeMode = "full"
+    # cascade 模式下快速判断的把握度阈值（0~1），低于阈值时升级到完整分析
+    premade_cascade_threshold: float = 0.8
+    
+    class Config:
+        case_sensitive = False
+        env_file = ".env"
+        # 忽略额外的环境变量
+        extra = "ignore"
+
+
+class WorkflowConfig(BaseSettings):
+    """工作流执行配置类
+    
+    管理哪些功能使用不依赖 LangGraph 的线性执行器。
+    """
+    
+    # 使用线性执行器的功能（逗号分隔，仅支持 where-to-eat 和 calories）
+    workflow_fast_path_features: str = "where-to-eat"
+    
+    class Config:
+        case_sensitive = False
+        env_file = ".env"
+        # 忽略额外的环境变量
+        extra = "ignore"
+
+
+class SpeculativeConfig(BaseSettings):
+    """上传预分析配置类
+    
+    开启后图片上传完成即在后台执行食物识别，结果按 file_path 短期缓存，
+    用户随后发起"吃多少"分析时直接复用。
+    """
+    
+    # 是否在上传完成后预先执行食物识别
+    speculative_enabled: bool = False
+    # 预分析结果的保留时间（秒），超时未使用即视为浪费
+    speculative_ttl_seconds: float = 120.0
+    # 同时存在的未使用预分析数上限，用于限制浪费的模型调用
+    speculative_max_pending: int = 8
+    
+    class Config:
+        case_sensitive = False
+        env_file = ".env"
+        # 忽略额外的环境变量
+        extra = "ignore"
+
+
+class HistoryConfig(BaseSettings):
+    """历史记录配置类
+    
+    管理历史记录列表接口的分页参数、导出、保留归档和批量写入队列。
+    """
+    
+    # 默认每页条数
+    history_page_size: int = 20
+    # 客户端可请求的最大每页条数
+    history_max_page_size: int = 100
+    # 历史记录读缓存的保留时间（秒），本进程写入时立即失效
+    history_cache_ttl_seconds: float = 30.0
+    # 历史记录读缓存的最大条目数
+    history_cache_max_entries: int = 256
+    # 响应体小于该字节数时不压缩
+    history_compress_min_bytes: int = 1024
+    # 搜索索引每批从数据库加载的记录数
+    history_search_load_batch_size: int = 5000
+    # 每次搜索前最多增量拉取的新记录数（其他 worker 写入的记录）
+    history_search_catch_up_rows: int = 1000
+    # 导出接口每批从服务端游标读取并写出的记录数
+    history_export_batch_size: int = 500
+    # 保留策略：创建超过该天数的记录被归档，0 表示不按时间归档
+    history_retention_days: int = 0
+    # 保留策略：history 表最多保留的最新记录数，0 表示不限
+    history_retention_max_rows: int = 0
+    # 归档目标：table（history_archive 表）或 file（HISTORY_ARCHIVE_DIR 下的 jsonl.gz）
+    history_archive_target: str = "table"
+    # 归档文件目录
+    history_archive_dir: str = "archive"
+    # 每批归档的记录数（一个事务）
+    history_archive_batch_size: int = 500
+    # 两批之间至少暂停的毫秒数，减少与在线写入的锁竞争
+    history_archive_pause_ms: float = 200.0
+    # 分析完成后由服务端自动保存历史记录，并在流末尾推送 history 事件
+    history_auto_capture: bool = False
+    # 写入队列：每批最多写入的记录数
+    history_write_batch_size: int = 100
+    # 写入队列：收到第一条记录后最多等待多久（毫秒）凑满一批
+    history_write_flush_interval_ms: float = 5.0
+    # 写入队列容量，写满后新的写入需要等待（背压）
+    history_write_queue_max_size: int = 1000
+    # 队列满时等待入队的最长时间（秒），超时返回 503
+    history_write_enqueue_timeout: float = 5.0
+    
+    class Config:
+        case_sensitive = False
+        env_file = ".env"
+        # 忽略额外的环境变量
+        extra = "ignore"
+
+
 from app.config.logging import LoggingConfig
 
 
@@ -143,6 +399,15 @@ class Settings:
         self.qiniu = QiniuConfig()
         self.llm = LLMConfig()
         self.app = AppConfig()
+        self.stream = StreamConfig()
+        self.job = JobConfig()
+        self.cache = CacheConfig()
+        self.poi = PoiConfig()
+        self.calories = CaloriesConfig()
+        self.premade = PremadeConfig()
+        self.workflow = WorkflowConfig()
+        self.speculative = SpeculativeConfig()
+        self.history = HistoryConfig()
         self.logging = LoggingConfig()
 
 
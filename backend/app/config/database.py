@@ -3,9 +3,14 @@
 
 使用 SQLAlchemy 管理 MySQL 数据库连接和会话。
 提供数据库引擎、会话工厂和依赖注入函数。
+
+- 同步引擎（PyMySQL）：启动时建表、离线脚本使用
+- 异步引擎（aiomysql）：请求处理中使用，查询期间不阻塞事件循环，
+  不影响同一 worker 上正在推送的 SSE 流
 """
 
 from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 
@@ -13,27 +18,45 @@ from app.config import settings
 
 # 从配置中获取数据库连接URL
 DATABASE_URL = settings.database.database_url
+ASYNC_DATABASE_URL = settings.database.async_database_url
+
+# 两个引擎共用的连接池参数
+_pool_options = dict(
+    pool_size=settings.database.db_pool_size,
+    max_overflow=settings.database.db_max_overflow,
+    pool_timeout=settings.database.db_pool_timeout,
+    pool_recycle=settings.database.db_pool_recycle,
+)
 
 # 创建数据库引擎
 # echo=False: 不打印SQL语句（生产环境推荐）
 # pool_pre_ping=True: 连接池预检测，自动处理断开的连接
-engine = create_engine(DATABASE_URL, pool_pre_ping=True)
+engine = create_engine(DATABASE_URL, pool_pre_ping=True, **_pool_options)
+
+# 创建异步数据库引擎
+async_engine = create_async_engine(ASYNC_DATABASE_URL, pool_pre_ping=True, **_pool_options)
 
 # 创建会话工厂
 # autocommit=False: 需要显式提交事务
 # autoflush=False: 不自动刷新到数据库
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# 创建异步会话工厂
+# expire_on_commit=False: 提交后仍可读取对象属性，避免隐式的异步加载
+AsyncSessionLocal = async_sessionmaker(
+    async_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False
+)
+
 # 创建ORM模型基类
 Base = declarative_base()
 
 
 def get_db():
     """获取数据库会话的依赖注入函数
-    
+
     用于FastAPI的Depends依赖注入，自动管理数据库会话的生命周期。
     使用上下文管理器确保会话在请求结束后正确关闭。
-    
+
     Yields:
         Session: SQLAlchemy数据库会话对象
     """
@@ -43,3 +66,12 @@ def get_db():
     finally:
         db.close()
 
+
+async def get_async_db():
+    """获取异步数据库会话的依赖注入函数
+
+    Yields:
+        AsyncSession: SQLAlchemy异步数据库会话对象
+    """
+    async with AsyncSessionLocal() as db:
+        yield db
@@ -0,0 +1,22 @@
+"""
+运动代谢当量（MET）表
+
+MET 表示运动时的能量消耗相对于静坐的倍数，数值参考
+《身体活动纲要》（Compendium of Physical Activities）中的常见项目。
+
+每分钟消耗热量（千卡）= MET × 3.5 × 体重(公斤) / 200
+"""
+
+# 运动名称 -> MET
+MET_TABLE = {
+    "慢跑": 8.3,        # 约 8 公里/小时
+    "快走": 4.3,        # 约 5.6 公里/小时
+    "游泳": 5.8,        # 自由泳，中等强度
+    "骑自行车": 6.8,    # 约 16~19 公里/小时
+    "跳绳": 11.8,       # 中等速度
+    "爬楼梯": 8.8,      # 较快速度
+    "羽毛球": 5.5,
+    "篮球": 6.5,
+    "跳操": 7.3,        # 有氧操
+    "瑜伽": 2.5,
+}
@@ -0,0 +1,132 @@
+"""
+营养成分数据表
+
+收录常见中式菜品、主食、食材和饮品的每 100 克营养成分，
+供"吃多少"功能按识别出的食物和份量直接计算热量，无需调用模型。
+
+数值参考《中国食物成分表》及常见菜谱的典型做法，为估算用途。
+"""
+
+# ========== 营养成分表 ==========
+# 每行字段依次为：
+#   名称, 别名列表, 能量(千卡/100g), 蛋白质(g/100g), 脂肪(g/100g), 碳水(g/100g),
+#   默认份量(g), 单件重量(g), 是否为成品菜（成品菜不再叠加烹饪方式系数）
+NUTRITION_TABLE = [
+    # ----- 主食 -----
+    ("米饭", ["白米饭", "大米饭", "白饭", "饭"], 116, 2.6, 0.3, 25.9, 150, 150, True),
+    ("炒饭", ["蛋炒饭", "扬州炒饭", "什锦炒饭"], 185, 5.5, 6.5, 26.0, 250, 250, True),
+    ("粥", ["白粥", "大米粥", "稀饭", "小米粥"], 46, 1.1, 0.3, 9.9, 300, 300, True),
+    ("馒头", ["白馒头", "花卷"], 223, 7.0, 1.1, 47.0, 100, 100, True),
+    ("包子", ["肉包", "菜包", "大包子"], 227, 7.6, 8.5, 29.0, 160, 80, True),
+    ("小笼包", ["小笼", "灌汤包", "汤包"], 230, 10.0, 10.0, 25.0, 150, 25, True),
+    ("饺子", ["水饺", "蒸饺", "煎饺", "锅贴"], 220, 9.0, 10.0, 25.0, 200, 20, True),
+    ("馄饨", ["云吞", "抄手", "红油抄手"], 150, 6.0, 6.0, 18.0, 300, 300, True),
+    ("烧麦", ["烧卖"], 230, 7.0, 9.0, 30.0, 120, 40, True),
+    ("面条", ["汤面", "阳春面", "挂面", "面"], 110, 3.9, 0.4, 22.8, 400, 400, True),
+    ("炒面", ["炒面条", "炒乌冬"], 170, 5.0, 6.0, 24.0, 250, 250, True),
+    ("牛肉面", ["兰州拉面", "红烧牛肉面", "拉面"], 120, 6.0, 3.5, 16.0, 500, 500, True),
+    ("热干面", [], 200, 6.0, 7.0, 28.0, 250, 250, True),
+    ("螺蛳粉", [], 150, 4.0, 6.0, 20.0, 500, 500, True),
+    ("酸辣粉", [], 130, 2.0, 5.0, 20.0, 400, 400, True),
+    ("米线", ["米粉", "过桥米线", "桂林米粉"], 110, 1.8, 1.5, 23.0, 450, 450, True),
+    ("油条", [], 388, 6.9, 17.6, 51.0, 80, 80, True),
+    ("煎饼果子", ["煎饼"], 250, 7.0, 10.0, 33.0, 200, 200, True),
+    ("肉夹馍", [], 260, 10.0, 11.0, 30.0, 200, 200, True),
+    ("面包", ["吐司", "全麦面包"], 313, 8.3, 5.1, 58.6, 80, 40, True),
+    ("玉米", ["玉米棒", "甜玉米"], 112, 4.0, 1.2, 22.8, 150, 150, False),
+    ("红薯", ["地瓜", "烤红薯"], 99, 1.1, 0.2, 24.7, 200, 200, False),
+    ("土豆", ["马铃薯", "洋芋"], 77, 2.0, 0.2, 17.2, 150, 150, False),
+    # ----- 荤菜 -----
+    ("红烧肉", ["东坡肉", "梅菜扣肉", "扣肉"], 450, 9.8, 42.0, 8.0, 150, 30, True),
+    ("回锅肉", [], 360, 12.0, 33.0, 4.0, 150, 150, True),
+    ("宫保鸡丁", ["宫爆鸡丁"], 200, 15.0, 12.0, 8.0, 200, 200, True),
+    ("鱼香肉丝", [], 180, 10.0, 12.0, 8.0, 200, 200, True),
+    ("糖醋里脊", ["锅包肉"], 260, 12.0, 12.0, 26.0, 200, 200, True),
+    ("糖醋排骨", ["红烧排骨", "排骨"], 280, 16.0, 20.0, 10.0, 200, 40, True),
+    ("可乐鸡翅", ["鸡翅", "烤鸡翅", "奥尔良鸡翅"], 220, 17.0, 13.0, 9.0, 150, 50, True),
+    ("炸鸡", ["炸鸡块", "鸡米花", "炸鸡腿"], 280, 20.0, 17.0, 11.0, 150, 100, True),
+    ("白切鸡", ["白斩鸡", "口水鸡"], 200, 20.0, 12.0, 1.0, 150, 150, True),
+    ("烤鸭", ["北京烤鸭"], 436, 16.6, 38.4, 6.0, 150, 150, True),
+    ("鸡胸肉", ["鸡胸"], 133, 24.6, 3.3, 0.6, 120, 120, False),
+    ("牛肉", ["红烧牛肉", "卤牛肉", "酱牛肉"], 160, 22.0, 7.0, 3.0, 150, 150, False),
+    ("牛排", ["西冷牛排", "菲力牛排"], 250, 26.0, 16.0, 0.0, 200, 200, True),
+    ("羊肉串", ["烤串", "烤肉串", "羊肉"], 230, 18.0, 16.0, 3.0, 100, 25, True),
+    ("水煮鱼", ["水煮肉片", "毛血旺"], 150, 12.0, 10.0, 3.0, 300, 300, True),
+    ("酸菜鱼", [], 100, 12.0, 5.0, 2.0, 300, 300, True),
+    ("清蒸鱼", ["清蒸鲈鱼", "鱼"], 110, 18.0, 4.0, 1.0, 200, 200, True),
+    ("虾", ["白灼虾", "基围虾", "虾仁"], 93, 18.6, 0.8, 2.8, 150, 15, False),
+    ("小龙虾", ["麻辣小龙虾", "十三香小龙虾"], 110, 14.0, 5.0, 3.0, 200, 20, True),
+    ("鸡蛋", ["煮鸡蛋", "水煮蛋", "茶叶蛋", "蛋"], 144, 13.3, 8.8, 2.8, 50, 50, False),
+    ("煎蛋", ["荷包蛋", "煎鸡蛋"], 196, 13.6, 15.0, 1.0, 50, 50, True),
+    ("番茄炒蛋", ["西红柿炒鸡蛋", "西红柿炒蛋", "番茄炒鸡蛋"], 95, 5.0, 7.0, 4.0, 200, 200, True),
+    # ----- 素菜与豆制品 -----
+    ("麻婆豆腐", [], 130, 8.0, 9.0, 4.0, 200, 200, True),
+    ("豆腐", ["北豆腐", "嫩豆腐", "家常豆腐"], 98, 12.2, 4.8, 1.5, 150, 150, False),
+    ("炒青菜", ["清炒时蔬", "青菜", "炒时蔬", "蒜蓉西兰花", "西兰花", "炒菠菜", "上海青", "蔬菜"], 55, 2.0, 3.5, 4.0, 200, 200, True),
+    ("凉拌黄瓜", ["拍黄瓜", "黄瓜"], 40, 1.0, 2.5, 3.5, 150, 150, True),
+    ("地三鲜", [], 140, 2.0, 10.0, 11.0, 200, 200, True),
+    ("干煸四季豆", ["四季豆", "干煸豆角"], 120, 3.0, 8.0, 9.0, 200, 200, True),
+    ("酸辣土豆丝", ["土豆丝"], 110, 2.0, 6.0, 13.0, 200, 200, True),
+    ("蔬菜沙拉", ["沙拉", "凯撒沙拉"], 90, 1.5, 7.0, 5.0, 200, 200, True),
+    # ----- 火锅与小吃 -----
+    ("麻辣烫", ["串串", "冒菜", "关东煮"], 100, 5.0, 6.0, 7.0, 400, 400, True),
+    ("麻辣香锅", ["香锅", "干锅"], 170, 8.0, 13.0, 6.0, 400, 400, True),
+    ("火锅", ["火锅食材", "涮锅"], 130, 9.0, 9.0, 4.0, 500, 500, True),
+    ("汉堡", ["汉堡包", "巨无霸"], 250, 12.0, 12.0, 25.0, 200, 200, True),
+    ("薯条", [], 312, 3.4, 15.0, 41.0, 110, 110, True),
+    ("披萨", ["比萨", "匹萨"], 266, 11.0, 10.0, 33.0, 200, 100, True),
+    ("寿司", ["寿司卷", "饭团"], 150, 5.0, 1.5, 29.0, 200, 30, True),
+    # ----- 汤 -----
+    ("番茄蛋汤", ["西红柿蛋汤", "紫菜蛋花汤", "蛋花汤"], 30, 2.0, 1.5, 2.0, 300, 300, True),
+    ("排骨汤", ["玉米排骨汤", "莲藕排骨汤", "鸡汤", "老鸭汤"], 60, 5.0, 4.0, 1.5, 400, 400, True),
+    # ----- 水果 -----
+    ("苹果", [], 53, 0.4, 0.2, 13.7, 200, 200, True),
+    ("香蕉", [], 93, 1.4, 0.2, 22.0, 120, 120, True),
+    ("西瓜", [], 31, 0.5, 0.3, 6.8, 400, 400, True),
+    ("橙子", ["橘子", "柑橘"], 48, 0.8, 0.2, 11.1, 200, 150, True),
+    ("葡萄", ["提子"], 44, 0.5, 0.2, 10.3, 150, 150, True),
+    # ----- 饮品（按毫升折算为克） -----
+    ("奶茶", ["珍珠奶茶", "波霸奶茶", "奶盖茶"], 70, 0.8, 2.5, 11.0, 500, 500, True),
+    ("可乐", ["可口可乐", "百事可乐", "汽水", "碳酸饮料"], 43, 0.0, 0.0, 10.6, 330, 330, True),
+    ("美式咖啡", ["黑咖啡", "咖啡"], 2, 0.1, 0.0, 0.3, 350, 350, True),
+    ("拿铁", ["拿铁咖啡", "卡布奇诺"], 50, 2.6, 2.3, 4.6, 350, 350, True),
+    ("牛奶", ["纯牛奶"], 54, 3.0, 3.2, 3.4, 250, 250, True),
+    ("豆浆", [], 31, 3.0, 1.6, 1.2, 300, 300, True),
+    ("啤酒", [], 32, 0.4, 0.0, 3.2, 500, 500, True),
+    ("果汁", ["橙汁", "苹果汁"], 45, 0.5, 0.1, 10.5, 300, 300, True),
+    # ----- 甜点 -----
+    ("蛋糕", ["奶油蛋糕", "芝士蛋糕", "慕斯"], 348, 5.0, 14.0, 52.0, 100, 100, True),
+    ("冰淇淋", ["雪糕", "冰激凌"], 200, 3.5, 11.0, 24.0, 100, 100, True),
+    ("月饼", [], 420, 7.0, 18.0, 60.0, 100, 100, True),
+]
+
+# ========== 计量单位折算（克） ==========
+# 未写明克数时，按单位折算份量；"份"按条目默认份量，"个"等计件单位按条目单件重量
+UNIT_GRAMS = {
+    "碗": 250,
+    "盘": 300,
+    "杯": 350,
+    "瓶": 500,
+    "罐": 330,
+    "盒": 300,
+    "勺": 15,
+}
+PIECE_UNITS = ["个", "只", "块", "串", "片", "根", "张", "条", "颗", "枚"]
+PORTION_UNITS = ["份", "人份", "例"]
+
+# ========== 烹饪方式热量系数 ==========
+# 仅作用于非成品菜的食材条目，反映用油等带来的额外热量
+COOKING_FACTORS = {
+    "炸": 1.35,
+    "煎": 1.2,
+    "炒": 1.15,
+    "红烧": 1.15,
+    "烤": 1.05,
+    "卤": 1.05,
+    "蒸": 1.0,
+    "煮": 1.0,
+    "凉拌": 1.05,
+}
+
+# 数据表未收录的食物按此能量密度估算（千卡/100g）
+DEFAULT_ENERGY_DENSITY = 150
@@ -168,6 +168,34 @@ PROCESS_ANALYSIS_PROMPT = """
 """
 
 
+# 快速判断：cascade 模式下的单次判断，把握度不足时再执行完整分析
+QUICK_PREMADE_PROMPT = """
+# Role
+你是一位资深的**食品鉴定专家 (Food Authenticity Expert)**。请根据菜品照片快速判断它是否为预制菜。
+
+# Task
+综合色泽、质地、刀工、酱汁、锅气等特征给出结论，并评估你对这个结论有多大把握。
+图片模糊、菜品特征不明显或各项特征互相矛盾时，请给出较低的把握度。
+
+# Output Format
+只输出以下 JSON，不要输出任何其他内容或 Markdown 代码块标记：
+{
+  "name": "识别出的菜品名称",
+  "freshness": "预制 / 半预制 / 现炒",
+  "confidence": 85,
+  "certainty": 0.9,
+  "appearance": "一句话描述外观特征",
+  "texture": "一句话推测口感",
+  "industrial_traces": "一句话描述工业化痕迹",
+  "reason_summary": "一句话理由"
+}
+
+# Constraints
+- freshness 字段只能从 ["预制", "半预制", "现炒"] 中三选一。
+- confidence 为预制可能性（0~100 的整数）。
+- certainty 为你对结论的把握度（0~1 的小数）。
+"""
+
 # ========== 吃多少功能提示词 ==========
 # 用于食物热量分析功能，引导AI分析图片中的食物热量信息
 
@@ -246,7 +274,7 @@ FOOD_IDENTIFICATION_PROMPT = """
 # Task
 请从以下维度进行分析（输出纯文本）：
 1. **食物种类**：识别图片中的每一种食物
-2. **份量估算**：估算每种食物的大致份量（克数或份数）
+2. **份量估算**：估算每种食物的大致份量，优先给出克数（饮品给出毫升数），如“约150克”
 3. **烹饪方式**：判断食物的烹饪方式（炒、煮、蒸、烤、炸等）
 4. **配料识别**：识别主料和配料
 
@@ -256,56 +284,11 @@ FOOD_IDENTIFICATION_PROMPT = """
 食物2：[名称] - [份量估算] - [烹饪方式]
 ...
 
+名称请使用常见的中文菜名或食材名，字段之间用" - "分隔。
 请只输出客观的识别结果。
 """
 
-# 并发节点2：热量估算
-CALORIE_ESTIMATION_PROMPT = """
-# Role
-你是一名**营养学专家**。请根据图片中的食物估算热量。
-
-# Task
-请对图片中识别到的每种食物进行热量估算：
-1. **基础热量**：根据食物种类查询标准热量数据
-2. **份量调整**：根据图片中显示的份量进行调整
-3. **烹饪方式影响**：考虑烹饪方式对热量的影响（如油炸增加热量）
-4. **调料影响**：考虑酱汁、调料等额外热量
-
-# Reference Data
-请你通过网络搜索来获取最新的食物热量数据，确保数据的准确性和时效性。
-
-# Output Format
-请按以下格式输出每种食物的热量估算：
-食物名称：XX千卡（估算依据：...）
-
-总热量：XX千卡
-
-请只输出热量估算结果。
-"""
-
-# 并发节点3：运动消耗估算
-EXERCISE_ESTIMATION_PROMPT = """
-# Role
-你是一名**健身教练**。请计算消耗特定热量所需的运动量。
-
-# Task
-假设用户需要消耗的热量已知，请计算以下运动所需的时间：
-
-# Reference Data
-请你通过网络搜索来获取最新的常见运动每小时消耗热量数据，确保数据的准确性和时效性。
-
-# Output Format
-对于每种食物的热量，输出消耗该热量所需的运动方案：
-
-食物1（XX千卡）：
-- 慢跑 XX 分钟
-- 游泳 XX 分钟
-- 快走 XX 分钟
-
-请给出具体的运动时间建议。
-"""
-
-# 并发节点4：用餐时间建议
+# 并发节点2：用餐时间建议
 MEAL_TIME_RECOMMENDATION_PROMPT = """
 # Role
 你是一名**健康饮食顾问**。请根据用餐时间评估食物选择是否合适。
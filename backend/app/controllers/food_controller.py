@@ -10,22 +10,41 @@ Food控制器模块
 业务逻辑统一封装在 app.services.food_service 中。
 """
 
-from fastapi import APIRouter, UploadFile, File
+from fastapi import APIRouter, UploadFile, File, Request, Header, HTTPException
 from fastapi.responses import StreamingResponse
+from typing import AsyncGenerator, Callable, Optional
 import shutil
 import os
+import time
 
 # ========== 导入配置和日志 ==========
-from app.config import get_logger
+from app.config import get_logger, settings
 
 logger = get_logger(__name__)
 
 # ========== 导入业务模块 ==========
-from app.models.schemas import ChatRequest, CaloriesRequest, HistoryRecord
+from app.models.schemas import ChatRequest, CaloriesRequest, AnalyzeRequest, HistoryRecord
 from app.services.food_service import food_service
+from app.services.history_export import stream_history_export, EXPORT_MEDIA_TYPES
+from app.services.history_service import history_read_cache, search_history as search_history_records
+from app.services.history_writer import history_writer, HistoryWriterBusyError
 from app.services.oss_service import QiniuService
+from app.services.run_registry import (
+    run_registry,
+    parse_last_event_id,
+    make_coalesce_key,
+    StreamRun,
+    RunNotFoundError,
+    ReplayWindowExceededError,
+)
 from app.utils.stream_utils import stream_generator
-from app.repositories.history_repo import save_history, get_user_history
+from app.utils.http_cache import cached_json_response
+from app.utils.metrics import metrics
+from app.repositories.history_repo import (
+    get_user_history,
+    get_history_detail,
+    InvalidCursorError,
+)
 
 # 创建API路由器
 router = APIRouter()
@@ -34,6 +53,80 @@ router = APIRouter()
 oss_service = QiniuService()
 
 
+def _run_response(
+    run: StreamRun,
+    after_seq: int,
+    http_request: Request,
+    accepted_at: Optional[float] = None
+) -> StreamingResponse:
+    """将运行的事件订阅包装为SSE响应
+    
+    Args:
+        run: 流式运行
+        after_seq: 客户端已收到的最后一个事件序号
+        http_request: 原始HTTP请求，用于检测客户端断开
+        accepted_at: 接受请求的时间（monotonic），提供时记录首帧耗时（TTFB）
+        
+    Returns:
+        StreamingResponse: SSE流式响应，响应头 X-Run-Id 携带运行ID
+    """
+    on_first_frame = None
+    if accepted_at is not None:
+        def on_first_frame():
+            ttfb = time.monotonic() - accepted_at
+            metrics.observe("sse.ttfb_seconds", ttfb)
+            metrics.observe(f"sse.{run.feature}.ttfb_seconds", ttfb)
+    
+    return StreamingResponse(
+        stream_generator(run.subscribe(after_seq), http_request, on_first_frame),
+        media_type="text/event-stream",
+        headers={"X-Run-Id": run.run_id}
+    )
+
+
+async def _start_or_resume(
+    feature: str,
+    http_request: Request,
+    start: Callable[[], AsyncGenerator],
+    coalesce_key: str
+) -> StreamingResponse:
+    """启动新运行，或根据 Last-Event-ID 续传已有运行
+    
+    客户端断线后重新提交同一请求并携带 Last-Event-ID 时，
+    直接从缓冲区续传，不重新执行工作流；运行已过期则重新开始。
+    相同请求已在执行时直接订阅该运行，不重复调用模型。
+    
+    Args:
+        feature: 功能名称
+        http_request: 原始HTTP请求
+        start: 创建业务事件生成器的工厂函数
+        coalesce_key: 请求合并键
+        
+    Returns:
+        StreamingResponse: SSE流式响应
+    """
+    accepted_at = time.monotonic()
+    resume = parse_last_event_id(http_request.headers.get("last-event-id"))
+    if resume is not None:
+        run_id, after_seq = resume
+        try:
+            run = run_registry.get(run_id)
+            if run.feature == feature:
+                run.ensure_replayable(after_seq)
+                logger.info(f"[CONTROLLER] 续传运行 {run_id}，从事件 {after_seq} 之后开始")
+                return _run_response(run, after_seq, http_request)
+        except (RunNotFoundError, ReplayWindowExceededError) as e:
+            logger.info(f"[CONTROLLER] 无法续传，重新开始: {e}")
+    
+    if settings.stream.stream_coalesce_enabled:
+        run, joined = await run_registry.join_or_start(feature, coalesce_key, start)
+        if joined:
+            logger.info(f"[CONTROLLER] 合并到执行中的运行 {run.run_id}")
+    else:
+        run = run_registry.start(feature, start())
+    return _run_response(run, 0, http_request, accepted_at)
+
+
 @router.post("/api/upload")
 async def upload_file(file: UploadFile = File(...)):
     """文件上传接口
@@ -42,6 +135,7 @@ async def upload_file(file: UploadFile = File(...)):
     上传成功后返回文件的公开访问URL。
     
     使用UUID生成临时文件名，避免并发上传时的文件名冲突。
+    开启预分析（SPECULATIVE_ENABLED）时，返回前在后台启动食物识别。
     
     Args:
         file: 上传的文件对象
@@ -63,6 +157,8 @@ async def upload_file(file: UploadFile = File(...)):
         # 上传到OSS
         # 不传入原来的文件名，让oss_service自动生成UUID文件名，避免OSS上的文件覆盖冲突
         file_url = oss_service.upload_file(temp_file_path)
+        # 开启预分析时在后台预先识别食物，不阻塞上传响应
+        food_service.speculate(file_url)
         return {"file_path": file_url}
     finally:
         # 清理临时文件
@@ -71,7 +167,7 @@ async def upload_file(file: UploadFile = File(...)):
 
 
 @router.post("/api/where-to-eat")
-async def where_to_eat(request: ChatRequest):
+async def where_to_eat(request: ChatRequest, http_request: Request):
     """去哪吃功能接口
     
     接收用户上传的图片和问题，使用AI识别图片中的餐厅位置。
@@ -79,23 +175,34 @@ async def where_to_eat(request: ChatRequest):
     
     Args:
         request: 包含图片路径和用户问题的请求对象
+        http_request: 原始HTTP请求，用于检测客户端断开
         
     Returns:
         StreamingResponse: SSE流式响应
     """
     logger.info(f"[CONTROLLER] 收到去哪吃请求: file_path={request.file_path}")
     
-    return StreamingResponse(
-        stream_generator(food_service.process_where_to_eat_stream(
+    return await _start_or_resume(
+        "where-to-eat",
+        http_request,
+        lambda: food_service.process_where_to_eat_stream(
             file_path=request.file_path,
-            query=request.query
-        )),
-        media_type="text/event-stream"
+            query=request.query,
+            latitude=request.latitude,
+            longitude=request.longitude
+        ),
+        make_coalesce_key(
+            "where-to-eat",
+            request.file_path,
+            query=request.query,
+            latitude=request.latitude,
+            longitude=request.longitude
+        )
     )
 
 
 @router.post("/api/check-premade")
-async def check_premade(request: ChatRequest):
+async def check_premade(request: ChatRequest, http_request: Request):
     """查预制功能接口
     
     接收用户上传的菜品图片，使用AI分析是否为预制菜。
@@ -103,22 +210,25 @@ async def check_premade(request: ChatRequest):
     
     Args:
         request: 包含图片路径的请求对象
+        http_request: 原始HTTP请求，用于检测客户端断开
         
     Returns:
         StreamingResponse: SSE流式响应
     """
     logger.info(f"[CONTROLLER] 收到查预制请求: file_path={request.file_path}")
     
-    return StreamingResponse(
-        stream_generator(food_service.process_check_premade_stream(
+    return await _start_or_resume(
+        "check-premade",
+        http_request,
+        lambda: food_service.process_check_premade_stream(
             file_path=request.file_path
-        )),
-        media_type="text/event-stream"
+        ),
+        make_coalesce_key("check-premade", request.file_path)
     )
 
 
 @router.post("/api/calories")
-async def calories(request: CaloriesRequest):
+async def calories(request: CaloriesRequest, http_request: Request):
     """吃多少功能接口
     
     接收用户上传的食物图片和用餐时间，使用AI并发分析食物热量。
@@ -126,44 +236,233 @@ async def calories(request: CaloriesRequest):
     
     Args:
         request: 包含图片路径和用餐时间的请求对象
+        http_request: 原始HTTP请求，用于检测客户端断开
         
     Returns:
         StreamingResponse: SSE流式响应
     """
     logger.info(f"[CONTROLLER] 收到吃多少请求: file_path={request.file_path}, meal_time={request.meal_time}")
     
-    return StreamingResponse(
-        stream_generator(food_service.process_calories_stream(
+    return await _start_or_resume(
+        "calories",
+        http_request,
+        lambda: food_service.process_calories_stream(
             file_path=request.file_path,
             meal_time=request.meal_time or "午餐"
-        )),
-        media_type="text/event-stream"
+        ),
+        make_coalesce_key("calories", request.file_path, meal_time=request.meal_time or "午餐")
     )
 
 
+@router.post("/api/analyze")
+async def analyze(request: AnalyzeRequest, http_request: Request):
+    """组合分析接口
+    
+    一张图片在一个连接中同时执行多个功能（去哪吃/查预制/吃多少的任意子集）。
+    各功能并发执行，共用一次图片准备；事件名带功能前缀，
+    如 "calories.message"，每个功能结束时推送 "<feature>.done"。
+    
+    Args:
+        request: 包含图片路径、功能列表及各功能参数的请求对象
+        http_request: 原始HTTP请求，用于检测客户端断开
+        
+    Returns:
+        StreamingResponse: SSE流式响应
+        
+    Raises:
+        HTTPException: 400 功能列表为空
+    """
+    if not request.features:
+        raise HTTPException(status_code=400, detail="features 不能为空")
+    features = sorted(set(request.features))
+    logger.info(f"[CONTROLLER] 收到组合分析请求: file_path={request.file_path}, features={features}")
+    
+    return await _start_or_resume(
+        "analyze",
+        http_request,
+        lambda: food_service.process_analyze_stream(
+            file_path=request.file_path,
+            features=features,
+            query=request.query,
+            meal_time=request.meal_time or "午餐",
+            latitude=request.latitude,
+            longitude=request.longitude
+        ),
+        make_coalesce_key(
+            "analyze",
+            request.file_path,
+            features=features,
+            query=request.query,
+            meal_time=request.meal_time or "午餐",
+            latitude=request.latitude,
+            longitude=request.longitude
+        )
+    )
+
+
+@router.get("/api/runs/{run_id}/events")
+async def resume_run(
+    run_id: str,
+    http_request: Request,
+    last_event_id: Optional[str] = Header(default=None)
+):
+    """断线续传接口
+    
+    根据运行ID和 Last-Event-ID 请求头，从遗漏的事件处继续推送，
+    不会重新执行工作流。未携带 Last-Event-ID 时从头重放。
+    
+    Args:
+        run_id: 运行ID（首次请求响应头 X-Run-Id）
+        http_request: 原始HTTP请求，用于检测客户端断开
+        last_event_id: 客户端已收到的最后一个事件ID
+        
+    Returns:
+        StreamingResponse: SSE流式响应
+        
+    Raises:
+        HTTPException: 404 运行不存在或已过期；410 事件已超出重放范围
+    """
+    after_seq = 0
+    resume = parse_last_event_id(last_event_id)
+    if resume is not None and resume[0] == run_id:
+        after_seq = resume[1]
+    
+    try:
+        run = run_registry.get(run_id)
+        run.ensure_replayable(after_seq)
+    except RunNotFoundError as e:
+        raise HTTPException(status_code=404, detail=str(e)) from e
+    except ReplayWindowExceededError as e:
+        raise HTTPException(status_code=410, detail=str(e)) from e
+    
+    return _run_response(run, after_seq, http_request)
+
+
 @router.get("/api/history")
-async def get_history():
+async def get_history(
+    http_request: Request,
+    cursor: Optional[str] = None,
+    limit: Optional[int] = None,
+    type: Optional[str] = None
+):
     """获取历史记录接口
     
-    返回用户的所有历史记录。
+    按创建时间倒序分页返回历史记录摘要（不含 details），翻页时传入上一页的 next_cursor。
+    结果经进程内读缓存返回，支持 If-None-Match（304）和 gzip/brotli 压缩。
+    
+    Args:
+        http_request: 原始HTTP请求，用于条件请求和压缩协商
+        cursor: 分页游标，为空时返回第一页
+        limit: 每页条数（默认 HISTORY_PAGE_SIZE，上限 HISTORY_MAX_PAGE_SIZE）
+        type: 按功能类型筛选（where-to-eat/check-premade/calories）
     
     Returns:
-        list: 历史记录列表
+        Response: {"items": 历史记录摘要列表, "next_cursor": 下一页游标或 null}
+        
+    Raises:
+        HTTPException: 400 游标无效
     """
-    return get_user_history()
+    try:
+        cached = await history_read_cache.get_or_load(
+            ("list", cursor, limit, type),
+            lambda: get_user_history(cursor=cursor, limit=limit, record_type=type)
+        )
+    except InvalidCursorError as e:
+        raise HTTPException(status_code=400, detail=str(e)) from e
+    return cached_json_response(http_request, cached, settings.history.history_compress_min_bytes)
+
+
+@router.get("/api/history/export")
+async def export_history(
+    format: str = "ndjson",
+    resume_token: int = 0,
+    type: Optional[str] = None
+) -> StreamingResponse:
+    """导出历史记录接口
+    
+    按ID递增顺序流式导出完整的历史记录（含 details），服务端游标分批读取。
+    连接中断后把收到的最后一条记录的 id 作为 resume_token 重新请求即可续传。
+    
+    Args:
+        format: 导出格式，ndjson（默认）或 csv
+        resume_token: 上次收到的最后一条记录ID，默认从头导出
+        type: 按功能类型筛选（where-to-eat/check-premade/calories）
+        
+    Returns:
+        StreamingResponse: NDJSON 或 CSV 流
+        
+    Raises:
+        HTTPException: 400 不支持的导出格式
+    """
+    if format not in EXPORT_MEDIA_TYPES:
+        raise HTTPException(status_code=400, detail=f"不支持的导出格式: {format}")
+    filename = f"history-{int(time.time())}.{format}"
+    return StreamingResponse(
+        stream_history_export(format, resume_token=resume_token, record_type=type),
+        media_type=EXPORT_MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
+
+
+@router.get("/api/history/search")
+async def search_history(q: str, limit: Optional[int] = None):
+    """搜索历史记录接口
+    
+    按菜名、食物名称、店名或地址搜索历史记录（至少两个字符），
+    使用内存倒排索引，不扫描数据库。
+    
+    Args:
+        q: 查询词，如"红烧肉"
+        limit: 最多返回条数（默认 HISTORY_PAGE_SIZE，上限 HISTORY_MAX_PAGE_SIZE）
+        
+    Returns:
+        dict: {"items": 历史记录摘要列表（最新的在前）}
+    """
+    history_config = settings.history
+    limit = min(limit or history_config.history_page_size, history_config.history_max_page_size)
+    return {"items": await search_history_records(q, limit)}
+
+
+@router.get("/api/history/{record_id}")
+async def get_history_record(record_id: int, http_request: Request):
+    """获取单条历史记录详情接口
+    
+    列表接口不返回 details，查看详情时按ID获取完整记录。
+    与列表接口共用读缓存、条件请求和压缩。
+    
+    Args:
+        record_id: 历史记录ID
+        http_request: 原始HTTP请求，用于条件请求和压缩协商
+        
+    Returns:
+        Response: 完整的历史记录（含 details）
+        
+    Raises:
+        HTTPException: 404 记录不存在
+    """
+    cached = await history_read_cache.get_or_load(("detail", record_id), lambda: get_history_detail(record_id))
+    if cached is None:
+        raise HTTPException(status_code=404, detail=f"历史记录不存在: {record_id}")
+    return cached_json_response(http_request, cached, settings.history.history_compress_min_bytes)
 
 
 @router.post("/api/history")
 async def add_history(record: HistoryRecord):
     """添加历史记录接口
     
-    保存一条新的历史记录到数据库。
+    记录进入批量写入队列，所在批次提交后返回。
     
     Args:
         record: 历史记录对象
         
     Returns:
-        dict: 操作状态 {"status": "ok"}
+        dict: 操作状态和记录ID {"status": "ok", "id": 1}
+        
+    Raises:
+        HTTPException: 503 写入队列已满
     """
-    save_history(record.dict())
-    return {"status": "ok"}
+    try:
+        record_id = await history_writer.submit(record.dict())
+    except HistoryWriterBusyError as e:
+        raise HTTPException(status_code=503, detail=str(e)) from e
+    return {"status": "ok", "id": record_id}
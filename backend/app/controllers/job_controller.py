@@ -0,0 +1,101 @@
+"""
+异步任务控制器模块
+
+处理异步分析任务的提交、查询和事件订阅。
+与流式接口并存：提交后立即返回任务ID，由后台工作池执行工作流。
+"""
+
+from fastapi import APIRouter, Request, HTTPException
+from fastapi.responses import StreamingResponse
+
+from app.config import get_logger
+
+logger = get_logger(__name__)
+
+from app.models.schemas import JobRequest
+from app.services.job_service import job_service, JobQueueFullError, JobNotFoundError
+from app.utils.stream_utils import stream_generator
+
+# 创建API路由器
+router = APIRouter()
+
+
+@router.post("/api/jobs", status_code=202)
+async def submit_job(request: JobRequest):
+    """提交异步任务接口
+    
+    任务进入本地队列后立即返回任务ID，不等待工作流执行。
+    
+    Args:
+        request: 任务请求对象，包含功能名称和工作流参数
+        
+    Returns:
+        dict: 任务状态 {"job_id": str, "feature": str, "status": "pending"}
+        
+    Raises:
+        HTTPException: 503 任务队列已满
+    """
+    try:
+        job = job_service.submit(
+            request.feature,
+            file_path=request.file_path,
+            query=request.query,
+            meal_time=request.meal_time,
+            latitude=request.latitude,
+            longitude=request.longitude
+        )
+    except JobQueueFullError as e:
+        raise HTTPException(status_code=503, detail=str(e)) from e
+    
+    logger.info(f"[CONTROLLER] 已提交任务: job_id={job.job_id}, feature={request.feature}")
+    return job.to_dict()
+
+
+@router.get("/api/jobs/{job_id}")
+async def get_job(job_id: str):
+    """查询任务接口
+    
+    返回任务状态，任务结束后附带完整结果。
+    
+    Args:
+        job_id: 任务ID
+        
+    Returns:
+        dict: 任务状态与结果
+        
+    Raises:
+        HTTPException: 404 任务不存在或已过期
+    """
+    try:
+        return job_service.get(job_id).to_dict()
+    except JobNotFoundError as e:
+        raise HTTPException(status_code=404, detail=str(e)) from e
+
+
+@router.get("/api/jobs/{job_id}/events")
+async def job_events(job_id: str, http_request: Request):
+    """订阅任务事件流接口
+    
+    从头重放任务已产出的事件并持续推送，直到任务结束。
+    客户端断开不会取消任务。
+    
+    Args:
+        job_id: 任务ID
+        http_request: 原始HTTP请求，用于检测客户端断开
+        
+    Returns:
+        StreamingResponse: SSE流式响应
+        
+    Raises:
+        HTTPException: 404 任务不存在或已过期
+    """
+    try:
+        job = job_service.get(job_id)
+    except JobNotFoundError as e:
+        raise HTTPException(status_code=404, detail=str(e)) from e
+    
+    return StreamingResponse(
+        stream_generator(job.run.subscribe(0), http_request),
+        media_type="text/event-stream",
+        headers={"X-Run-Id": job.job_id}
+    )
@@ -0,0 +1,24 @@
+"""
+指标控制器模块
+
+暴露进程内运行指标，便于观测流式分析的耗时、取消节省量等数据。
+"""
+
+from fastapi import APIRouter
+
+from app.utils.metrics import metrics
+
+# 创建API路由器
+router = APIRouter()
+
+
+@router.get("/api/metrics")
+async def get_metrics():
+    """获取运行指标接口
+    
+    返回当前进程累计的计数器和分布统计。
+    
+    Returns:
+        dict: {"counters": {...}, "summaries": {...}}
+    """
+    return metrics.snapshot()
@@ -0,0 +1,61 @@
+"""
+统计控制器模块
+
+提供基于每日热量汇总表（nutrition_daily）的热量趋势统计，
+查询不扫描历史记录表。
+"""
+
+from datetime import date, timedelta
+from typing import Optional
+
+from fastapi import APIRouter, HTTPException
+
+from app.repositories.nutrition_repo import get_daily_stats, get_weekly_stats
+
+# 创建API路由器
+router = APIRouter()
+
+
+def _date_range(start: Optional[date], end: Optional[date], default_days: int) -> tuple:
+    """补全并校验日期范围，缺省为截至今天的 default_days 天"""
+    end = end or date.today()
+    start = start or end - timedelta(days=default_days - 1)
+    if start > end:
+        raise HTTPException(status_code=400, detail="start 不能晚于 end")
+    return start, end
+
+
+@router.get("/api/stats/nutrition/daily")
+async def daily_nutrition(start: Optional[date] = None, end: Optional[date] = None):
+    """每日热量统计接口
+    
+    Args:
+        start: 开始日期（YYYY-MM-DD，默认 end 前 6 天）
+        end: 结束日期（默认今天）
+        
+    Returns:
+        list: 每天的总热量、食物条目数、分析次数和各餐次明细（无记录的日期不返回）
+        
+    Raises:
+        HTTPException: 400 日期范围无效
+    """
+    start, end = _date_range(start, end, 7)
+    return await get_daily_stats(start, end)
+
+
+@router.get("/api/stats/nutrition/weekly")
+async def weekly_nutrition(start: Optional[date] = None, end: Optional[date] = None):
+    """每周热量统计接口
+    
+    Args:
+        start: 开始日期（YYYY-MM-DD，默认 end 前 12 周）
+        end: 结束日期（默认今天）
+        
+    Returns:
+        list: 每周（周一开始）的总热量、日均热量和有记录的天数
+        
+    Raises:
+        HTTPException: 400 日期范围无效
+    """
+    start, end = _date_range(start, end, 84)
+    return await get_weekly_stats(start, end)
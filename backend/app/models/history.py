@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Text, JSON, DateTime
+from sqlalchemy import Column, Index, Integer, String, Text, JSON, DateTime
 from sqlalchemy.sql import func
 from app.config.database import Base
 
@@ -11,3 +11,10 @@ class HistoryModel(Base):
     summary = Column(Text, nullable=True)
     details = Column(JSON, nullable=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    __table_args__ = (
+        # 列表按 (created_at, id) 倒序做游标分页
+        Index("ix_history_created_at_id", "created_at", "id"),
+        # 按类型筛选后同样按时间分页
+        Index("ix_history_type_created_at", "type", "created_at", "id"),
+    )
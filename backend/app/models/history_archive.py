@@ -0,0 +1,15 @@
+from sqlalchemy import Column, Integer, LargeBinary, String, Text, DateTime
+from sqlalchemy.sql import func
+from app.config.database import Base
+
+class HistoryArchiveModel(Base):
+    """归档的历史记录（由 history_retention 从 history 表迁移而来）"""
+    __tablename__ = "history_archive"
+
+    id = Column(Integer, primary_key=True, autoincrement=False) # 原 history.id
+    type = Column(String(50), nullable=False)
+    image_path = Column(String(500), nullable=False)
+    summary = Column(Text, nullable=True)
+    details_zlib = Column(LargeBinary(length=2 ** 24 - 1), nullable=True) # zlib 压缩的 details JSON（MEDIUMBLOB）
+    created_at = Column(DateTime(timezone=True), index=True)
+    archived_at = Column(DateTime(timezone=True), server_default=func.now())
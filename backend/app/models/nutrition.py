@@ -0,0 +1,12 @@
+from sqlalchemy import Column, Date, Float, Integer, String
+from app.config.database import Base
+
+class NutritionDailyModel(Base):
+    """按天、餐次汇总的热量（由"吃多少"历史记录增量维护）"""
+    __tablename__ = "nutrition_daily"
+
+    day = Column(Date, primary_key=True)
+    meal_time = Column(String(20), primary_key=True) # 早餐/午餐/晚餐/下午茶/夜宵
+    total_kcal = Column(Float, nullable=False, default=0)
+    item_count = Column(Integer, nullable=False, default=0) # 食物条目数
+    record_count = Column(Integer, nullable=False, default=0) # 分析次数
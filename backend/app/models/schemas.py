@@ -1,9 +1,15 @@
 from pydantic import BaseModel
-from typing import Dict, Any, Optional
+from typing import Dict, Any, List, Literal, Optional
+
+# 支持的分析功能
+Feature = Literal["where-to-eat", "check-premade", "calories"]
 
 class ChatRequest(BaseModel):
     file_path: str
     query: Optional[str] = None
+    # 用户当前位置（可选，仅去哪吃使用，用于预筛选附近店铺）
+    latitude: Optional[float] = None
+    longitude: Optional[float] = None
 
 class CaloriesRequest(BaseModel):
     """"吃多少"功能的请求模型
@@ -15,8 +21,44 @@ class CaloriesRequest(BaseModel):
     file_path: str
     meal_time: Optional[str] = "午餐"
 
+class AnalyzeRequest(BaseModel):
+    """组合分析请求模型：一张图片同时执行多个功能
+    
+    Attributes:
+        file_path: 上传的图片URL或路径
+        features: 要执行的功能子集，默认全部
+        query: 用户问题（仅去哪吃）
+        latitude: 用户当前纬度（仅去哪吃）
+        longitude: 用户当前经度（仅去哪吃）
+        meal_time: 用餐时间（仅吃多少）
+    """
+    file_path: str
+    features: List[Feature] = ["where-to-eat", "check-premade", "calories"]
+    query: Optional[str] = None
+    latitude: Optional[float] = None
+    longitude: Optional[float] = None
+    meal_time: Optional[str] = "午餐"
+
 class HistoryRecord(BaseModel):
     type: str # 'where-to-eat', 'check-premade', 'calories'
     image_path: str
     summary: str
     details: Dict[str, Any] = {}
+
+class JobRequest(BaseModel):
+    """异步任务提交请求模型
+    
+    Attributes:
+        feature: 分析功能
+        file_path: 上传的图片URL或路径
+        query: 用户问题（仅去哪吃）
+        latitude: 用户当前纬度（仅去哪吃）
+        longitude: 用户当前经度（仅去哪吃）
+        meal_time: 用餐时间（仅吃多少）
+    """
+    feature: Feature
+    file_path: str
+    query: Optional[str] = None
+    latitude: Optional[float] = None
+    longitude: Optional[float] = None
+    meal_time: Optional[str] = "午餐"
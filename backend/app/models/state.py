@@ -1,4 +1,4 @@
-from typing import TypedDict, Annotated, List, Optional
+from typing import TypedDict, Annotated, List, Literal, Optional
 from langchain_core.messages import BaseMessage
 import operator
 
@@ -9,9 +9,19 @@ class AgentState(TypedDict):
     visual_report: str  # Stores result from visual analysis node
     process_report: str # Stores result from process analysis node
     
+    # 查预制功能的执行模式与快速判断结果
+    premade_mode: Optional[Literal["full", "cascade"]]  # 执行模式
+    quick_verdict: Optional[dict]       # 快速判断的结构化结论
+    premade_tokens: Annotated[int, operator.add]  # 已消耗的模型 token 数
+    
     # 吃多少功能的节点状态
     food_report: Optional[str]      # 食物识别结果
     calorie_report: Optional[str]   # 热量估算结果
+    calorie_items: Optional[List[dict]]  # 营养数据库逐项计算结果
     exercise_report: Optional[str]  # 运动消耗结果
     meal_time_report: Optional[str] # 用餐时间建议
     meal_time: Optional[str]        # 用户选择的用餐时间
+    
+    # 去哪吃功能的用户位置（可选）
+    latitude: Optional[float]       # 用户当前纬度
+    longitude: Optional[float]      # 用户当前经度
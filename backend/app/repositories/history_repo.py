@@ -1,35 +1,240 @@
-from typing import List, Dict, Any
-from app.config.database import SessionLocal
+"""
+历史记录数据访问模块
+
+所有函数使用异步会话，在请求处理中直接 await，不阻塞事件循环。
+写入函数使用调用方传入的会话且不提交，事务、热量汇总和读缓存失效
+由 history_service 负责。
+"""
+
+import base64
+import json
+from datetime import datetime
+from typing import AsyncIterator, Dict, Any, List, Optional, Tuple
+
+from sqlalchemy import insert, select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import settings
+from app.config.database import AsyncSessionLocal
 from app.models.history import HistoryModel
 
-def get_user_history() -> List[Dict[str, Any]]:
-    db = SessionLocal()
-    try:
-        records = db.query(HistoryModel).order_by(HistoryModel.created_at.desc()).all()
-        return [
-            {
-                "type": r.type,
-                "image_path": r.image_path,
-                "summary": r.summary,
-                "details": r.details,
-                "created_at": r.created_at.isoformat() if r.created_at else None
-            }
-            for r in records
-        ]
-    finally:
-        db.close()
-
-def save_history(record: Dict[str, Any]):
-    db = SessionLocal()
+
+class InvalidCursorError(ValueError):
+    """分页游标无法解析"""
+
+
+def encode_cursor(created_at: datetime, record_id: int) -> str:
+    """把一页最后一条记录的 (created_at, id) 编码为不透明游标
+
+    Args:
+        created_at: 记录创建时间
+        record_id: 记录ID
+
+    Returns:
+        str: URL 安全的游标字符串
+    """
+    raw = json.dumps([created_at.isoformat(), record_id]).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    """解析游标
+
+    Args:
+        cursor: encode_cursor 生成的游标
+
+    Returns:
+        Tuple[datetime, int]: (created_at, id)
+
+    Raises:
+        InvalidCursorError: 游标格式错误
+    """
     try:
-        db_record = HistoryModel(
-            type=record["type"],
-            image_path=record["image_path"],
-            summary=record["summary"],
-            details=record["details"]
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        created_at, record_id = json.loads(raw)
+        return datetime.fromisoformat(created_at), int(record_id)
+    except (ValueError, TypeError) as e:
+        raise InvalidCursorError(f"无效的分页游标: {cursor}") from e
+
+
+# 列表查询读取的列（不含 details JSON）
+_LIST_COLUMNS = (
+    HistoryModel.id,
+    HistoryModel.type,
+    HistoryModel.image_path,
+    HistoryModel.summary,
+    HistoryModel.created_at,
+)
+
+
+def _to_dict(record: Any) -> Dict[str, Any]:
+    """把记录（ORM 对象或列表查询的行）的轻量字段转换为字典"""
+    return {
+        "id": record.id,
+        "type": record.type,
+        "image_path": record.image_path,
+        "summary": record.summary,
+        "created_at": record.created_at.isoformat() if record.created_at else None
+    }
+
+
+def _page_size(limit: Optional[int]) -> int:
+    """按配置确定每页条数"""
+    history_config = settings.history
+    if not limit or limit <= 0:
+        return history_config.history_page_size
+    return min(limit, history_config.history_max_page_size)
+
+
+async def get_user_history(
+    cursor: Optional[str] = None,
+    limit: Optional[int] = None,
+    record_type: Optional[str] = None
+) -> Dict[str, Any]:
+    """按创建时间倒序分页查询历史记录（不含 details）
+
+    使用 (created_at, id) 游标分页：每页都是从索引中的一个位置开始的
+    范围扫描，耗时与总记录数和翻页深度无关。
+
+    Args:
+        cursor: 上一页返回的 next_cursor，为空时从最新记录开始
+        limit: 每页条数，默认和上限由配置决定
+        record_type: 只返回该类型的记录
+
+    Returns:
+        Dict[str, Any]: {"items": 记录摘要列表, "next_cursor": 下一页游标，没有更多时为 None}
+
+    Raises:
+        InvalidCursorError: 游标格式错误
+    """
+    page_size = _page_size(limit)
+    # 列表只读取轻量列，details 通过 get_history_detail 按ID获取
+    stmt = select(*_LIST_COLUMNS)
+    if record_type:
+        stmt = stmt.where(HistoryModel.type == record_type)
+    if cursor:
+        created_at, record_id = decode_cursor(cursor)
+        stmt = stmt.where(tuple_(HistoryModel.created_at, HistoryModel.id) < tuple_(created_at, record_id))
+    # 多取一条判断是否还有下一页
+    stmt = stmt.order_by(HistoryModel.created_at.desc(), HistoryModel.id.desc()).limit(page_size + 1)
+
+    async with AsyncSessionLocal() as db:
+        records = list(await db.execute(stmt))
+
+    next_cursor = None
+    if len(records) > page_size:
+        records = records[:page_size]
+        next_cursor = encode_cursor(records[-1].created_at, records[-1].id)
+    return {"items": [_to_dict(r) for r in records], "next_cursor": next_cursor}
+
+
+async def get_history_by_ids(record_ids: List[int]) -> List[Dict[str, Any]]:
+    """按ID批量查询历史记录摘要（不含 details），保持传入顺序
+
+    Args:
+        record_ids: 记录ID列表
+
+    Returns:
+        List[Dict[str, Any]]: 历史记录摘要列表，已删除的记录被跳过
+    """
+    if not record_ids:
+        return []
+    async with AsyncSessionLocal() as db:
+        rows = await db.execute(select(*_LIST_COLUMNS).where(HistoryModel.id.in_(record_ids)))
+        by_id = {row.id: _to_dict(row) for row in rows}
+    return [by_id[record_id] for record_id in record_ids if record_id in by_id]
+
+
+async def iter_history_export(
+    after_id: int = 0,
+    record_type: Optional[str] = None,
+    batch_size: Optional[int] = None
+) -> AsyncIterator[List[Dict[str, Any]]]:
+    """按ID递增顺序分批读取完整的历史记录（含 details），用于导出
+
+    使用服务端游标（stream_results）逐批读取，内存占用只与批大小有关。
+    导出期间一直占用一个数据库连接。
+
+    Args:
+        after_id: 只返回ID大于该值的记录（断点续传）
+        record_type: 只返回该类型的记录
+        batch_size: 每批记录数，默认 HISTORY_EXPORT_BATCH_SIZE
+
+    Yields:
+        List[Dict[str, Any]]: 一批历史记录
+    """
+    batch_size = batch_size or settings.history.history_export_batch_size
+    stmt = select(*_LIST_COLUMNS, HistoryModel.details).where(HistoryModel.id > after_id)
+    if record_type:
+        stmt = stmt.where(HistoryModel.type == record_type)
+    stmt = stmt.order_by(HistoryModel.id).execution_options(yield_per=batch_size)
+
+    async with AsyncSessionLocal() as db:
+        result = await db.stream(stmt)
+        async for rows in result.partitions(batch_size):
+            yield [{**_to_dict(row), "details": row.details} for row in rows]
+
+
+async def get_history_detail(record_id: int) -> Optional[Dict[str, Any]]:
+    """按ID查询一条完整的历史记录（含 details）
+
+    Args:
+        record_id: 记录ID
+
+    Returns:
+        Optional[Dict[str, Any]]: 历史记录，不存在时为 None
+    """
+    async with AsyncSessionLocal() as db:
+        record = await db.get(HistoryModel, record_id)
+        if record is None:
+            return None
+        return {**_to_dict(record), "details": record.details}
+
+
+async def insert_history(db: AsyncSession, record: Dict[str, Any]) -> int:
+    """插入一条历史记录（不提交）
+
+    Args:
+        db: 调用方的会话
+        record: 历史记录字典（type/image_path/summary/details）
+
+    Returns:
+        int: 新记录的ID
+    """
+    db_record = HistoryModel(
+        type=record["type"],
+        image_path=record["image_path"],
+        summary=record["summary"],
+        details=record["details"]
+    )
+    db.add(db_record)
+    await db.flush()
+    return db_record.id
+
+
+async def insert_history_batch(db: AsyncSession, records: List[Dict[str, Any]]) -> List[int]:
+    """插入多条历史记录（不提交）
+
+    MySQL 没有 RETURNING，多行 INSERT 只返回第一条记录的自增ID，其余ID
+    在 innodb_autoinc_lock_mode=2 下不保证连续，因此逐条 INSERT 并读取
+    各自的自增ID。所有语句在调用方的同一事务中执行，仍然只提交一次。
+
+    Args:
+        db: 调用方的会话
+        records: 历史记录字典列表
+
+    Returns:
+        List[int]: 新记录的ID，与 records 顺序一致
+    """
+    ids = []
+    for record in records:
+        result = await db.execute(
+            insert(HistoryModel).values(
+                type=record["type"],
+                image_path=record["image_path"],
+                summary=record["summary"],
+                details=record["details"]
+            )
         )
-        db.add(db_record)
-        db.commit()
-        db.refresh(db_record)
-    finally:
-        db.close()
+        ids.append(result.inserted_primary_key[0])
+    return ids
@@ -0,0 +1,115 @@
+"""
+热量汇总数据访问模块
+
+"吃多少"历史记录写入时，history_service 在同一事务中把热量累加到
+nutrition_daily（主键为日期 + 餐次），统计接口只读汇总表，耗时与历史
+记录数无关。
+"""
+
+from datetime import date
+from typing import Any, Dict, List, Tuple
+
+from sqlalchemy import func, select
+from sqlalchemy.dialects.mysql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config.database import AsyncSessionLocal
+from app.models.nutrition import NutritionDailyModel
+
+
+async def add_to_daily_rollup(db: AsyncSession, totals: Dict[str, Tuple[float, int, int]]) -> None:
+    """把各餐次的热量累加到当天的汇总行（不提交）
+
+    日期取数据库的 CURRENT_DATE，与历史记录 created_at 的默认值一致。
+
+    Args:
+        db: 写入历史记录所用的会话
+        totals: 餐次 -> (总热量, 食物条目数, 记录数)
+    """
+    if not totals:
+        return
+    stmt = insert(NutritionDailyModel).values([
+        {
+            "day": func.curdate(),
+            "meal_time": meal_time,
+            "total_kcal": kcal,
+            "item_count": item_count,
+            "record_count": record_count,
+        }
+        for meal_time, (kcal, item_count, record_count) in totals.items()
+    ])
+    stmt = stmt.on_duplicate_key_update(
+        total_kcal=NutritionDailyModel.total_kcal + stmt.inserted.total_kcal,
+        item_count=NutritionDailyModel.item_count + stmt.inserted.item_count,
+        record_count=NutritionDailyModel.record_count + stmt.inserted.record_count,
+    )
+    await db.execute(stmt)
+
+
+async def get_daily_stats(start: date, end: date) -> List[Dict[str, Any]]:
+    """查询日期范围内每天的热量汇总
+
+    Args:
+        start: 开始日期（含）
+        end: 结束日期（含）
+
+    Returns:
+        List[Dict[str, Any]]: 按日期升序，每天含总量和各餐次明细
+    """
+    stmt = (
+        select(NutritionDailyModel)
+        .where(NutritionDailyModel.day.between(start, end))
+        .order_by(NutritionDailyModel.day, NutritionDailyModel.meal_time)
+    )
+    async with AsyncSessionLocal() as db:
+        rows = list((await db.execute(stmt)).scalars())
+
+    days: Dict[date, Dict[str, Any]] = {}
+    for row in rows:
+        day = days.setdefault(row.day, {
+            "day": row.day.isoformat(), "total_kcal": 0.0, "item_count": 0, "record_count": 0, "meals": {}
+        })
+        day["total_kcal"] += row.total_kcal
+        day["item_count"] += row.item_count
+        day["record_count"] += row.record_count
+        day["meals"][row.meal_time] = {"total_kcal": row.total_kcal, "item_count": row.item_count}
+    return list(days.values())
+
+
+async def get_weekly_stats(start: date, end: date) -> List[Dict[str, Any]]:
+    """查询日期范围内每周（周一开始）的热量汇总
+
+    Args:
+        start: 开始日期（含）
+        end: 结束日期（含）
+
+    Returns:
+        List[Dict[str, Any]]: 按周升序，含周一日期、总热量、日均热量和记录天数
+    """
+    # MySQL: 当天减去 WEEKDAY（周一为 0）天即本周周一
+    week_start = func.subdate(NutritionDailyModel.day, func.weekday(NutritionDailyModel.day)).label("week_start")
+    stmt = (
+        select(
+            week_start,
+            func.sum(NutritionDailyModel.total_kcal),
+            func.sum(NutritionDailyModel.item_count),
+            func.sum(NutritionDailyModel.record_count),
+            func.count(func.distinct(NutritionDailyModel.day)),
+        )
+        .where(NutritionDailyModel.day.between(start, end))
+        .group_by(week_start)
+        .order_by(week_start)
+    )
+    async with AsyncSessionLocal() as db:
+        rows = list(await db.execute(stmt))
+    return [
+        {
+            "week_start": week.isoformat() if hasattr(week, "isoformat") else str(week),
+            "total_kcal": float(kcal or 0),
+            "item_count": int(items or 0),
+            "record_count": int(records or 0),
+            "active_days": int(days),
+            "daily_avg_kcal": float(kcal or 0) / days if days else 0.0,
+        }
+        for week, kcal, items, records, days in rows
+    ]
@@ -6,12 +6,14 @@ Agent 工作流包
 - check_premade: 查预制功能  
 - calories: 吃多少功能
 
+线性工作流（去哪吃、吃多少）另提供不依赖 LangGraph 的 *_fast 执行版本。
+
 Usage:
     from app.services.agents import where_to_eat_graph, premade_graph, calories_graph
 """
 
-from app.services.agents.where_to_eat import where_to_eat_graph
+from app.services.agents.where_to_eat import where_to_eat_graph, where_to_eat_fast
 from app.services.agents.check_premade import premade_graph
-from app.services.agents.calories import calories_graph
+from app.services.agents.calories import calories_graph, calories_fast
 
-__all__ = ["where_to_eat_graph", "premade_graph", "calories_graph"]
+__all__ = ["where_to_eat_graph", "where_to_eat_fast", "premade_graph", "calories_graph", "calories_fast"]
@@ -4,8 +4,10 @@ Agent 基础设施模块
 提供所有Agent工作流共用的基础函数和工具。
 """
 
+import inspect
 import random
-from typing import Union
+import typing
+from typing import Any, Callable, Dict, List, Union
 
 from app.constants.preset_responses import (
     WHERE_TO_EAT_PRESETS,
@@ -63,3 +65,63 @@ async def empty_start_node(state: AgentState) -> dict:
         dict: 空字典，不修改状态
     """
     return {}
+
+
+def _state_reducers(state_type: type) -> Dict[str, Callable[[Any, Any], Any]]:
+    """从状态类型的 Annotated 注解中提取字段合并函数（如 messages 的 operator.add）"""
+    reducers = {}
+    for key, hint in typing.get_type_hints(state_type, include_extras=True).items():
+        metadata = getattr(hint, "__metadata__", ())
+        if metadata and callable(metadata[0]):
+            reducers[key] = metadata[0]
+    return reducers
+
+
+class LinearWorkflow:
+    """不依赖 LangGraph 的线性工作流执行器
+    
+    按顺序直接调用节点协程（或异步生成器节点），以与 LangGraph 相同的
+    规则合并状态更新：带 Annotated 合并函数的字段累加，其余字段覆盖。
+    节点签名、状态结构和事件推送方式（emit_event）与图执行完全一致，
+    只适用于单节点或无分支的线性工作流。
+    
+    Args:
+        nodes: 按执行顺序排列的节点函数
+        state_type: 状态类型，默认 AgentState
+    """
+    
+    def __init__(self, nodes: List[Callable[..., Any]], state_type: type = AgentState):
+        self.nodes = list(nodes)
+        self._reducers = _state_reducers(state_type)
+        # 与 LangGraph 一致：只声明 state 参数的节点不传入 config
+        self._takes_config = [len(inspect.signature(node).parameters) > 1 for node in self.nodes]
+    
+    async def ainvoke(self, inputs: Dict[str, Any], config: Dict[str, Any] = None) -> Dict[str, Any]:
+        """执行工作流
+        
+        Args:
+            inputs: 初始状态
+            config: 传给节点的运行配置
+            
+        Returns:
+            Dict[str, Any]: 最终状态
+        """
+        state = dict(inputs)
+        config = config or {}
+        for node, takes_config in zip(self.nodes, self._takes_config):
+            result = node(state, config) if takes_config else node(state)
+            if inspect.isasyncgen(result):
+                async for update in result:
+                    self._merge(state, update)
+            else:
+                self._merge(state, await result)
+        return state
+    
+    def _merge(self, state: Dict[str, Any], update: Dict[str, Any]) -> None:
+        """把节点返回的状态更新合并进当前状态"""
+        for key, value in (update or {}).items():
+            reducer = self._reducers.get(key)
+            if reducer is not None and key in state:
+                state[key] = reducer(state[key], value)
+            else:
+                state[key] = value
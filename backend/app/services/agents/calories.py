@@ -2,7 +2,8 @@
 吃多少功能模块
 
 实现食物热量分析工作流。
-使用并行分析架构：食物识别 + 热量估算 + 运动消耗 -> 聚合输出
+流程：食物识别 -> 热量计算 -> 运动消耗换算 -> 聚合输出
+热量计算查询本地营养数据库，运动消耗按 MET 表换算，两者都不调用模型。
 """
 
 import json
@@ -11,40 +12,39 @@ import re
 from langgraph.graph import StateGraph, END
 from langchain_core.messages import AIMessage, SystemMessage, HumanMessage
 from langchain_core.runnables import RunnableConfig
-from langchain_core.callbacks.manager import adispatch_custom_event
 
 from app.models.state import AgentState
 from app.constants.prompts import (
     FOOD_IDENTIFICATION_PROMPT,
-    CALORIE_ESTIMATION_PROMPT,
-    EXERCISE_ESTIMATION_PROMPT,
     CALORIES_MAIN_PROMPT
 )
-from app.constants.preset_responses import CALORIES_PRESETS
 from app.utils.image_utils import prepare_image_url
-from app.utils.llm_utils import create_chat_model, build_vision_messages
+from app.utils.llm_utils import create_chat_model, build_vision_messages, ainvoke_shared
 from app.utils.stream_utils import ContentSplitter
-from app.services.agents.base import get_preset_response, empty_start_node
+from app.utils.event_channel import emit_event
+from app.services.nutrition_service import nutrition_db, parse_food_report, format_calorie_report
+from app.services.exercise_service import get_exercise_engine
+from app.services.speculative_service import speculative_cache
+from app.services.agents.base import LinearWorkflow
 
+# 食物识别失败时报告的前缀（上传预分析的结果同样适用）
+IDENTIFY_FAILED_PREFIX = "食物识别失败"
 
-async def food_identification_node(state: AgentState, config: RunnableConfig):
-    """食物识别节点：识别图片中的所有食物
+
+async def identify_food(image_path: str) -> str:
+    """调用视觉模型识别图片中的食物
     
-    分析图片中的食物种类、份量、烹饪方式等信息。
+    供食物识别节点和上传预分析共用。
     
     Args:
-        state: Agent状态对象
-        config: LangChain运行配置
+        image_path: 图片URL或本地路径
         
     Returns:
-        dict: 包含食物识别结果的状态更新
+        str: 食物识别报告，图片处理失败时为失败说明
     """
-    image_path = state.get("image_path")
-    
-    # 处理图片
     image_url, error = await prepare_image_url(image_path)
     if error:
-        return {"food_report": f"食物识别失败: {error}"}
+        return f"{IDENTIFY_FAILED_PREFIX}: {error}"
     
     model = create_chat_model()
     messages = build_vision_messages(
@@ -53,48 +53,62 @@ async def food_identification_node(state: AgentState, config: RunnableConfig):
         image_url
     )
     
-    response = await model.ainvoke(messages)
-    await adispatch_custom_event("thought", {"content": "🍽️ 正在识别图片中的食物...\n"}, config=config)
-    
-    return {"food_report": response.content}
+    response = await ainvoke_shared(model, messages)
+    return response.content
 
 
-async def calorie_estimation_node(state: AgentState, config: RunnableConfig):
-    """热量估算节点：估算每种食物的热量
+async def food_identification_node(state: AgentState, config: RunnableConfig):
+    """食物识别节点：识别图片中的所有食物
     
-    根据食物种类和份量计算热量值。
+    分析图片中的食物种类、份量、烹饪方式等信息。
+    上传时已完成预分析的图片直接复用其结果。
     
     Args:
         state: Agent状态对象
         config: LangChain运行配置
         
     Returns:
-        dict: 包含热量估算结果的状态更新
+        dict: 包含食物识别结果的状态更新
     """
     image_path = state.get("image_path")
     
-    # 处理图片
-    image_url, error = await prepare_image_url(image_path)
-    if error:
-        return {"calorie_report": f"热量估算失败: {error}"}
+    food_report = await speculative_cache.take("food_identification", image_path)
+    if food_report is None:
+        food_report = await identify_food(image_path)
+    if food_report.startswith(IDENTIFY_FAILED_PREFIX):
+        emit_event("error", food_report)
+    emit_event("thought", "🍽️ 正在识别图片中的食物...\n")
     
-    model = create_chat_model()
-    messages = build_vision_messages(
-        CALORIE_ESTIMATION_PROMPT,
-        "请估算图片中每种食物的热量",
-        image_url
-    )
+    return {"food_report": food_report}
+
+
+async def calorie_estimation_node(state: AgentState, config: RunnableConfig):
+    """热量计算节点：按营养数据库计算每种食物的热量
+    
+    解析食物识别报告中的食物名称、份量和烹饪方式，
+    查询本地营养成分表计算热量和三大营养素。
+    
+    Args:
+        state: Agent状态对象
+        config: LangChain运行配置
+        
+    Returns:
+        dict: 包含热量报告和逐项计算结果的状态更新
+    """
+    emit_event("thought", "🔢 正在查询营养数据库计算热量...\n")
     
-    response = await model.ainvoke(messages)
-    await adispatch_custom_event("thought", {"content": "🔢 正在估算食物热量...\n"}, config=config)
+    items = nutrition_db.estimate(parse_food_report(state.get("food_report") or ""))
     
-    return {"calorie_report": response.content}
+    return {
+        "calorie_report": format_calorie_report(items),
+        "calorie_items": [item.to_dict() for item in items]
+    }
 
 
 async def exercise_estimation_node(state: AgentState, config: RunnableConfig):
-    """运动消耗估算节点：计算消耗热量所需的运动量
+    """运动消耗换算节点：计算消耗热量所需的运动量
     
-    将热量转换为具体的运动时间建议。
+    按 MET 运动代谢当量表把每种食物的热量换算为具体的运动时间。
     
     Args:
         state: Agent状态对象
@@ -103,24 +117,15 @@ async def exercise_estimation_node(state: AgentState, config: RunnableConfig):
     Returns:
         dict: 包含运动消耗结果的状态更新
     """
-    image_path = state.get("image_path")
+    emit_event("thought", "🏃 正在计算运动消耗...\n")
     
-    # 处理图片
-    image_url, error = await prepare_image_url(image_path)
-    if error:
-        return {"exercise_report": f"运动消耗估算失败: {error}"}
-    
-    model = create_chat_model()
-    messages = build_vision_messages(
-        EXERCISE_ESTIMATION_PROMPT,
-        "请计算消耗这些食物热量所需的运动量",
-        image_url
+    items = state.get("calorie_items") or []
+    report = get_exercise_engine().build_report(
+        [item["name"] for item in items],
+        [item["calories"] for item in items]
     )
     
-    response = await model.ainvoke(messages)
-    await adispatch_custom_event("thought", {"content": "🏃 正在计算运动消耗...\n"}, config=config)
-    
-    return {"exercise_report": response.content}
+    return {"exercise_report": report}
 
 
 async def calories_aggregator_node(state: AgentState, config: RunnableConfig):
@@ -140,9 +145,7 @@ async def calories_aggregator_node(state: AgentState, config: RunnableConfig):
     exercise_report = state.get("exercise_report", "未获取到运动消耗报告")
     meal_time = state.get("meal_time", "午餐")
     
-    # 发送预设思考
-    preset_text = get_preset_response(CALORIES_PRESETS)
-    await adispatch_custom_event("thought", {"content": f"{preset_text}\n⏰ 正在综合分析结果..."}, config=config)
+    emit_event("thought", "⏰ 正在综合分析结果...")
     
     model = create_chat_model()
     
@@ -185,9 +188,9 @@ async def calories_aggregator_node(state: AgentState, config: RunnableConfig):
                     event_content = event["content"]
                     
                     if event_type == "thought":
-                        await adispatch_custom_event("thought", {"content": event_content}, config=config)
+                        emit_event("thought", event_content)
                     elif event_type == "message":
-                        await adispatch_custom_event("message", {"content": event_content}, config=config)
+                        emit_event("message", event_content)
         
         # 刷新缓冲区
         flush_events = splitter.flush()
@@ -196,12 +199,13 @@ async def calories_aggregator_node(state: AgentState, config: RunnableConfig):
             event_content = event["content"]
             
             if event_type == "thought":
-                await adispatch_custom_event("thought", {"content": event_content}, config=config)
+                emit_event("thought", event_content)
             elif event_type == "message":
-                await adispatch_custom_event("message", {"content": event_content}, config=config)
+                emit_event("message", event_content)
                 
     except Exception as e:
         error_msg = f"聚合分析失败: {str(e)}"
+        emit_event("error", error_msg)
         return {"messages": [AIMessage(content=error_msg)]}
     
     # 解析JSON结果并生成function_call
@@ -216,14 +220,12 @@ async def calories_aggregator_node(state: AgentState, config: RunnableConfig):
             food_data = json.loads(json_str)
             
             # 发送function_call事件
-            await adispatch_custom_event("function_call", {
-                "content": json.dumps({
-                    "action": "calories_result",
-                    "food_items": food_data.get("food_items", []),
-                    "total_calories": food_data.get("total_calories", 0),
-                    "overall_advice": food_data.get("overall_advice", "")
-                })
-            }, config=config)
+            emit_event("function_call", {
+                "action": "calories_result",
+                "food_items": food_data.get("food_items", []),
+                "total_calories": food_data.get("total_calories", 0),
+                "overall_advice": food_data.get("overall_advice", "")
+            })
     except Exception as e:
         print(f"[DEBUG] JSON解析失败: {e}")
     
@@ -234,25 +236,27 @@ async def calories_aggregator_node(state: AgentState, config: RunnableConfig):
 calories_workflow = StateGraph(AgentState)
 
 # 添加节点
-calories_workflow.add_node("start", empty_start_node)
 calories_workflow.add_node("food_identification", food_identification_node)
 calories_workflow.add_node("calorie_estimation", calorie_estimation_node)
 calories_workflow.add_node("exercise_estimation", exercise_estimation_node)
 calories_workflow.add_node("aggregator", calories_aggregator_node)
 
-# 设置入口点
-calories_workflow.set_entry_point("start")
+# 设置入口点：只有食物识别需要调用视觉模型
+calories_workflow.set_entry_point("food_identification")
 
-# 从启动节点并行执行三个分析节点
-calories_workflow.add_edge("start", "food_identification")
-calories_workflow.add_edge("start", "calorie_estimation")
-calories_workflow.add_edge("start", "exercise_estimation")
-
-# 汇聚到聚合节点
-calories_workflow.add_edge("food_identification", "aggregator")
-calories_workflow.add_edge("calorie_estimation", "aggregator")
+# 热量计算依赖食物识别结果，运动换算依赖热量结果
+calories_workflow.add_edge("food_identification", "calorie_estimation")
+calories_workflow.add_edge("calorie_estimation", "exercise_estimation")
 calories_workflow.add_edge("exercise_estimation", "aggregator")
 
 calories_workflow.add_edge("aggregator", END)
 
 calories_graph = calories_workflow.compile()
+
+# 无分支的线性工作流，可跳过 LangGraph 的调度开销
+calories_fast = LinearWorkflow([
+    food_identification_node,
+    calorie_estimation_node,
+    exercise_estimation_node,
+    calories_aggregator_node
+])
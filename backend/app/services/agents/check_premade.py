@@ -3,24 +3,33 @@
 
 实现预制菜检测工作流。
 使用并行分析架构：视觉分析 + 工艺分析 -> 聚合输出
+
+cascade 模式下先执行一次快速判断，把握度达到阈值时直接输出结论，
+否则再升级到完整的并行分析。
 """
 
+import json
+import re
+from typing import List
+
 from langgraph.graph import StateGraph, END
 from langchain_core.messages import AIMessage
 from langchain_core.runnables import RunnableConfig
-from langchain_core.callbacks.manager import adispatch_custom_event
 
+from app.config import settings
 from app.models.state import AgentState
 from app.constants.prompts import (
     VISUAL_ANALYSIS_PROMPT,
     PROCESS_ANALYSIS_PROMPT,
-    CHECK_PREMADE_MAIN_PROMPT
+    CHECK_PREMADE_MAIN_PROMPT,
+    QUICK_PREMADE_PROMPT
 )
-from app.constants.preset_responses import CHECK_PREMADE_PRESETS
 from app.utils.image_utils import prepare_image_url
-from app.utils.llm_utils import create_chat_model, build_vision_messages
+from app.utils.llm_utils import create_chat_model, build_vision_messages, ainvoke_shared, usage_tokens
+from app.utils.metrics import metrics
 from app.utils.stream_utils import ContentSplitter
-from app.services.agents.base import get_preset_response, empty_start_node
+from app.utils.event_channel import emit_event
+from app.services.agents.base import empty_start_node
 
 
 async def visual_analysis_node(state: AgentState, config: RunnableConfig):
@@ -41,15 +50,16 @@ async def visual_analysis_node(state: AgentState, config: RunnableConfig):
     # 处理图片
     image_url, error = await prepare_image_url(image_path)
     if error:
+        emit_event("error", f"视觉分析失败: {error}")
         return {"visual_report": f"视觉分析失败: {error}"}
     
     model = create_chat_model()
     messages = build_vision_messages(VISUAL_ANALYSIS_PROMPT, "分析这张图片", image_url)
     
-    response = await model.ainvoke(messages)
-    await adispatch_custom_event("thought", {"content": "正在分析视觉特征（色泽、质地）...\n"}, config=config)
+    response = await ainvoke_shared(model, messages)
+    emit_event("thought", "正在分析视觉特征（色泽、质地）...\n")
     
-    return {"visual_report": response.content}
+    return {"visual_report": response.content, "premade_tokens": usage_tokens(response)}
 
 
 async def process_analysis_node(state: AgentState, config: RunnableConfig):
@@ -70,15 +80,16 @@ async def process_analysis_node(state: AgentState, config: RunnableConfig):
     # 处理图片
     image_url, error = await prepare_image_url(image_path)
     if error:
+        emit_event("error", f"工艺分析失败: {error}")
         return {"process_report": f"工艺分析失败: {error}"}
     
     model = create_chat_model()
     messages = build_vision_messages(PROCESS_ANALYSIS_PROMPT, "分析这张图片", image_url)
     
-    response = await model.ainvoke(messages)
-    await adispatch_custom_event("thought", {"content": "正在推测制作工艺（锅气、工业痕迹）...\n"}, config=config)
+    response = await ainvoke_shared(model, messages)
+    emit_event("thought", "正在推测制作工艺（锅气、工业痕迹）...\n")
     
-    return {"process_report": response.content}
+    return {"process_report": response.content, "premade_tokens": usage_tokens(response)}
 
 
 async def check_premade_aggregator_node(state: AgentState, config: RunnableConfig):
@@ -97,9 +108,7 @@ async def check_premade_aggregator_node(state: AgentState, config: RunnableConfi
     visual_report = state.get("visual_report", "未获取到视觉分析")
     process_report = state.get("process_report", "未获取到工艺分析")
     
-    # 发送预设思考
-    preset_text = get_preset_response(CHECK_PREMADE_PRESETS)
-    await adispatch_custom_event("thought", {"content": f"{preset_text}\n正在综合多维度分析结果..."}, config=config)
+    emit_event("thought", "正在综合多维度分析结果...")
     
     model = create_chat_model()
     
@@ -111,24 +120,126 @@ async def check_premade_aggregator_node(state: AgentState, config: RunnableConfi
     
     # 流式输出
     response_content = ""
+    tokens = state.get("premade_tokens") or 0
     
     try:
         async for chunk in model.astream(messages, config=config):
+            tokens += usage_tokens(chunk)
             chunk_content = ""
             if chunk.content:
                 chunk_content = chunk.content
                 
             if chunk_content:
                 response_content += chunk_content
-                await adispatch_custom_event("message", {"content": chunk_content}, config=config)
+                emit_event("message", chunk_content)
                 
     except Exception as e:
         error_msg = f"聚合分析失败: {str(e)}"
+        emit_event("error", error_msg)
         return {"messages": [AIMessage(content=error_msg)]}
 
+    metrics.observe(f"premade.{_premade_mode(state)}.tokens", tokens)
     return {"messages": [AIMessage(content=response_content)]}
 
 
+async def quick_verdict_node(state: AgentState, config: RunnableConfig):
+    """快速判断节点：单次调用给出结构化结论和把握度
+    
+    仅在 cascade 模式下执行。模型输出无法解析时把握度记为 0，
+    由路由函数升级到完整分析。
+    
+    Args:
+        state: Agent状态对象
+        config: LangChain运行配置
+        
+    Returns:
+        dict: 包含快速判断结论的状态更新
+    """
+    image_path = state.get("image_path")
+    
+    image_url, error = await prepare_image_url(image_path)
+    if error:
+        return {"quick_verdict": {"certainty": 0.0, "error": error}}
+    
+    emit_event("thought", "正在快速鉴定菜品特征...\n")
+    
+    model = create_chat_model()
+    messages = build_vision_messages(QUICK_PREMADE_PROMPT, "鉴定这道菜是否为预制菜", image_url)
+    response = await ainvoke_shared(model, messages)
+    
+    return {"quick_verdict": _parse_verdict(response.content), "premade_tokens": usage_tokens(response)}
+
+
+async def quick_report_node(state: AgentState, config: RunnableConfig):
+    """快速结论节点：把快速判断结果整理为最终报告
+    
+    报告结构与聚合节点的输出一致（Markdown 报告 + 末尾 JSON 结论），
+    不再调用模型。
+    
+    Args:
+        state: Agent状态对象
+        config: LangChain运行配置
+        
+    Returns:
+        dict: 包含最终分析结果的状态更新
+    """
+    verdict = state.get("quick_verdict") or {}
+    
+    name = verdict.get("name") or "这道菜"
+    conclusion = {
+        "name": verdict.get("name", ""),
+        "freshness": verdict.get("freshness", ""),
+        "confidence": verdict.get("confidence", 0),
+        "reason_summary": verdict.get("reason_summary", ""),
+    }
+    report = (
+        f"🧐 鉴定结论\n{name}有 {conclusion['confidence']}% 可能性是预制菜（{conclusion['freshness']}）。\n\n"
+        f"🥩 深度拆解\n"
+        f"- **外观特征**：{verdict.get('appearance', '')}\n"
+        f"- **口感推测**：{verdict.get('texture', '')}\n"
+        f"- **工业痕迹**：{verdict.get('industrial_traces', '')}\n\n"
+        f"📝 综合评价\n{conclusion['reason_summary']}\n\n"
+        f"```json\n{json.dumps(conclusion, ensure_ascii=False, indent=2)}\n```"
+    )
+    emit_event("message", report)
+    
+    metrics.observe("premade.cascade.tokens", state.get("premade_tokens") or 0)
+    return {"messages": [AIMessage(content=report)]}
+
+
+def _parse_verdict(content: str) -> dict:
+    """解析快速判断输出的 JSON，失败时返回把握度为 0 的结论"""
+    match = re.search(r"\{[\s\S]*\}", content or "")
+    try:
+        verdict = json.loads(match.group()) if match else {}
+        verdict["certainty"] = min(max(float(verdict.get("certainty", 0)), 0.0), 1.0)
+    except (ValueError, TypeError, AttributeError):
+        verdict = {"certainty": 0.0}
+    return verdict
+
+
+def _premade_mode(state: AgentState) -> str:
+    """当前运行的执行模式（full/cascade，已在配置和服务入口校验），未指定时使用配置"""
+    return state.get("premade_mode") or settings.premade.premade_mode
+
+
+def route_premade_entry(state: AgentState) -> List[str]:
+    """入口路由：cascade 模式先做快速判断，否则直接并行完整分析"""
+    if _premade_mode(state) == "cascade":
+        return ["quick_verdict"]
+    return ["visual_analysis", "process_analysis"]
+
+
+def route_after_quick_verdict(state: AgentState) -> List[str]:
+    """快速判断后的路由：把握度达到阈值时直接出结论，否则升级"""
+    verdict = state.get("quick_verdict") or {}
+    if verdict.get("certainty", 0.0) >= settings.premade.premade_cascade_threshold:
+        metrics.incr("premade.cascade.accepted")
+        return ["quick_report"]
+    metrics.incr("premade.cascade.escalated")
+    return ["visual_analysis", "process_analysis"]
+
+
 # ========== 构建工作流图 ==========
 premade_workflow = StateGraph(AgentState)
 
@@ -137,13 +248,20 @@ premade_workflow.add_node("start", empty_start_node)
 premade_workflow.add_node("visual_analysis", visual_analysis_node)
 premade_workflow.add_node("process_analysis", process_analysis_node)
 premade_workflow.add_node("aggregator", check_premade_aggregator_node)
+premade_workflow.add_node("quick_verdict", quick_verdict_node)
+premade_workflow.add_node("quick_report", quick_report_node)
 
 # 设置入口点
 premade_workflow.set_entry_point("start")
 
-# 从启动节点并行执行分析节点
-premade_workflow.add_edge("start", "visual_analysis")
-premade_workflow.add_edge("start", "process_analysis")
+# 从启动节点按执行模式进入快速判断，或并行执行分析节点
+premade_workflow.add_conditional_edges(
+    "start", route_premade_entry, ["quick_verdict", "visual_analysis", "process_analysis"]
+)
+premade_workflow.add_conditional_edges(
+    "quick_verdict", route_after_quick_verdict, ["quick_report", "visual_analysis", "process_analysis"]
+)
+premade_workflow.add_edge("quick_report", END)
 
 # 汇聚到聚合节点
 premade_workflow.add_edge("visual_analysis", "aggregator")
@@ -6,27 +6,32 @@
 """
 
 import json
+import logging
 import re
+from typing import Optional
 
 from langgraph.graph import StateGraph, END
 from langchain_core.messages import AIMessage
 from langchain_core.runnables import RunnableConfig
-from langchain_core.callbacks.manager import adispatch_custom_event
 
 from app.models.state import AgentState
 from app.constants.prompts import WHERE_TO_EAT_PROMPT
-from app.constants.preset_responses import WHERE_TO_EAT_PRESETS
+from app.config import settings
+from app.services.poi_index import get_poi_index
 from app.utils.image_utils import prepare_image_url
 from app.utils.llm_utils import create_chat_model, build_vision_messages
 from app.utils.stream_utils import ContentSplitter
-from app.services.agents.base import get_preset_response
+from app.utils.event_channel import emit_event
+from app.services.agents.base import LinearWorkflow
+
+logger = logging.getLogger(__name__)
 
 
 async def where_to_eat_node(state: AgentState, config: RunnableConfig):
     """处理"去哪吃"功能的主节点，负责图片位置识别和流式输出
     
-    该节点接收用户上传的图片，先返回预设响应文本给用户即时反馈，
-    然后调用LLM进行位置推理。使用ContentSplitter解析LLM输出，
+    该节点接收用户上传的图片，调用LLM进行位置推理
+    （预设响应文本已由 FoodService 作为首帧发送）。使用ContentSplitter解析LLM输出，
     将思考过程（reason-content块）和最终答案（answer块）分开返回。
     
     Args:
@@ -39,12 +44,10 @@ async def where_to_eat_node(state: AgentState, config: RunnableConfig):
     # 从状态中获取图片路径和用户查询
     image_path = state.get("image_path")
     user_query = state.get("messages", [{}])[0].content if state.get("messages") else "这是哪里?"
+    user_lat = state.get("latitude")
+    user_lng = state.get("longitude")
     
-    # ========== 步骤1: 发送预设响应 ==========
-    preset_text = get_preset_response(WHERE_TO_EAT_PRESETS)
-    await adispatch_custom_event("thought", {"content": preset_text}, config=config)
-    
-    # ========== 步骤2: 处理图片 ==========
+    # ========== 步骤1: 处理图片 ==========
     image_url, error = await prepare_image_url(image_path)
     if error:
         yield {"messages": [AIMessage(
@@ -53,11 +56,13 @@ async def where_to_eat_node(state: AgentState, config: RunnableConfig):
         )]}
         return
     
-    # ========== 步骤3: 调用LLM进行分析 ==========
+    # ========== 步骤2: 调用LLM进行分析 ==========
     model = create_chat_model()
-    messages = build_vision_messages(WHERE_TO_EAT_PROMPT, user_query, image_url)
+    # 有用户位置时附带附近候选店铺，帮助模型缩小范围
+    candidates_text = _nearby_candidates_text(user_lat, user_lng)
+    messages = build_vision_messages(WHERE_TO_EAT_PROMPT, user_query + candidates_text, image_url)
     
-    # ========== 步骤4: 流式处理LLM响应 ==========
+    # ========== 步骤3: 流式处理LLM响应 ==========
     splitter = ContentSplitter()
     response_content = ""
     thought_content = ""
@@ -82,14 +87,14 @@ async def where_to_eat_node(state: AgentState, config: RunnableConfig):
                     event_content = event["content"]
                     
                     if event_type == "thought":
-                        await adispatch_custom_event("thought", {"content": event_content}, config=config)
+                        emit_event("thought", event_content)
                     elif event_type == "message":
                         # 尝试清理可能出现的JSON块（注意：流式过程中可能清理不完全，在最终结果中会再次清理）
                         # 实际上流式输出时难以完美去除尚未结束的JSON块，暂时直接输出，前端不展示或由最终结果覆盖
                         # 这里还是做简单的JSON块标记清理
                         clean_content = _clean_message_content(event_content)
                         if clean_content.strip():
-                            await adispatch_custom_event("message", {"content": clean_content}, config=config)
+                            emit_event("message", clean_content)
         
         # 刷新缓冲区
         flush_events = splitter.flush()
@@ -98,21 +103,22 @@ async def where_to_eat_node(state: AgentState, config: RunnableConfig):
             event_content = event["content"]
             
             if event_type == "thought":
-                await adispatch_custom_event("thought", {"content": event_content}, config=config)
+                emit_event("thought", event_content)
             elif event_type == "message":
                 clean_content = _clean_message_content(event_content)
                 if clean_content.strip():
-                    await adispatch_custom_event("message", {"content": clean_content}, config=config)
+                    emit_event("message", clean_content)
 
     except Exception as e:
         error_msg = f"AI服务调用失败: {str(e)}"
+        emit_event("error", error_msg)
         yield {"messages": [AIMessage(
             content=error_msg,
             additional_kwargs={"message": error_msg}
         )]}
         return
     
-    # ========== 步骤5: 获取解析结果 ==========
+    # ========== 步骤4: 获取解析结果 ==========
     parsed = splitter.get_parsed_content()
     
     print(f"\n{'='*60}")
@@ -124,7 +130,7 @@ async def where_to_eat_node(state: AgentState, config: RunnableConfig):
     print(f"总响应长度: {len(response_content)}")
     print(f"{'='*60}\n")
     
-    # ========== 步骤6: 提取位置JSON信息 ==========
+    # ========== 步骤5: 提取位置JSON信息 ==========
     # 从完整响应中提取 JSON
     json_pattern = r'```json\s*(\{[^`]*?\})\s*```'
     json_matches = re.findall(json_pattern, response_content, re.DOTALL)
@@ -132,13 +138,13 @@ async def where_to_eat_node(state: AgentState, config: RunnableConfig):
     locations = []
     for json_str in json_matches:
         try:
-            json_data = json.loads(json_str)
+            json_data = _ground_location(json.loads(json_str), user_lat, user_lng)
             if json_data.get("latitude") and json_data.get("longitude"):
                 locations.append(json_data)
         except json.JSONDecodeError:
             continue
     
-    # ========== 步骤7: 构建最终响应消息 ==========
+    # ========== 步骤6: 构建最终响应消息 ==========
     final_messages = []
     
     # 合并思考过程
@@ -166,17 +172,17 @@ async def where_to_eat_node(state: AgentState, config: RunnableConfig):
     # 添加位置信息（支持多个店铺）
     if locations:
         for loc in locations:
+            function_call = {
+                "action": "open_map",
+                "lat": loc.get("latitude"),
+                "lng": loc.get("longitude"),
+                "name": loc.get("name", "未知地点"),
+                "address": loc.get("address", "地址未知")
+            }
+            emit_event("function_call", function_call)
             final_messages.append(AIMessage(
                 content=f"位置已识别: {loc.get('name', '未知地点')}",
-                additional_kwargs={
-                    "function_call": {
-                        "action": "open_map",
-                        "lat": loc.get("latitude"),
-                        "lng": loc.get("longitude"),
-                        "name": loc.get("name", "未知地点"),
-                        "address": loc.get("address", "地址未知")
-                    }
-                }
+                additional_kwargs={"function_call": function_call}
             ))
     else:
         # 如果解析到了 locations 但 parsed.answer 为空？或者没有locations？
@@ -192,6 +198,71 @@ async def where_to_eat_node(state: AgentState, config: RunnableConfig):
     yield {"messages": final_messages}
 
 
+def _nearby_candidates_text(latitude: Optional[float], longitude: Optional[float]) -> str:
+    """根据用户位置生成附近候选店铺的提示文本
+    
+    Args:
+        latitude: 用户纬度
+        longitude: 用户经度
+        
+    Returns:
+        str: 追加到用户问题后的候选店铺列表，无位置或无索引时为空字符串
+    """
+    index = get_poi_index()
+    if index is None or latitude is None or longitude is None:
+        return ""
+    
+    poi_config = settings.poi
+    nearby = index.nearby(latitude, longitude, poi_config.poi_nearby_radius_m, poi_config.poi_nearby_limit)
+    if not nearby:
+        return ""
+    lines = [f"{i}. {poi.name}（{poi.address}，约{int(distance)}米）" for i, (poi, distance) in enumerate(nearby, 1)]
+    return "\n\n用户当前位置附近的候选店铺（仅供参考）：\n" + "\n".join(lines)
+
+
+def _ground_location(
+    location: dict,
+    user_lat: Optional[float],
+    user_lng: Optional[float]
+) -> dict:
+    """用本地 POI 索引校准 LLM 推断的店铺位置
+    
+    按店名在 LLM 推断坐标（缺失时用用户位置）周边模糊匹配，
+    匹配成功则以真实坐标和地址覆盖 LLM 的输出。
+    
+    Args:
+        location: LLM 输出的位置 JSON
+        user_lat: 用户纬度
+        user_lng: 用户经度
+        
+    Returns:
+        dict: 校准后的位置信息，未匹配时原样返回
+    """
+    index = get_poi_index()
+    name = location.get("name")
+    if index is None or not name:
+        return location
+    
+    ref_lat = location.get("latitude") or user_lat
+    ref_lng = location.get("longitude") or user_lng
+    poi_config = settings.poi
+    try:
+        poi = index.snap(
+            name,
+            float(ref_lat) if ref_lat is not None else None,
+            float(ref_lng) if ref_lng is not None else None,
+            min_score=poi_config.poi_snap_min_score,
+            radius_m=poi_config.poi_snap_radius_m
+        )
+    except (TypeError, ValueError):
+        return location
+    if poi is None:
+        return location
+    
+    logger.debug(f"[POI] 位置已校准: {name} -> {poi.name}")
+    return {**location, **poi.to_dict()}
+
+
 def _clean_message_content(content: str) -> str:
     """清理内容中的JSON代码块（仅用于显示给用户的文本）"""
     # 移除 ```json ... ``` 代码块
@@ -205,3 +276,6 @@ where_to_eat_workflow.add_node("agent", where_to_eat_node)
 where_to_eat_workflow.set_entry_point("agent")
 where_to_eat_workflow.add_edge("agent", END)
 where_to_eat_graph = where_to_eat_workflow.compile()
+
+# 单节点工作流的线性执行版本，跳过 LangGraph 的调度开销
+where_to_eat_fast = LinearWorkflow([where_to_eat_node])
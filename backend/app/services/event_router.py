@@ -0,0 +1,133 @@
+"""
+事件路由模块
+
+把节点通过事件通道写入的 (事件类型, 内容) 映射为 SSE 业务事件。
+路由表以事件类型为键，所有功能共用，单次查表完成分发。
+
+逐事件日志只在 DEBUG 级别开启时按采样间隔输出；每次运行结束时
+输出一条汇总日志并写入按功能、事件类型区分的计数器。
+"""
+
+import json
+import logging
+import time
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Optional
+
+from app.config import settings
+from app.utils.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+
+def _parse_function_call(content: Any) -> Any:
+    """function_call 内容为 JSON 字符串时解析为字典，解析失败保留原文"""
+    if isinstance(content, str):
+        try:
+            return json.loads(content)
+        except json.JSONDecodeError:
+            return content
+    return content
+
+
+@dataclass(frozen=True)
+class Route:
+    """一条路由
+
+    Attributes:
+        output: 输出的业务事件字段（thought/message/function_call/error）
+        transform: 可选的内容转换函数
+    """
+    output: str
+    transform: Optional[Callable[[Any], Any]] = None
+
+
+# 事件类型 -> 路由
+EVENT_ROUTES: Dict[str, Route] = {
+    "thought": Route("thought"),
+    "message": Route("message"),
+    "function_call": Route("function_call", _parse_function_call),
+    # 节点内捕获的失败（模型调用异常、图片处理失败等），这类运行的结果不缓存
+    "error": Route("error"),
+}
+
+
+@dataclass
+class RunEventSummary:
+    """单次运行的事件汇总
+
+    Attributes:
+        feature: 功能名称
+        counts: 各输出类型的事件数
+        chars: 文本事件的总字符数
+        dropped: 未匹配路由或内容为空而丢弃的事件数
+        started_at: 开始时间（monotonic）
+    """
+    feature: str
+    counts: Dict[str, int] = field(default_factory=dict)
+    chars: int = 0
+    dropped: int = 0
+    started_at: float = field(default_factory=time.monotonic)
+
+    @property
+    def total(self) -> int:
+        """已输出的事件总数"""
+        return sum(self.counts.values())
+
+
+class EventRouter:
+    """表驱动的事件路由器
+
+    Args:
+        routes: 事件类型到路由的映射
+    """
+
+    def __init__(self, routes: Dict[str, Route] = None):
+        self._routes = routes if routes is not None else EVENT_ROUTES
+
+    def route(self, summary: RunEventSummary, kind: str, content: Any) -> Optional[Dict[str, Any]]:
+        """把一个通道事件转换为业务事件
+
+        Args:
+            summary: 当前运行的事件汇总
+            kind: 事件类型
+            content: 事件内容
+
+        Returns:
+            Optional[Dict[str, Any]]: 业务事件，无匹配路由或内容为空时为 None
+        """
+        route = self._routes.get(kind)
+        if route is None or content is None or content == "":
+            summary.dropped += 1
+            return None
+        if route.transform is not None:
+            content = route.transform(content)
+        count = summary.counts.get(route.output, 0) + 1
+        summary.counts[route.output] = count
+        if isinstance(content, str):
+            summary.chars += len(content)
+        if logger.isEnabledFor(logging.DEBUG):
+            sample_every = settings.stream.stream_debug_log_sample_every
+            if sample_every > 0 and (count - 1) % sample_every == 0:
+                logger.debug("[ROUTER] %s %s #%d: %.30s", summary.feature, route.output, count, content)
+        return {route.output: content}
+
+    def finish(self, summary: RunEventSummary) -> None:
+        """记录运行结束时的汇总日志和计数器
+
+        Args:
+            summary: 当前运行的事件汇总
+        """
+        for output, count in summary.counts.items():
+            metrics.incr(f"events.{summary.feature}.{output}", count)
+        if summary.dropped:
+            metrics.incr(f"events.{summary.feature}.dropped", summary.dropped)
+        logger.info(
+            "[ROUTER] %s 运行结束: events=%d %s chars=%d dropped=%d elapsed=%.2fs",
+            summary.feature, summary.total, summary.counts, summary.chars,
+            summary.dropped, time.monotonic() - summary.started_at
+        )
+
+
+# 全局事件路由器实例
+event_router = EventRouter()
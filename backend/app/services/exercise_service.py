@@ -0,0 +1,91 @@
+"""
+运动消耗换算服务模块
+
+按 MET 运动代谢当量表把食物热量换算为各项运动所需的时间，
+替代原先单独调用一次视觉模型的运动消耗估算。
+
+所有食物与运动项目按"热量 × 每千卡所需分钟数"一次性成批计算。
+"""
+
+from typing import List, Optional, Sequence
+
+from app.config import settings
+from app.constants.exercise import MET_TABLE
+
+
+def kcal_per_minute(met: float, weight_kg: float) -> float:
+    """计算某项运动每分钟消耗的热量（千卡）
+
+    Args:
+        met: 运动代谢当量
+        weight_kg: 体重（公斤）
+
+    Returns:
+        float: 每分钟消耗热量
+    """
+    return met * 3.5 * weight_kg / 200
+
+
+class ExerciseEngine:
+    """运动消耗换算引擎
+
+    Args:
+        activities: 换算的运动项目，需在 MET 表中
+        weight_kg: 体重（公斤）
+    """
+
+    def __init__(self, activities: Sequence[str], weight_kg: float):
+        unknown = [a for a in activities if a not in MET_TABLE]
+        if unknown:
+            raise ValueError(f"MET 表中没有这些运动项目: {', '.join(unknown)}")
+        self.activities = list(activities)
+        self.weight_kg = weight_kg
+        # 每千卡所需分钟数，换算时只需一次乘法
+        self._minutes_per_kcal = [1 / kcal_per_minute(MET_TABLE[a], weight_kg) for a in self.activities]
+
+    def minutes(self, calories: Sequence[float]) -> List[List[int]]:
+        """批量换算运动时间
+
+        Args:
+            calories: 每项食物的热量（千卡）
+
+        Returns:
+            List[List[int]]: 每项食物在各运动项目上所需的分钟数（四舍五入）
+        """
+        rates = self._minutes_per_kcal
+        return [[round(kcal * rate) for rate in rates] for kcal in calories]
+
+    def build_report(self, names: Sequence[str], calories: Sequence[float]) -> str:
+        """生成与运动消耗提示词输出格式一致的报告
+
+        Args:
+            names: 食物名称
+            calories: 每项食物的热量（千卡）
+
+        Returns:
+            str: 运动消耗报告文本，末尾附全部食物的合计
+        """
+        if not names:
+            return "未获取到食物热量，无法换算运动消耗"
+        total = sum(calories)
+        rows = self.minutes(list(calories) + [total])
+        blocks = []
+        for name, kcal, row in zip(list(names) + ["合计"], list(calories) + [total], rows):
+            lines = [f"{name}（{kcal:.0f}千卡）："]
+            lines.extend(f"- {activity} {minutes} 分钟" for activity, minutes in zip(self.activities, row))
+            blocks.append("\n".join(lines))
+        blocks.append(f"（按体重{self.weight_kg:g}公斤、运动代谢当量 MET 换算）")
+        return "\n\n".join(blocks)
+
+
+_engine: Optional[ExerciseEngine] = None
+
+
+def get_exercise_engine() -> ExerciseEngine:
+    """获取按配置创建的全局运动换算引擎"""
+    global _engine
+    if _engine is None:
+        calories_config = settings.calories
+        activities = [a.strip() for a in calories_config.calories_exercise_activities.split(",") if a.strip()]
+        _engine = ExerciseEngine(activities, calories_config.calories_body_weight_kg)
+    return _engine
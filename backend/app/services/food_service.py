@@ -5,17 +5,46 @@
 - 去哪吃功能的流式响应处理
 - 查预制功能的流式响应处理
 - 吃多少功能的流式响应处理
+- 组合分析：一张图片并发执行多个功能，事件合并到同一个流
+- 分析完成后自动保存历史记录（可选）
 
 将业务逻辑从 Controller 层分离，遵循 FastAPI 分层架构最佳实践。
+
+每个流的第一个事件是随机选取的预设思考，在工作流启动前立即发送，
+客户端在模型调用完成前即可看到反馈（事件ID中携带运行ID）。
 """
 
-import json
+import asyncio
+import contextlib
 import logging
-from typing import AsyncGenerator, Dict, Any
+import re
+import time
+from typing import AsyncGenerator, Dict, Any, List, Optional, get_args
 
 from langchain_core.messages import HumanMessage
 
-from app.services.agents import where_to_eat_graph, premade_graph, calories_graph
+from app.config import settings, PremadeMode
+from app.constants.preset_responses import (
+    WHERE_TO_EAT_PRESETS,
+    CHECK_PREMADE_PRESETS,
+    CALORIES_PRESETS
+)
+from app.services.agents import (
+    where_to_eat_graph,
+    where_to_eat_fast,
+    premade_graph,
+    calories_graph,
+    calories_fast
+)
+from app.services.agents.base import get_preset_response
+from app.services.agents.calories import identify_food
+from app.services.event_router import event_router, RunEventSummary
+from app.services.history_writer import history_writer
+from app.services.speculative_service import speculative_cache
+from app.utils.event_channel import run_with_events
+from app.utils.image_utils import prepare_image_url
+from app.utils.metrics import metrics
+from app.utils.shared_results import shared_results
 
 logger = logging.getLogger(__name__)
 
@@ -30,7 +59,9 @@ class FoodService:
     async def process_where_to_eat_stream(
         self,
         file_path: str,
-        query: str = None
+        query: str = None,
+        latitude: float = None,
+        longitude: float = None
     ) -> AsyncGenerator[Dict[str, Any], None]:
         """处理'去哪吃'功能的流式响应
         
@@ -40,6 +71,8 @@ class FoodService:
         Args:
             file_path: 图片文件路径或URL
             query: 用户问题，默认为"这是哪里？"
+            latitude: 用户当前纬度（可选，用于预筛选附近店铺）
+            longitude: 用户当前经度（可选）
             
         Yields:
             Dict: 事件数据字典，包含以下类型：
@@ -49,92 +82,64 @@ class FoodService:
         """
         inputs = {
             "messages": [HumanMessage(content=query or "这是哪里？")],
-            "image_path": file_path
+            "image_path": file_path,
+            "latitude": latitude,
+            "longitude": longitude
         }
         
+        # 首帧：工作流启动前立即发送预设思考
+        yield {"thought": f"{get_preset_response(WHERE_TO_EAT_PRESETS)}\n"}
+        
         logger.info(f"[SERVICE] 开始处理去哪吃请求: {inputs}")
         
-        async for event in where_to_eat_graph.astream_events(inputs, version="v2"):
-            kind = event["event"]
-            name = event["name"]
-            
-            # 1. 捕获思考过程事件
-            if kind == "on_custom_event" and name == "thought":
-                data = event["data"]
-                if "content" in data:
-                    logger.info(f"[SERVICE] 发送思考过程: {data['content'][:30]}...")
-                    yield {"thought": data["content"]}
-            
-            # 2. 捕获消息内容事件
-            elif kind == "on_custom_event" and name == "message":
-                data = event["data"]
-                if "content" in data:
-                    logger.info(f"[SERVICE] 发送答案内容: {data['content'][:30]}...")
-                    yield {"message": data["content"]}
-            
-            # 3. 捕获 Agent 节点的最终输出
-            elif kind == "on_chain_end" and name == "agent":
-                data = event["data"]
-                output = data.get("output")
-                if output and "messages" in output:
-                    messages = output["messages"]
-                    logger.info(f"[SERVICE] Agent节点完成，消息数: {len(messages)}")
-                    for msg in messages:
-                        if isinstance(msg, HumanMessage):
-                            continue
-                        if "function_call" in msg.additional_kwargs:
-                            logger.info("[SERVICE] 发送地图调用")
-                            yield {"function_call": msg.additional_kwargs["function_call"]}
+        workflow = self._workflow("where-to-eat", where_to_eat_graph, where_to_eat_fast)
+        stream = self._stream_graph("where-to-eat", workflow, inputs)
+        async for event in self._capture_history("where-to-eat", file_path, stream):
+            yield event
     
     async def process_check_premade_stream(
         self,
-        file_path: str
+        file_path: str,
+        mode: Optional[PremadeMode] = None
     ) -> AsyncGenerator[Dict[str, Any], None]:
         """处理'查预制'功能的流式响应
         
         接收菜品图片路径，调用 Agent 工作流进行预制菜分析，
-        并将结果以流式事件的形式返回。
+        并将结果以流式事件的形式返回。完整运行的耗时按执行模式记录。
         
         Args:
             file_path: 图片文件路径或URL
+            mode: 执行模式（full/cascade），默认使用配置
             
         Yields:
             Dict: 事件数据字典，包含以下类型：
                 - {"thought": str}: 分析过程
                 - {"message": str}: 分析结论
+                
+        Raises:
+            ValueError: 不支持的执行模式
         """
+        mode = mode or settings.premade.premade_mode
+        if mode not in get_args(PremadeMode):
+            raise ValueError(f"不支持的查预制执行模式: {mode}")
         inputs = {
             "messages": [HumanMessage(content="分析这道菜是否为预制菜")],
-            "image_path": file_path
+            "image_path": file_path,
+            "premade_mode": mode
         }
         
+        # 首帧：工作流启动前立即发送预设思考
+        yield {"thought": f"{get_preset_response(CHECK_PREMADE_PRESETS)}\n"}
+        
         logger.info(f"[SERVICE] 开始处理查预制请求: {inputs}")
+        started = time.monotonic()
         
-        async for event in premade_graph.astream_events(inputs, version="v2"):
-            kind = event["event"]
-            name = event["name"]
-            
-            # 1. 捕获分析过程事件
-            if kind == "on_custom_event" and name == "thought":
-                data = event["data"]
-                if "content" in data:
-                    logger.info(f"[SERVICE] 发送分析过程: {data['content'][:30]}...")
-                    yield {"thought": data["content"]}
-            
-            # 2. 捕获分析结论事件
-            elif kind == "on_custom_event" and name == "message":
-                data = event["data"]
-                if "content" in data:
-                    logger.info(f"[SERVICE] 发送分析结论: {data['content'][:30]}...")
-                    yield {"message": data["content"]}
-            
-            # 3. 捕获 Agent 节点的最终输出
-            elif kind == "on_chain_end" and name == "agent":
-                data = event["data"]
-                output = data.get("output")
-                if output and "messages" in output:
-                    messages = output["messages"]
-                    logger.info(f"[SERVICE] Agent节点完成，消息数: {len(messages)}")
+        stream = self._stream_graph("check-premade", premade_graph, inputs)
+        async for event in self._capture_history("check-premade", file_path, stream):
+            yield event
+        
+        metrics.incr(f"premade.{mode}.runs")
+        metrics.observe(f"premade.{mode}.latency_seconds", time.monotonic() - started)
     
     async def process_calories_stream(
         self,
@@ -162,44 +167,232 @@ class FoodService:
             "meal_time": meal_time
         }
         
+        # 首帧：工作流启动前立即发送预设思考
+        yield {"thought": f"{get_preset_response(CALORIES_PRESETS)}\n"}
+        
         logger.info(f"[SERVICE] 开始处理吃多少请求: {inputs}")
         
-        async for event in calories_graph.astream_events(inputs, version="v2"):
-            kind = event["event"]
-            name = event["name"]
+        workflow = self._workflow("calories", calories_graph, calories_fast)
+        stream = self._stream_graph("calories", workflow, inputs)
+        async for event in self._capture_history("calories", file_path, stream, meal_time=meal_time):
+            yield event
+    
+    async def process_analyze_stream(
+        self,
+        file_path: str,
+        features: List[str],
+        query: str = None,
+        meal_time: str = None,
+        latitude: float = None,
+        longitude: float = None
+    ) -> AsyncGenerator[Dict[str, Any], None]:
+        """处理组合分析的流式响应
+        
+        在同一个共享结果作用域内并发执行选中的功能：图片只准备一次，
+        提示词相同的视觉调用只执行一次。各功能的事件按到达顺序合并，
+        并带上 feature 标签；每个功能结束时产生一个 done 事件。
+        单个功能失败不影响其他功能。
+        
+        Args:
+            file_path: 图片文件路径或URL
+            features: 要执行的功能列表（重复项只执行一次）
+            query: 用户问题，仅"去哪吃"使用
+            meal_time: 用餐时间，仅"吃多少"使用
+            latitude: 用户当前纬度，仅"去哪吃"使用
+            longitude: 用户当前经度，仅"去哪吃"使用
+            
+        Yields:
+            Dict: 带 feature 标签的事件，如 {"feature": "calories", "message": str}；
+                功能结束时为 {"feature": str, "done": {"status": "completed"/"failed"}}
+        """
+        features = list(dict.fromkeys(features))
+        queue: asyncio.Queue = asyncio.Queue()
+        logger.info(f"[SERVICE] 开始处理组合分析请求: file_path={file_path}, features={features}")
+        
+        async def pump(feature: str) -> None:
+            """消费单个功能的事件流并写入合并队列"""
+            done = {"status": "completed"}
+            try:
+                async for event in self.open_stream(
+                    feature, file_path, query=query, meal_time=meal_time,
+                    latitude=latitude, longitude=longitude
+                ):
+                    queue.put_nowait({"feature": feature, **event})
+            except Exception as e:
+                logger.exception(f"[SERVICE] 组合分析中 {feature} 执行失败")
+                done = {"status": "failed", "error": str(e)}
+            queue.put_nowait({"feature": feature, "done": done})
+        
+        # 作用域只需覆盖任务创建：任务继承上下文，共享同一个结果表
+        with shared_results():
+            # 先于各工作流开始准备图片，节点中的 prepare_image_url 直接复用
+            prepare = asyncio.ensure_future(prepare_image_url(file_path))
+            pumps = [asyncio.create_task(pump(feature)) for feature in features]
+        
+        try:
+            remaining = len(pumps)
+            while remaining:
+                event = await queue.get()
+                if "done" in event:
+                    remaining -= 1
+                yield event
+        finally:
+            for task in pumps:
+                task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await asyncio.gather(prepare, *pumps, return_exceptions=True)
+        
+        metrics.incr("analyze.runs")
+        metrics.observe("analyze.features", len(features))
+    
+    def speculate(self, file_path: str) -> bool:
+        """图片上传完成后在后台预先执行食物识别（需开启预分析）
+        
+        Args:
+            file_path: 上传返回的图片URL
+            
+        Returns:
+            bool: 是否启动了预分析
+        """
+        return speculative_cache.start(
+            "food_identification", file_path, lambda: identify_food(file_path)
+        )
+    
+    def _workflow(self, feature: str, graph: Any, fast: Any) -> Any:
+        """按配置为功能选择 LangGraph 图或线性执行器
+        
+        Args:
+            feature: 功能名称
+            graph: 编译后的 LangGraph 工作流
+            fast: 同一工作流的线性执行版本
             
-            # 1. 捕获思考过程事件
-            if kind == "on_custom_event" and name == "thought":
-                data = event["data"]
-                if "content" in data:
-                    logger.info(f"[SERVICE] 发送分析过程: {data['content'][:30]}...")
-                    yield {"thought": data["content"]}
+        Returns:
+            Any: 提供 ainvoke(inputs) 的工作流
+        """
+        fast_features = settings.workflow.workflow_fast_path_features.split(",")
+        return fast if feature in (f.strip() for f in fast_features) else graph
+    
+    async def _stream_graph(
+        self,
+        feature: str,
+        graph: Any,
+        inputs: Dict[str, Any]
+    ) -> AsyncGenerator[Dict[str, Any], None]:
+        """在事件通道中执行工作流，经事件路由器转换为业务事件
+        
+        Args:
+            feature: 功能名称，用于汇总日志和计数器
+            graph: 编译后的工作流或线性执行器
+            inputs: 工作流初始状态
             
-            # 2. 捕获消息内容事件
-            elif kind == "on_custom_event" and name == "message":
-                data = event["data"]
-                if "content" in data:
-                    logger.info(f"[SERVICE] 发送分析结果: {data['content'][:30]}...")
-                    yield {"message": data["content"]}
+        Yields:
+            Dict: {"thought": str} / {"message": str} / {"function_call": dict}
+        """
+        summary = RunEventSummary(feature)
+        try:
+            async for kind, content in run_with_events(lambda: graph.ainvoke(inputs)):
+                event = event_router.route(summary, kind, content)
+                if event is not None:
+                    yield event
+        finally:
+            event_router.finish(summary)
+    
+    async def _capture_history(
+        self,
+        feature: str,
+        file_path: str,
+        stream: AsyncGenerator[Dict[str, Any], None],
+        **extra: Any
+    ) -> AsyncGenerator[Dict[str, Any], None]:
+        """透传事件，并在开启自动保存时于运行结束后写入历史记录
+        
+        流式事件不受影响：结论和功能调用数据在透传的同时累积，
+        全部事件发出后才提交写入；写入完成后追加一个 history 事件。
+        写入失败只记录日志，不影响已完成的分析。
+        
+        Args:
+            feature: 功能名称，即历史记录类型
+            file_path: 图片URL
+            stream: 工作流业务事件流
+            **extra: 额外写入 details 的字段（如 meal_time）
             
-            # 3. 捕获 function_call 事件
-            elif kind == "on_custom_event" and name == "function_call":
-                data = event["data"]
-                if "content" in data:
-                    try:
-                        func_data = json.loads(data["content"])
-                        logger.info("[SERVICE] 发送食物卡片数据")
-                        yield {"function_call": func_data}
-                    except json.JSONDecodeError:
-                        yield {"function_call": data["content"]}
+        Yields:
+            Dict: 原样透传的业务事件，最后可能追加 {"history": {"id": int}}
+        """
+        if not settings.history.history_auto_capture:
+            async for event in stream:
+                yield event
+            return
+        
+        message_parts: List[str] = []
+        function_calls: List[Any] = []
+        async for event in stream:
+            if "message" in event:
+                message_parts.append(event["message"])
+            elif "function_call" in event:
+                function_calls.append(event["function_call"])
+            yield event
+        
+        message = "".join(message_parts).strip()
+        if not message and not function_calls:
+            return
+        record = {
+            "type": feature,
+            "image_path": file_path,
+            "summary": _history_summary(message),
+            "details": {"message": message, "function_calls": function_calls, **extra}
+        }
+        try:
+            record_id = await history_writer.submit(record)
+        except Exception as e:
+            metrics.incr("history.capture.failed")
+            logger.warning(f"[SERVICE] {feature} 历史记录保存失败: {e}")
+            return
+        metrics.incr("history.capture.saved")
+        yield {"history": {"id": record_id}}
+    
+    def open_stream(
+        self,
+        feature: str,
+        file_path: str,
+        query: str = None,
+        meal_time: str = None,
+        latitude: float = None,
+        longitude: float = None
+    ) -> AsyncGenerator[Dict[str, Any], None]:
+        """按功能名称创建对应的流式响应生成器
+        
+        Args:
+            feature: 功能名称（where-to-eat/check-premade/calories）
+            file_path: 图片文件路径或URL
+            query: 用户问题，仅"去哪吃"使用
+            meal_time: 用餐时间，仅"吃多少"使用
+            latitude: 用户当前纬度，仅"去哪吃"使用
+            longitude: 用户当前经度，仅"去哪吃"使用
             
-            # 4. 捕获聚合节点的最终输出
-            elif kind == "on_chain_end" and name == "aggregator":
-                data = event["data"]
-                output = data.get("output")
-                if output and "messages" in output:
-                    messages = output["messages"]
-                    logger.info(f"[SERVICE] 聚合节点完成，消息数: {len(messages)}")
+        Returns:
+            AsyncGenerator: 事件生成器
+            
+        Raises:
+            ValueError: 功能名称未知时
+        """
+        if feature == "where-to-eat":
+            return self.process_where_to_eat_stream(
+                file_path=file_path, query=query, latitude=latitude, longitude=longitude
+            )
+        if feature == "check-premade":
+            return self.process_check_premade_stream(file_path=file_path)
+        if feature == "calories":
+            return self.process_calories_stream(file_path=file_path, meal_time=meal_time or "午餐")
+        raise ValueError(f"未知的功能: {feature}")
+
+
+def _history_summary(message: str, max_length: int = 100) -> str:
+    """从结论文本生成历史记录摘要：去掉 Markdown 标记并截断"""
+    text = re.sub(r"(?m)^\s*[-*>]\s+", "", message)
+    text = re.sub(r"[#*`|]+", " ", text)
+    text = re.sub(r"\s+", " ", text).strip()
+    return text if len(text) <= max_length else text[:max_length] + "…"
 
 
 # 默认服务实例，供 Controller 使用
@@ -0,0 +1,90 @@
+"""
+历史记录导出模块
+
+把历史记录（含 details）以 NDJSON 或 CSV 流式导出，用于数据迁移和离线分析：
+- 从服务端游标按 history_export_batch_size 分批读取，内存占用与总记录数无关
+- 每批在线程池中序列化，不阻塞同一 worker 上的其他请求和 SSE 流
+- 记录按ID递增导出，中断后把收到的最后一条记录的 id 作为 resume_token
+  重新请求即可从断点继续
+
+指标（/api/metrics）：history.export.requests / rows、history.export.batch_seconds
+"""
+
+import asyncio
+import csv
+import io
+import json
+import time
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+from app.repositories.history_repo import iter_history_export
+from app.utils.metrics import metrics
+
+# CSV 的列，details 以 JSON 字符串写入
+CSV_COLUMNS = ["id", "type", "image_path", "summary", "created_at", "details"]
+
+# 导出格式及对应的 Content-Type
+EXPORT_MEDIA_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv; charset=utf-8",
+}
+
+
+def _ndjson_chunk(rows: List[Dict[str, Any]]) -> bytes:
+    """一批记录序列化为 NDJSON，每行一条"""
+    return "".join(
+        json.dumps(row, ensure_ascii=False, separators=(",", ":")) + "\n" for row in rows
+    ).encode("utf-8")
+
+
+def _csv_chunk(rows: List[Dict[str, Any]], header: bool = False) -> bytes:
+    """一批记录序列化为 CSV"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    if header:
+        writer.writerow(CSV_COLUMNS)
+    for row in rows:
+        writer.writerow([
+            row["id"],
+            row["type"],
+            row["image_path"],
+            row["summary"],
+            row["created_at"] or "",
+            json.dumps(row["details"], ensure_ascii=False, separators=(",", ":")),
+        ])
+    return buffer.getvalue().encode("utf-8")
+
+
+async def stream_history_export(
+    export_format: str,
+    resume_token: int = 0,
+    record_type: Optional[str] = None
+) -> AsyncIterator[bytes]:
+    """流式导出历史记录
+
+    Args:
+        export_format: 导出格式（ndjson/csv）
+        resume_token: 上次导出收到的最后一条记录的ID，0 表示从头导出
+        record_type: 只导出该类型的记录
+
+    Yields:
+        bytes: 一批记录序列化后的内容
+
+    Raises:
+        ValueError: 不支持的导出格式
+    """
+    if export_format not in EXPORT_MEDIA_TYPES:
+        raise ValueError(f"不支持的导出格式: {export_format}")
+    metrics.incr("history.export.requests")
+
+    # 断点续传时不再重复输出 CSV 表头
+    if export_format == "csv" and not resume_token:
+        yield _csv_chunk([], header=True)
+    serialize = _ndjson_chunk if export_format == "ndjson" else _csv_chunk
+
+    async for rows in iter_history_export(after_id=resume_token, record_type=record_type):
+        started = time.perf_counter()
+        chunk = await asyncio.to_thread(serialize, rows)
+        metrics.observe("history.export.batch_seconds", time.perf_counter() - started)
+        metrics.incr("history.export.rows", len(rows))
+        yield chunk
@@ -0,0 +1,327 @@
+"""
+历史记录保留与归档模块
+
+history 表只增不减，details JSON 较大，会拖慢写入、索引维护和备份。
+本模块按保留策略把旧记录分批迁出 history 表：
+
+- 保留策略：超过 history_retention_days 天的记录，以及最新
+  history_retention_max_rows 条之外的记录（两者满足其一即归档）
+- 归档目标：history_archive 表（details 以 zlib 压缩存储），或
+  history_archive_dir 下的 jsonl.gz 文件（每批一个 gzip 成员，可直接 zcat）
+- 分批：每批 history_archive_batch_size 条，归档表模式下插入归档与删除
+  在同一事务中；文件模式下先写入并 fsync 文件再删除（中断后重跑可能
+  产生重复行，按 id 去重即可）
+- 限速：两批之间至少暂停 history_archive_pause_ms 毫秒，且不短于上一批
+  的耗时，数据库繁忙时自动放慢，避免长时间占用锁
+- 空间：InnoDB 删除后不会缩小表文件，可选执行 OPTIMIZE TABLE 整理；
+  报告中给出归档前后 history 表的数据、索引和空闲空间
+
+归档开始时按策略确定截止位置 (created_at, id)，运行期间新写入的记录不受影响。
+"每日热量汇总"表中的数据不随归档删除。
+
+使用同步引擎，由 scripts/archive_history.py 定时运行，不在请求处理中调用。
+归档在独立进程中运行，不会清空运行中应用的读缓存（history_read_cache）：
+已缓存的历史记录列表和详情在 HISTORY_CACHE_TTL_SECONDS 过期前仍可能包含已归档
+的记录；搜索索引中的已归档记录在查询回表时移除。
+"""
+
+import gzip
+import json
+import logging
+import os
+import time
+import zlib
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, List, Optional, Tuple
+
+from sqlalchemy import delete, func, insert, literal_column, select, text, tuple_
+
+from app.config import settings
+from app.config.database import engine
+from app.models.history import HistoryModel
+from app.models.history_archive import HistoryArchiveModel
+
+logger = logging.getLogger(__name__)
+
+# 归档读取的列
+_ARCHIVE_COLUMNS = (
+    HistoryModel.id,
+    HistoryModel.type,
+    HistoryModel.image_path,
+    HistoryModel.summary,
+    HistoryModel.details,
+    HistoryModel.created_at,
+)
+
+
+@dataclass
+class RetentionPolicy:
+    """历史记录保留策略
+
+    Attributes:
+        max_age_days: 超过该天数的记录被归档，0 表示不按时间归档
+        max_rows: 最多保留的最新记录数，0 表示不限
+    """
+    max_age_days: int = 0
+    max_rows: int = 0
+
+    @classmethod
+    def from_settings(cls) -> "RetentionPolicy":
+        """从配置读取保留策略"""
+        history_config = settings.history
+        return cls(
+            max_age_days=history_config.history_retention_days,
+            max_rows=history_config.history_retention_max_rows
+        )
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_age_days > 0 or self.max_rows > 0
+
+
+@dataclass
+class TableSize:
+    """InnoDB 表空间统计（来自 information_schema.TABLES，字节）"""
+    rows: int
+    data_bytes: int
+    index_bytes: int
+    free_bytes: int
+
+    @property
+    def total_bytes(self) -> int:
+        return self.data_bytes + self.index_bytes
+
+
+@dataclass
+class RetentionReport:
+    """一次归档的结果
+
+    Attributes:
+        candidates: 截止位置之前的记录数
+        archived: 已归档并从 history 表删除的记录数
+        batches: 归档批次数
+        raw_bytes: 压缩前的字节数（表模式为 details JSON，文件模式为整行 JSON）
+        compressed_bytes: 压缩后写入归档的字节数
+        seconds: 总耗时（含限速暂停）
+        before: 归档前 history 表的空间统计
+        after: 归档（及 OPTIMIZE）后 history 表的空间统计
+        archive_files: 文件模式下写入的归档文件
+    """
+    candidates: int = 0
+    archived: int = 0
+    batches: int = 0
+    raw_bytes: int = 0
+    compressed_bytes: int = 0
+    seconds: float = 0.0
+    before: Optional[TableSize] = None
+    after: Optional[TableSize] = None
+    archive_files: List[str] = field(default_factory=list)
+
+    @property
+    def reclaimed_bytes(self) -> int:
+        """history 表减少的数据 + 索引空间"""
+        if self.before is None or self.after is None:
+            return 0
+        return self.before.total_bytes - self.after.total_bytes
+
+
+def table_size(table_name: str = HistoryModel.__tablename__) -> TableSize:
+    """读取表的空间统计
+
+    先执行 ANALYZE TABLE 刷新统计信息（MySQL 8 默认缓存 information_schema 统计）。
+
+    Args:
+        table_name: 表名
+
+    Returns:
+        TableSize: 行数估计和数据、索引、空闲空间字节数
+    """
+    with engine.connect() as conn:
+        conn.execute(text(f"ANALYZE TABLE `{table_name}`"))
+        row = conn.execute(
+            text(
+                "SELECT table_rows, data_length, index_length, data_free "
+                "FROM information_schema.TABLES "
+                "WHERE table_schema = DATABASE() AND table_name = :table_name"
+            ),
+            {"table_name": table_name}
+        ).one()
+    return TableSize(*(int(value or 0) for value in row))
+
+
+def optimize_table(table_name: str = HistoryModel.__tablename__) -> None:
+    """重建表以回收已删除记录占用的空间（InnoDB 在线重建，期间允许读写）"""
+    with engine.connect() as conn:
+        conn.execute(text(f"OPTIMIZE TABLE `{table_name}`"))
+
+
+def find_cutoff(policy: RetentionPolicy) -> Optional[Tuple[datetime, int]]:
+    """按保留策略确定截止位置，(created_at, id) 不大于它的记录都需要归档
+
+    Args:
+        policy: 保留策略
+
+    Returns:
+        Optional[Tuple[datetime, int]]: 需要归档的最新一条记录的 (created_at, id)，没有需要归档的记录时为 None
+    """
+    newest_first = (HistoryModel.created_at.desc(), HistoryModel.id.desc())
+    cutoffs = []
+    with engine.connect() as conn:
+        if policy.max_rows > 0:
+            row = conn.execute(
+                select(HistoryModel.created_at, HistoryModel.id)
+                .order_by(*newest_first).offset(policy.max_rows).limit(1)
+            ).first()
+            if row is not None:
+                cutoffs.append(tuple(row))
+        if policy.max_age_days > 0:
+            # 使用数据库时间，与 created_at 的 server_default 一致
+            expire_before = func.date_sub(func.now(), literal_column(f"INTERVAL {int(policy.max_age_days)} DAY"))
+            row = conn.execute(
+                select(HistoryModel.created_at, HistoryModel.id)
+                .where(HistoryModel.created_at < expire_before)
+                .order_by(*newest_first).limit(1)
+            ).first()
+            if row is not None:
+                cutoffs.append(tuple(row))
+    return max(cutoffs) if cutoffs else None
+
+
+def _encode_details(details: Any) -> bytes:
+    """details 序列化为 JSON 字节"""
+    return json.dumps(details, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def _archive_to_table(conn, rows: List[Any], report: RetentionReport) -> None:
+    """把一批记录写入 history_archive 表（与删除在同一事务中）"""
+    values = []
+    for row in rows:
+        raw = _encode_details(row.details)
+        compressed = zlib.compress(raw, 6)
+        report.raw_bytes += len(raw)
+        report.compressed_bytes += len(compressed)
+        values.append({
+            "id": row.id,
+            "type": row.type,
+            "image_path": row.image_path,
+            "summary": row.summary,
+            "details_zlib": compressed,
+            "created_at": row.created_at,
+        })
+    conn.execute(insert(HistoryArchiveModel), values)
+
+
+def _archive_to_file(path: str, rows: List[Any], report: RetentionReport) -> None:
+    """把一批记录追加到 jsonl.gz 文件，写入磁盘后才返回"""
+    lines = []
+    for row in rows:
+        record = {
+            "id": row.id,
+            "type": row.type,
+            "image_path": row.image_path,
+            "summary": row.summary,
+            "created_at": row.created_at.isoformat() if row.created_at else None,
+            "details": row.details,
+        }
+        lines.append(json.dumps(record, ensure_ascii=False, separators=(",", ":")))
+    raw = ("\n".join(lines) + "\n").encode("utf-8")
+    member = gzip.compress(raw, compresslevel=6)
+    report.raw_bytes += len(raw)
+    report.compressed_bytes += len(member)
+    with open(path, "ab") as f:
+        f.write(member)
+        f.flush()
+        os.fsync(f.fileno())
+
+
+def archive_history(
+    policy: Optional[RetentionPolicy] = None,
+    target: Optional[str] = None,
+    dry_run: bool = False,
+    optimize: bool = False
+) -> RetentionReport:
+    """按保留策略归档历史记录
+
+    Args:
+        policy: 保留策略，默认读取配置
+        target: 归档目标 table/file，默认 HISTORY_ARCHIVE_TARGET
+        dry_run: 只统计需要归档的记录数，不做修改
+        optimize: 归档后执行 OPTIMIZE TABLE 回收空间
+
+    Returns:
+        RetentionReport: 归档结果和空间变化
+
+    Raises:
+        ValueError: 不支持的归档目标
+    """
+    history_config = settings.history
+    policy = policy or RetentionPolicy.from_settings()
+    target = target or history_config.history_archive_target
+    if target not in ("table", "file"):
+        raise ValueError(f"不支持的归档目标: {target}")
+
+    report = RetentionReport()
+    started = time.perf_counter()
+    cutoff = find_cutoff(policy) if policy.enabled else None
+    if cutoff is None:
+        logger.info("[RETENTION] 没有需要归档的历史记录")
+        return report
+
+    position = tuple_(HistoryModel.created_at, HistoryModel.id)
+    with engine.connect() as conn:
+        report.candidates = conn.execute(
+            select(func.count()).select_from(HistoryModel).where(position <= tuple_(*cutoff))
+        ).scalar_one()
+    logger.info(f"[RETENTION] 截止位置 {cutoff}，待归档 {report.candidates} 条")
+    if dry_run or not report.candidates:
+        report.seconds = time.perf_counter() - started
+        return report
+
+    report.before = table_size()
+    path = None
+    if target == "file":
+        os.makedirs(history_config.history_archive_dir, exist_ok=True)
+        path = os.path.join(history_config.history_archive_dir, f"history-{datetime.now():%Y%m%d-%H%M%S}.jsonl.gz")
+        report.archive_files.append(path)
+
+    batch_size = history_config.history_archive_batch_size
+    pause_seconds = history_config.history_archive_pause_ms / 1000
+    # 上一批最后一条记录的位置，下一批从它之后开始扫描，不再经过已删除的记录
+    lower: Optional[Tuple[datetime, int]] = None
+    while True:
+        batch_started = time.perf_counter()
+        stmt = select(*_ARCHIVE_COLUMNS).where(position <= tuple_(*cutoff))
+        if lower is not None:
+            stmt = stmt.where(position > tuple_(*lower))
+        stmt = stmt.order_by(HistoryModel.created_at, HistoryModel.id).limit(batch_size)
+
+        with engine.begin() as conn:
+            rows = conn.execute(stmt).all()
+            if not rows:
+                break
+            if path is not None:
+                _archive_to_file(path, rows, report)
+            else:
+                _archive_to_table(conn, rows, report)
+            conn.execute(delete(HistoryModel).where(HistoryModel.id.in_([row.id for row in rows])))
+
+        report.archived += len(rows)
+        report.batches += 1
+        lower = (rows[-1].created_at, rows[-1].id)
+        if len(rows) < batch_size:
+            break
+        # 至少暂停与本批耗时相同的时间，数据库繁忙时自动放慢
+        time.sleep(max(pause_seconds, time.perf_counter() - batch_started))
+
+    if optimize:
+        logger.info("[RETENTION] 执行 OPTIMIZE TABLE 回收空间")
+        optimize_table()
+    report.after = table_size()
+    report.seconds = time.perf_counter() - started
+    logger.info(
+        f"[RETENTION] 已归档 {report.archived} 条（{report.batches} 批），"
+        f"details {report.raw_bytes} -> {report.compressed_bytes} 字节，"
+        f"history 表减少 {report.reclaimed_bytes} 字节"
+    )
+    return report
@@ -0,0 +1,301 @@
+"""
+历史记录搜索模块
+
+为历史记录维护一个进程内倒排索引，支持按菜名、食物和店铺搜索
+（如"上个月查过的红烧肉"），不再对 summary 和 details 做 LIKE 扫描。
+
+索引词条来自 details 中的结构化结果：
+- 去哪吃：function_call 中的店名和地址
+- 吃多少：function_call 中 food_items 的食物名称
+- 查预制：结论 JSON 中的菜品名称
+
+索引分两层，均使用 array 紧凑存储的递增列表：
+- 词条层：每个不同的词条（如"红烧肉"、某个店名）一个ID，二元组 -> 词条ID
+- 记录层：词条ID -> 包含该词条的记录ID
+
+查询先在词条层从最短的列表开始逐个求交（在较长的列表中二分查找，
+查找起点随之前移），再用原词条做子串校验，得到真正包含查询词的词条；
+然后从这些词条的记录列表尾部（最新记录）开始归并，凑满 limit 条即停止。
+不同词条的数量远小于记录数，各二元组都常见但很少出现在同一词条中的
+查询（如"羊排骨"）也只需比较词条，不会逐条检查记录。
+宽泛的查询（如"号店"，候选词条超过 _BROAD_TERM_CANDIDATES 个）命中的
+记录很密集，改为从最新记录开始逐条检查，最多检查 _MAX_SCAN_RECORDS 条，
+超出后返回已找到的结果。
+
+增量更新：本进程写入的记录提交后由 history_service 直接加入索引；其他 worker 写入的
+记录在查询前按ID增量拉取（catch_up）。应用启动时在后台分批加载已有记录。
+拉取时仍未提交的事务中的记录（ID 小于游标）不会被拉取，重启后重建索引时补齐。
+被归档删除的记录在查询结果回表时发现，由 history_service 从索引中移除（remove）。
+"""
+
+import asyncio
+import json
+import logging
+import re
+from array import array
+import heapq
+from bisect import bisect_left
+from collections import defaultdict
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import select
+
+from app.config import settings
+from app.config.database import AsyncSessionLocal
+from app.models.history import HistoryModel
+from app.utils.text_utils import normalize_text, char_ngrams
+
+logger = logging.getLogger(__name__)
+
+# 查预制结论 JSON 中的菜品名称
+_DISH_NAME = re.compile(r'"name"\s*:\s*"([^"]+)"')
+# 候选词条超过该数量时视为宽泛查询，改为从最新记录开始逐条检查
+_BROAD_TERM_CANDIDATES = 4096
+# 宽泛查询最多检查的记录数
+_MAX_SCAN_RECORDS = 20000
+
+
+def extract_search_terms(record_type: str, details: Optional[Dict[str, Any]]) -> List[str]:
+    """从历史记录 details 中提取可搜索的词条
+
+    Args:
+        record_type: 历史记录类型
+        details: 历史记录 details
+
+    Returns:
+        List[str]: 菜名、食物名、店名和地址
+    """
+    if not details:
+        return []
+    terms: List[str] = []
+    calls = list(details.get("function_calls") or [])
+    if details.get("function_call"):
+        calls.append(details["function_call"])
+    for call in calls:
+        if not isinstance(call, dict):
+            continue
+        for key in ("name", "address"):
+            if call.get(key):
+                terms.append(str(call[key]))
+        for item in call.get("food_items") or []:
+            if isinstance(item, dict) and item.get("name"):
+                terms.append(str(item["name"]))
+    if record_type == "check-premade":
+        terms.extend(_DISH_NAME.findall(details.get("message") or ""))
+    return terms
+
+
+def _as_details(value: Any) -> Optional[Dict[str, Any]]:
+    """数据库驱动可能把 JSON 列返回为字符串"""
+    if isinstance(value, str):
+        try:
+            return json.loads(value)
+        except json.JSONDecodeError:
+            return None
+    return value
+
+
+class HistorySearchIndex:
+    """历史记录倒排索引
+
+    倒排列表均按ID递增排列。_last_id 是从数据库增量拉取的游标，
+    只由 catch_up 推进：本进程写入后直接 add 的记录不影响游标，
+    其他 worker 写入的较小ID仍会被拉取。
+    """
+
+    def __init__(self):
+        # 词条层：词条文本 <-> 词条ID，二元组 -> 词条ID 列表
+        self._vocab: Dict[str, int] = {}
+        self._term_texts: List[str] = []
+        self._gram_terms: Dict[str, array] = defaultdict(lambda: array("i"))
+        # 记录层：词条ID -> 记录ID 列表；记录ID -> 词条ID（按加入顺序，基本即ID顺序）
+        self._term_records: List[array] = []
+        self._record_terms: Dict[int, Tuple[int, ...]] = {}
+        self._last_id = 0
+        self._lock = asyncio.Lock()
+
+    def __len__(self) -> int:
+        return len(self._record_terms)
+
+    def add(self, record_id: int, terms: Iterable[str]) -> None:
+        """把一条记录加入索引，已索引的记录忽略
+
+        Args:
+            record_id: 历史记录ID
+            terms: 记录的词条
+        """
+        if record_id in self._record_terms:
+            return
+        term_ids = {self._term_id(term) for term in map(normalize_text, terms) if term}
+        if not term_ids:
+            return
+        self._record_terms[record_id] = tuple(term_ids)
+        for term_id in term_ids:
+            _insert_sorted(self._term_records[term_id], record_id)
+
+    def remove(self, record_id: int) -> None:
+        """从索引中移除一条记录（如已被归档删除），未索引的记录忽略
+
+        Args:
+            record_id: 历史记录ID
+        """
+        term_ids = self._record_terms.pop(record_id, None)
+        for term_id in term_ids or ():
+            posting = self._term_records[term_id]
+            i = bisect_left(posting, record_id)
+            if i < len(posting) and posting[i] == record_id:
+                posting.pop(i)
+
+    def search(self, query: str, limit: int = 20) -> List[int]:
+        """搜索包含查询词的记录
+
+        Args:
+            query: 查询词（至少两个字符）
+            limit: 最多返回数量
+
+        Returns:
+            List[int]: 记录ID，最新的在前
+        """
+        needle = normalize_text(query)
+        if len(needle) < 2 or limit <= 0:
+            return []
+        postings = []
+        for gram in char_ngrams(needle):
+            posting = self._gram_terms.get(gram)
+            if not posting:
+                return []
+            postings.append(posting)
+        postings.sort(key=len)
+
+        candidates = postings[0]
+        for posting in postings[1:]:
+            candidates = _intersect(candidates, posting)
+            if not candidates:
+                return []
+        if len(candidates) > _BROAD_TERM_CANDIDATES:
+            return self._scan_newest(needle, limit)
+        term_texts = self._term_texts
+        matched = [term_id for term_id in candidates if needle in term_texts[term_id]]
+        return self._newest_records([self._term_records[term_id] for term_id in matched], limit)
+
+    def _term_id(self, term: str) -> int:
+        """取得词条ID，新词条加入词条层"""
+        term_id = self._vocab.get(term)
+        if term_id is None:
+            term_id = len(self._term_texts)
+            self._vocab[term] = term_id
+            self._term_texts.append(term)
+            self._term_records.append(array("i"))
+            for gram in char_ngrams(term):
+                self._gram_terms[gram].append(term_id)
+        return term_id
+
+    def _scan_newest(self, needle: str, limit: int) -> List[int]:
+        """从最新加入的记录开始逐条检查，用于宽泛查询"""
+        term_texts = self._term_texts
+        term_hits: Dict[int, bool] = {}
+        found: List[int] = []
+        for scanned, record_id in enumerate(reversed(self._record_terms)):
+            if scanned >= _MAX_SCAN_RECORDS or len(found) >= limit:
+                break
+            for term_id in self._record_terms[record_id]:
+                hit = term_hits.get(term_id)
+                if hit is None:
+                    hit = term_hits[term_id] = needle in term_texts[term_id]
+                if hit:
+                    found.append(record_id)
+                    break
+        # 其他 worker 的记录可能晚于较大的ID加入，按ID重新排序
+        return sorted(found, reverse=True)
+
+    @staticmethod
+    def _newest_records(postings: List[array], limit: int) -> List[int]:
+        """从多个递增的记录列表中取最新的 limit 条（去重）"""
+        if len(postings) == 1:
+            return list(reversed(postings[0][-limit:]))
+        # 按各列表的最后一条建堆，逐个弹出最新的记录
+        heap = [(-posting[-1], i, len(posting) - 1) for i, posting in enumerate(postings) if posting]
+        heapq.heapify(heap)
+        found: List[int] = []
+        while heap and len(found) < limit:
+            negative_id, i, position = heapq.heappop(heap)
+            if not found or found[-1] != -negative_id:
+                found.append(-negative_id)
+            if position > 0:
+                heapq.heappush(heap, (-postings[i][position - 1], i, position - 1))
+        return found
+
+    async def catch_up(self, max_rows: Optional[int] = None) -> int:
+        """从数据库拉取尚未索引的新记录
+
+        已有其他协程在拉取时直接返回，不等待。
+
+        Args:
+            max_rows: 本次最多拉取的记录数，None 表示全部
+
+        Returns:
+            int: 本次加入索引的记录数
+        """
+        if self._lock.locked():
+            return 0
+        batch_size = settings.history.history_search_load_batch_size
+        loaded = 0
+        async with self._lock:
+            while max_rows is None or loaded < max_rows:
+                size = batch_size if max_rows is None else min(batch_size, max_rows - loaded)
+                stmt = (
+                    select(HistoryModel.id, HistoryModel.type, HistoryModel.details)
+                    .where(HistoryModel.id > self._last_id)
+                    .order_by(HistoryModel.id)
+                    .limit(size)
+                )
+                async with AsyncSessionLocal() as db:
+                    rows = list(await db.execute(stmt))
+                for record_id, record_type, details in rows:
+                    self.add(record_id, extract_search_terms(record_type, _as_details(details)))
+                    self._last_id = record_id
+                loaded += len(rows)
+                if len(rows) < size:
+                    break
+                # 分批加载期间让出事件循环
+                await asyncio.sleep(0)
+        return loaded
+
+    async def build(self) -> None:
+        """应用启动时在后台加载全部已有记录"""
+        try:
+            loaded = await self.catch_up()
+            logger.info(f"[SEARCH] 历史记录索引已加载 {loaded} 条，可搜索 {len(self)} 条")
+        except Exception as e:
+            logger.error(f"[SEARCH] 加载历史记录索引失败: {e}")
+
+
+def _insert_sorted(posting: array, value: int) -> None:
+    """把ID插入递增列表（通常追加在末尾）"""
+    if not posting or posting[-1] < value:
+        posting.append(value)
+    else:
+        # 本进程写入的记录先于其他 worker 的较小ID加入时，保持列表有序
+        i = bisect_left(posting, value)
+        if i == len(posting) or posting[i] != value:
+            posting.insert(i, value)
+
+
+def _intersect(small: Iterable[int], large: array) -> List[int]:
+    """求两个递增列表的交集
+
+    遍历较短的列表，在较长的列表中二分查找，查找起点随匹配位置前移。
+    """
+    found = []
+    lo, size = 0, len(large)
+    for value in small:
+        lo = bisect_left(large, value, lo)
+        if lo == size:
+            break
+        if large[lo] == value:
+            found.append(value)
+    return found
+
+
+# 全局历史记录索引实例
+history_search_index = HistorySearchIndex()
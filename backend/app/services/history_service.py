@@ -0,0 +1,156 @@
+"""
+历史记录服务模块
+
+编排历史记录写入的业务逻辑，数据访问由 history_repo / nutrition_repo 完成：
+- 记录插入和"吃多少"热量累加到每日汇总表在同一事务中提交
+- 提交后清空历史记录接口的读缓存（history_read_cache）
+- 提交后把记录加入搜索索引（history_search_index）
+- 搜索结果回表时移除已被归档删除的记录，并补足 limit 条
+"""
+
+import re
+from collections import defaultdict
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.config import settings
+from app.config.database import AsyncSessionLocal
+from app.repositories import history_repo, nutrition_repo
+from app.services.history_search import history_search_index, extract_search_terms
+from app.utils.http_cache import ReadCache
+
+# 搜索结果中有记录已被删除时，移除后重新搜索补足的最多轮数
+_SEARCH_TOP_UP_ROUNDS = 3
+
+# 历史记录中没有用餐时间时使用的餐次
+UNKNOWN_MEAL_TIME = "未知"
+
+# 历史记录接口的读缓存，本模块中的写入提交后使其失效
+history_read_cache = ReadCache(
+    "history",
+    ttl_seconds=settings.history.history_cache_ttl_seconds,
+    max_entries=settings.history.history_cache_max_entries
+)
+
+
+def _to_kcal(value: Any) -> float:
+    """解析热量数值（支持 "520 kcal" 这类文本）"""
+    if isinstance(value, (int, float)):
+        return float(value)
+    match = re.search(r"\d+(?:\.\d+)?", str(value or ""))
+    return float(match.group()) if match else 0.0
+
+
+def extract_calorie_totals(details: Optional[Dict[str, Any]]) -> Optional[Tuple[str, float, int]]:
+    """从"吃多少"历史记录的 details 中提取热量汇总
+
+    兼容服务端自动保存的 function_calls 列表和客户端提交的单个 function_call。
+
+    Args:
+        details: 历史记录 details
+
+    Returns:
+        Optional[Tuple[str, float, int]]: (餐次, 总热量, 食物条目数)，没有热量结果时为 None
+    """
+    if not isinstance(details, dict):
+        return None
+    calls = details.get("function_calls")
+    calls = list(calls) if isinstance(calls, list) else []
+    if details.get("function_call"):
+        calls.append(details["function_call"])
+    for call in calls:
+        if isinstance(call, dict) and call.get("action") == "calories_result":
+            items = call.get("food_items")
+            items = [item for item in items if isinstance(item, dict)] if isinstance(items, list) else []
+            total = call.get("total_calories")
+            kcal = _to_kcal(total) if total else sum(_to_kcal(item.get("calories")) for item in items)
+            return details.get("meal_time") or UNKNOWN_MEAL_TIME, kcal, len(items)
+    return None
+
+
+def _calorie_totals(records: List[Dict[str, Any]]) -> Dict[str, Tuple[float, int, int]]:
+    """按餐次汇总一批记录中的"吃多少"结果：餐次 -> (总热量, 食物条目数, 记录数)"""
+    totals: Dict[str, List[float]] = defaultdict(lambda: [0.0, 0, 0])
+    for record in records:
+        if record.get("type") != "calories":
+            continue
+        extracted = extract_calorie_totals(record.get("details"))
+        if extracted is None:
+            continue
+        meal_time, kcal, item_count = extracted
+        total = totals[meal_time]
+        total[0] += kcal
+        total[1] += item_count
+        total[2] += 1
+    return {meal_time: tuple(total) for meal_time, total in totals.items()}
+
+
+def _index_records(records: List[Dict[str, Any]], ids: List[int]) -> None:
+    """把已提交的记录加入搜索索引"""
+    for record, record_id in zip(records, ids):
+        history_search_index.add(record_id, extract_search_terms(record["type"], record["details"]))
+
+
+async def save_history(record: Dict[str, Any]) -> int:
+    """保存一条历史记录
+
+    Args:
+        record: 历史记录字典（type/image_path/summary/details）
+
+    Returns:
+        int: 新记录的ID
+    """
+    async with AsyncSessionLocal() as db:
+        record_id = await history_repo.insert_history(db, record)
+        await nutrition_repo.add_to_daily_rollup(db, _calorie_totals([record]))
+        await db.commit()
+    history_read_cache.invalidate()
+    _index_records([record], [record_id])
+    return record_id
+
+
+async def save_history_batch(records: List[Dict[str, Any]]) -> List[int]:
+    """在一个事务中保存多条历史记录
+
+    Args:
+        records: 历史记录字典列表
+
+    Returns:
+        List[int]: 新记录的ID，与 records 顺序一致
+    """
+    async with AsyncSessionLocal() as db:
+        ids = await history_repo.insert_history_batch(db, records)
+        await nutrition_repo.add_to_daily_rollup(db, _calorie_totals(records))
+        await db.commit()
+    history_read_cache.invalidate()
+    _index_records(records, ids)
+    return ids
+
+
+async def search_history(query: str, limit: int) -> List[Dict[str, Any]]:
+    """搜索历史记录并查询摘要
+
+    归档在独立进程中删除记录，本进程的索引中仍有这些记录。回表时没有查到的
+    记录从索引中移除并重新搜索，补足 limit 条（最多 _SEARCH_TOP_UP_ROUNDS 轮）。
+
+    Args:
+        query: 查询词
+        limit: 最多返回条数
+
+    Returns:
+        List[Dict[str, Any]]: 历史记录摘要列表，最新的在前
+    """
+    # 先拉取其他 worker 新写入的记录
+    await history_search_index.catch_up(settings.history.history_search_catch_up_rows)
+    found: Dict[int, Dict[str, Any]] = {}
+    record_ids: List[int] = []
+    for _ in range(_SEARCH_TOP_UP_ROUNDS):
+        record_ids = history_search_index.search(query, limit)
+        unknown = [record_id for record_id in record_ids if record_id not in found]
+        for item in await history_repo.get_history_by_ids(unknown):
+            found[item["id"]] = item
+        missing = [record_id for record_id in record_ids if record_id not in found]
+        if not missing:
+            break
+        for record_id in missing:
+            history_search_index.remove(record_id)
+    return [found[record_id] for record_id in record_ids if record_id in found]
@@ -0,0 +1,201 @@
+"""
+历史记录批量写入模块
+
+POST /api/history 不再逐条开会话、提交和 refresh，而是把记录放入
+进程内的写入队列，由单个写入协程按批写入：收到第一条记录后最多等待
+history_write_flush_interval_ms 毫秒或凑满 history_write_batch_size 条，
+在一个事务中写入整批记录（每批一次提交）。
+
+- 调用方等待所在批次提交后拿到记录ID
+- 整批写入失败时逐条重试，只有本身写入失败的记录把异常传给其调用方
+- 队列有界：数据库变慢时队列写满，新的写入等待入队，超时抛出 HistoryWriterBusyError
+- 应用关闭时先写完队列中的所有记录再退出；关闭开始后的新写入直接逐条写入，
+  不再重新启动写入器
+
+指标（/api/metrics）：history.write.records / batches / failed / retried / backpressure / rejected、
+history.write.batch_size、history.write.batch_seconds
+"""
+
+import asyncio
+import logging
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+
+from app.config import settings
+from app.services.history_service import save_history, save_history_batch
+from app.utils.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+
+class HistoryWriterBusyError(Exception):
+    """写入队列已满且等待超时"""
+
+
+def _iter_nowait(queue: asyncio.Queue):
+    """不等待地取出队列中的所有元素"""
+    while not queue.empty():
+        yield queue.get_nowait()
+
+
+@dataclass
+class _PendingWrite:
+    """一条等待写入的记录
+
+    Attributes:
+        record: 历史记录字典
+        future: 写入完成后设置记录ID
+    """
+    record: Dict[str, Any]
+    future: asyncio.Future = field(default_factory=lambda: asyncio.get_running_loop().create_future())
+
+
+class HistoryWriter:
+    """历史记录批量写入器
+
+    写入协程在首次提交或应用启动时创建，shutdown 之后不再创建。
+    """
+
+    def __init__(self):
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+        self._closing = False
+
+    def start(self) -> None:
+        """创建写入队列并启动写入协程（重复调用或关闭后调用无副作用）"""
+        if self._queue is not None or self._closing:
+            return
+        self._queue = asyncio.Queue(maxsize=settings.history.history_write_queue_max_size)
+        self._worker = asyncio.create_task(self._run())
+
+    async def shutdown(self) -> None:
+        """写完队列中的所有记录后停止写入协程
+
+        调用后 submit 不再入队，改为直接写入数据库。
+        """
+        if self._closing:
+            return
+        self._closing = True
+        if self._queue is None:
+            return
+        pending = self._queue.qsize()
+        if pending:
+            logger.info(f"[HISTORY] 关闭前写入剩余的 {pending} 条记录")
+        await self._queue.put(None)
+        await self._worker
+
+    async def submit(self, record: Dict[str, Any]) -> int:
+        """提交一条历史记录并等待其所在批次提交
+
+        Args:
+            record: 历史记录字典（type/image_path/summary/details）
+
+        Returns:
+            int: 新记录的ID
+
+        Raises:
+            HistoryWriterBusyError: 队列已满且在超时时间内未能入队
+            Exception: 记录写入数据库失败
+        """
+        if self._closing:
+            return await save_history(record)
+        self.start()
+        pending = _PendingWrite(record)
+        try:
+            self._queue.put_nowait(pending)
+        except asyncio.QueueFull:
+            # 数据库变慢导致队列积压，等待写入协程腾出空间
+            metrics.incr("history.write.backpressure")
+            try:
+                await asyncio.wait_for(
+                    self._queue.put(pending),
+                    timeout=settings.history.history_write_enqueue_timeout
+                )
+            except asyncio.TimeoutError as e:
+                metrics.incr("history.write.rejected")
+                raise HistoryWriterBusyError("历史记录写入繁忙，请稍后重试") from e
+        return await pending.future
+
+    async def _run(self) -> None:
+        """写入协程：按批取出记录并写入，收到 None 时写完当前批次后退出"""
+        history_config = settings.history
+        queue = self._queue
+        stopping = False
+        while not stopping:
+            first = await queue.get()
+            if first is None:
+                break
+            batch = [first]
+            deadline = time.monotonic() + history_config.history_write_flush_interval_ms / 1000
+            while len(batch) < history_config.history_write_batch_size:
+                # 队列中已有的记录直接取出，不等待
+                if queue.empty():
+                    timeout = deadline - time.monotonic()
+                    if timeout <= 0:
+                        break
+                    try:
+                        item = await asyncio.wait_for(queue.get(), timeout)
+                    except asyncio.TimeoutError:
+                        break
+                else:
+                    item = queue.get_nowait()
+                if item is None:
+                    stopping = True
+                    break
+                batch.append(item)
+            await self._write(batch)
+
+        # 排在结束标记之后的记录（含关闭前等待入队的记录）也要写完，
+        # 取出记录会唤醒等待入队的调用方，直到队列不再有新记录
+        while True:
+            remaining = [item for item in _iter_nowait(queue) if item is not None]
+            if not remaining:
+                break
+            await self._write(remaining)
+
+    async def _write(self, batch: List[_PendingWrite]) -> None:
+        """写入一批记录并通知调用方"""
+        started = time.monotonic()
+        try:
+            ids = await save_history_batch([pending.record for pending in batch])
+        except Exception as e:
+            if len(batch) == 1:
+                self._fail(batch[0], e)
+                return
+            # 整批事务已回滚，逐条重试，一条坏记录不影响同批的其他调用方
+            logger.warning(f"[HISTORY] 批量写入 {len(batch)} 条记录失败，逐条重试: {e}")
+            metrics.incr("history.write.retried", len(batch))
+            for pending in batch:
+                try:
+                    record_id = await save_history(pending.record)
+                except Exception as record_error:
+                    self._fail(pending, record_error)
+                else:
+                    self._resolve(pending, record_id)
+            return
+
+        for pending, record_id in zip(batch, ids):
+            self._resolve(pending, record_id)
+        metrics.incr("history.write.batches")
+        metrics.observe("history.write.batch_size", len(batch))
+        metrics.observe("history.write.batch_seconds", time.monotonic() - started)
+
+    @staticmethod
+    def _resolve(pending: _PendingWrite, record_id: int) -> None:
+        """通知调用方记录已写入"""
+        metrics.incr("history.write.records")
+        if not pending.future.done():
+            pending.future.set_result(record_id)
+
+    @staticmethod
+    def _fail(pending: _PendingWrite, error: Exception) -> None:
+        """把写入异常传给调用方"""
+        metrics.incr("history.write.failed")
+        logger.error(f"[HISTORY] 历史记录写入失败: {error}")
+        if not pending.future.done():
+            pending.future.set_exception(error)
+
+
+# 全局写入器实例
+history_writer = HistoryWriter()
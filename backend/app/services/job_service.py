@@ -0,0 +1,210 @@
+"""
+异步任务服务模块
+
+提供与流式接口并存的异步任务模式：提交后立即返回任务ID，
+由有界的工作协程池从本地队列中取出任务执行工作流。
+客户端可轮询任务结果，也可订阅任务的事件流（任务ID即运行ID）。
+
+队列使用进程内 asyncio.Queue，无需外部消息中间件。
+"""
+
+import asyncio
+import contextlib
+import logging
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+
+from app.config import settings
+from app.services.food_service import food_service
+from app.services.run_registry import run_registry, StreamRun
+from app.utils.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+
+class JobQueueFullError(Exception):
+    """任务队列已满"""
+
+
+class JobNotFoundError(Exception):
+    """任务不存在或已过期"""
+
+
+@dataclass
+class Job:
+    """异步分析任务
+
+    Attributes:
+        run: 任务对应的流式运行，任务ID即运行ID
+        params: 工作流参数（file_path/query/meal_time）
+        submitted_at: 提交时间（monotonic）
+        thought: 累积的思考过程
+        message: 累积的结论内容
+        function_calls: 收到的功能调用数据
+    """
+    run: StreamRun
+    params: Dict[str, Any]
+    submitted_at: float = field(default_factory=time.monotonic)
+    thought: str = ""
+    message: str = ""
+    function_calls: List[Any] = field(default_factory=list)
+
+    @property
+    def job_id(self) -> str:
+        """任务ID"""
+        return self.run.run_id
+
+    def to_dict(self) -> Dict[str, Any]:
+        """导出任务状态，结束后附带结果"""
+        data: Dict[str, Any] = {
+            "job_id": self.job_id,
+            "feature": self.run.feature,
+            "status": self.run.status,
+        }
+        if self.run.done:
+            data["result"] = {
+                "thought": self.thought,
+                "message": self.message,
+                "function_calls": self.function_calls,
+            }
+        return data
+
+
+class JobService:
+    """异步任务服务
+
+    维护有界任务队列和固定数量的工作协程，工作协程在首次提交或
+    应用启动时创建。
+    """
+
+    def __init__(self):
+        self._queue: Optional[asyncio.Queue] = None
+        self._workers: List[asyncio.Task] = []
+        self._jobs: Dict[str, Job] = {}
+
+    def start(self) -> None:
+        """创建任务队列并启动工作协程（重复调用无副作用）"""
+        if self._queue is not None:
+            return
+        job_config = settings.job
+        self._queue = asyncio.Queue(maxsize=job_config.job_queue_max_size)
+        self._workers = [
+            asyncio.create_task(self._worker(index))
+            for index in range(job_config.job_workers)
+        ]
+        logger.info(f"[JOB] 已启动 {job_config.job_workers} 个工作协程")
+
+    async def shutdown(self) -> None:
+        """停止工作协程
+
+        先等待执行中的任务在超时时间内完成，再取消剩余工作协程，
+        队列中尚未开始的任务标记为已取消。
+        """
+        if self._queue is None:
+            return
+        running = [job.run for job in self._jobs.values() if job.run.status == "running"]
+        if running:
+            logger.info(f"[JOB] 等待 {len(running)} 个执行中的任务完成")
+            with contextlib.suppress(asyncio.TimeoutError):
+                await asyncio.wait_for(
+                    asyncio.gather(*(run.wait() for run in running)),
+                    timeout=settings.job.job_shutdown_timeout
+                )
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        while not self._queue.empty():
+            self._queue.get_nowait().run.cancel()
+        self._workers = []
+        self._queue = None
+
+    def submit(self, feature: str, **params: Any) -> Job:
+        """提交任务
+
+        Args:
+            feature: 功能名称
+            **params: 工作流参数（file_path/query/meal_time）
+
+        Returns:
+            Job: 已入队的任务
+
+        Raises:
+            JobQueueFullError: 队列已满
+        """
+        self.start()
+        self._evict_expired()
+        job = Job(run=run_registry.create(feature, detached=True), params=params)
+        try:
+            self._queue.put_nowait(job)
+        except asyncio.QueueFull as e:
+            job.run.cancel()
+            metrics.incr("jobs.rejected")
+            raise JobQueueFullError("任务队列已满，请稍后重试") from e
+        self._jobs[job.job_id] = job
+        metrics.incr("jobs.submitted")
+        metrics.observe("jobs.queue_depth", self._queue.qsize())
+        return job
+
+    def get(self, job_id: str) -> Job:
+        """按ID获取任务
+
+        Args:
+            job_id: 任务ID
+
+        Returns:
+            Job: 任务对象
+
+        Raises:
+            JobNotFoundError: 任务不存在或已过期
+        """
+        self._evict_expired()
+        job = self._jobs.get(job_id)
+        if job is None:
+            raise JobNotFoundError(f"任务不存在或已过期: {job_id}")
+        return job
+
+    async def _worker(self, index: int) -> None:
+        """工作协程：循环取出任务并执行"""
+        while True:
+            job = await self._queue.get()
+            try:
+                if job.run.done:
+                    continue
+                metrics.observe("jobs.wait_seconds", time.monotonic() - job.submitted_at)
+                await self._execute(job)
+            except Exception:
+                logger.exception(f"[JOB] 工作协程 {index} 执行任务 {job.job_id} 失败")
+            finally:
+                self._queue.task_done()
+
+    async def _execute(self, job: Job) -> None:
+        """执行单个任务并累积结果"""
+        run = job.run
+        run.start(food_service.open_stream(run.feature, **job.params))
+        async for event in run.subscribe(0):
+            payload = event.payload
+            if "thought" in payload:
+                job.thought += payload["thought"]
+            elif "message" in payload:
+                job.message += payload["message"]
+            elif "function_call" in payload:
+                job.function_calls.append(payload["function_call"])
+        metrics.incr(f"jobs.{run.status}")
+        metrics.observe("jobs.run_seconds", run.finished_at - run.started_at)
+        logger.info(f"[JOB] 任务 {job.job_id} 结束: status={run.status}")
+
+    def _evict_expired(self) -> None:
+        """清理结束时间超过保留期的任务"""
+        ttl = settings.job.job_result_ttl_seconds
+        now = time.monotonic()
+        expired = [
+            job_id for job_id, job in self._jobs.items()
+            if job.run.finished_at is not None and now - job.run.finished_at > ttl
+        ]
+        for job_id in expired:
+            del self._jobs[job_id]
+
+
+# 全局任务服务实例
+job_service = JobService()
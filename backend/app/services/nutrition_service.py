@@ -0,0 +1,282 @@
+"""
+营养数据库服务模块
+
+把食物识别报告中的食物和份量映射到本地营养成分表，直接计算
+每种食物的热量与三大营养素，替代原先单独调用一次视觉模型的热量估算。
+
+匹配顺序：名称/别名精确匹配 -> 包含匹配（取最长的表内名称）
+-> 字符二元组 Dice 相似度模糊匹配。未收录的食物按默认能量密度估算。
+
+营养成分按列存储，整批食物一次性按列计算。
+"""
+
+import re
+from dataclasses import dataclass, asdict
+from typing import Dict, List, Optional, Tuple
+
+from app.constants.nutrition import (
+    NUTRITION_TABLE,
+    UNIT_GRAMS,
+    PIECE_UNITS,
+    PORTION_UNITS,
+    COOKING_FACTORS,
+    DEFAULT_ENERGY_DENSITY
+)
+from app.utils.text_utils import normalize_text, char_ngrams
+
+# 识别报告中的食物行，如 "食物1：米饭 - 约150克 - 蒸"
+_FOOD_LINE = re.compile(r"^\s*[-*]?\s*\**食物\s*\d*\**\s*[：:]\s*(.+)$")
+# 字段分隔符：识别提示词要求使用 " - " 分隔
+_FIELD_SEP = re.compile(r"\s+[-—–|｜]\s+|\s*[|｜]\s*")
+# 克数/毫升数，支持 "150-200克" 这类范围
+_GRAMS = re.compile(r"(\d+(?:\.\d+)?)\s*(?:[-~～到至]\s*(\d+(?:\.\d+)?))?\s*(?:g|克|ml|毫升|mL)", re.IGNORECASE)
+# 数量 + 单位，如 "一碗"、"2个"、"半份"
+_COUNT_UNIT = re.compile(r"(\d+(?:\.\d+)?|[一二两三四五六七八九十半])\s*(" + "|".join(
+    sorted(list(UNIT_GRAMS) + PIECE_UNITS + PORTION_UNITS, key=len, reverse=True)
+) + ")")
+_CHINESE_NUMBERS = {
+    "半": 0.5, "一": 1, "二": 2, "两": 2, "三": 3, "四": 4,
+    "五": 5, "六": 6, "七": 7, "八": 8, "九": 9, "十": 10,
+}
+# 模糊匹配的最低 Dice 相似度
+_MIN_FUZZY_SCORE = 0.5
+
+
+@dataclass
+class FoodPortion:
+    """识别出的一项食物
+
+    Attributes:
+        name: 食物名称
+        portion: 份量描述原文
+        cooking: 烹饪方式
+    """
+    name: str
+    portion: str = ""
+    cooking: str = ""
+
+
+@dataclass
+class CalorieItem:
+    """一项食物的营养计算结果
+
+    Attributes:
+        name: 识别出的食物名称
+        matched: 营养表中匹配到的条目名称，未收录时为 None
+        grams: 折算后的份量（克）
+        calories: 热量（千卡）
+        protein: 蛋白质（克）
+        fat: 脂肪（克）
+        carbs: 碳水化合物（克）
+    """
+    name: str
+    matched: Optional[str]
+    grams: float
+    calories: float
+    protein: float
+    fat: float
+    carbs: float
+
+    def to_dict(self) -> Dict[str, object]:
+        """导出为可 JSON 序列化的字典"""
+        return asdict(self)
+
+
+def parse_food_report(report: str) -> List[FoodPortion]:
+    """解析食物识别报告
+
+    Args:
+        report: 食物识别节点输出的文本
+
+    Returns:
+        List[FoodPortion]: 识别出的食物列表，无法解析时为空
+    """
+    portions = []
+    for line in (report or "").splitlines():
+        match = _FOOD_LINE.match(line)
+        if not match:
+            continue
+        fields = [f.strip(" []【】*") for f in _FIELD_SEP.split(match.group(1).strip())]
+        if not fields or not fields[0]:
+            continue
+        portions.append(FoodPortion(
+            name=fields[0],
+            portion=fields[1] if len(fields) > 1 else "",
+            cooking=fields[2] if len(fields) > 2 else "",
+        ))
+    return portions
+
+
+class NutritionDatabase:
+    """营养成分数据库
+
+    Args:
+        table: 营养成分表，字段顺序见 app.constants.nutrition.NUTRITION_TABLE
+    """
+
+    def __init__(self, table: List[tuple]):
+        self.names: List[str] = []
+        self._kcal: List[float] = []
+        self._protein: List[float] = []
+        self._fat: List[float] = []
+        self._carbs: List[float] = []
+        self._default_grams: List[float] = []
+        self._piece_grams: List[float] = []
+        self._prepared: List[bool] = []
+        self._exact: Dict[str, int] = {}
+        self._aliases: List[Tuple[str, int]] = []
+        self._grams: List[set] = []
+
+        for row in table:
+            name, aliases, kcal, protein, fat, carbs, default_g, piece_g, prepared = row
+            entry_id = len(self.names)
+            self.names.append(name)
+            self._kcal.append(kcal)
+            self._protein.append(protein)
+            self._fat.append(fat)
+            self._carbs.append(carbs)
+            self._default_grams.append(default_g)
+            self._piece_grams.append(piece_g)
+            self._prepared.append(prepared)
+            for alias in [name] + aliases:
+                key = normalize_text(alias)
+                self._exact.setdefault(key, entry_id)
+                self._aliases.append((key, entry_id))
+                self._grams.append(char_ngrams(key))
+        # 包含匹配时优先尝试更长的名称，如 "番茄炒蛋" 先于 "蛋"
+        self._by_length = sorted(range(len(self._aliases)), key=lambda i: -len(self._aliases[i][0]))
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def lookup(self, name: str) -> Optional[int]:
+        """查找食物名称对应的条目
+
+        Args:
+            name: 食物名称
+
+        Returns:
+            Optional[int]: 条目ID，未收录时返回 None
+        """
+        key = normalize_text(name)
+        if not key:
+            return None
+        if key in self._exact:
+            return self._exact[key]
+        for i in self._by_length:
+            alias, entry_id = self._aliases[i]
+            if len(alias) >= 2 and alias in key:
+                return entry_id
+        query_grams = char_ngrams(key)
+        best_score, best_id = 0.0, None
+        for (_, entry_id), grams in zip(self._aliases, self._grams):
+            shared = len(query_grams & grams)
+            if shared:
+                score = 2 * shared / (len(query_grams) + len(grams))
+                if score > best_score:
+                    best_score, best_id = score, entry_id
+        return best_id if best_score >= _MIN_FUZZY_SCORE else None
+
+    def portion_grams(self, entry_id: Optional[int], portion: str) -> float:
+        """把份量描述折算为克数
+
+        优先使用描述中的克数/毫升数；否则按 "数量+单位" 折算；
+        都没有时使用条目默认份量。
+
+        Args:
+            entry_id: 条目ID，未收录时为 None
+            portion: 份量描述，如 "约150克"、"一碗"、"3个"
+
+        Returns:
+            float: 份量（克）
+        """
+        default_grams = self._default_grams[entry_id] if entry_id is not None else 150.0
+        match = _GRAMS.search(portion or "")
+        if match:
+            low = float(match.group(1))
+            high = float(match.group(2)) if match.group(2) else low
+            return (low + high) / 2
+        match = _COUNT_UNIT.search(portion or "")
+        if not match:
+            return default_grams
+        count_text, unit = match.groups()
+        count = _CHINESE_NUMBERS.get(count_text) or float(count_text)
+        if unit in UNIT_GRAMS:
+            return count * UNIT_GRAMS[unit]
+        if unit in PIECE_UNITS and entry_id is not None:
+            return count * self._piece_grams[entry_id]
+        return count * default_grams
+
+    def estimate(self, portions: List[FoodPortion]) -> List[CalorieItem]:
+        """批量计算食物的热量和营养素
+
+        Args:
+            portions: 识别出的食物列表
+
+        Returns:
+            List[CalorieItem]: 与输入一一对应的计算结果
+        """
+        ids = [self.lookup(p.name) for p in portions]
+        grams = [self.portion_grams(i, p.portion) for i, p in zip(ids, portions)]
+        factors = [
+            1.0 if i is None or self._prepared[i] else _cooking_factor(p.cooking)
+            for i, p in zip(ids, portions)
+        ]
+        # 按列计算：份量比例 = 克数 / 100 × 烹饪系数
+        scales = [g / 100 * f for g, f in zip(grams, factors)]
+        kcal = _column(self._kcal, ids, scales, DEFAULT_ENERGY_DENSITY)
+        protein = _column(self._protein, ids, scales, 0.0)
+        fat = _column(self._fat, ids, scales, 0.0)
+        carbs = _column(self._carbs, ids, scales, 0.0)
+        return [
+            CalorieItem(
+                name=p.name,
+                matched=self.names[i] if i is not None else None,
+                grams=round(g),
+                calories=round(k),
+                protein=round(pr, 1),
+                fat=round(fa, 1),
+                carbs=round(ca, 1),
+            )
+            for p, i, g, k, pr, fa, ca in zip(portions, ids, grams, kcal, protein, fat, carbs)
+        ]
+
+
+def _cooking_factor(cooking: str) -> float:
+    """按烹饪方式取热量系数，多个关键字命中时取最大值"""
+    factors = [factor for keyword, factor in COOKING_FACTORS.items() if keyword in (cooking or "")]
+    return max(factors) if factors else 1.0
+
+
+def _column(values: List[float], ids: List[Optional[int]], scales: List[float], default: float) -> List[float]:
+    """取出一列营养数据并乘以份量比例，未收录的条目使用 default"""
+    return [(values[i] if i is not None else default) * s for i, s in zip(ids, scales)]
+
+
+def format_calorie_report(items: List[CalorieItem]) -> str:
+    """生成与热量估算提示词输出格式一致的热量报告
+
+    Args:
+        items: 营养计算结果
+
+    Returns:
+        str: 热量报告文本
+    """
+    if not items:
+        return "未能从食物识别报告中解析出食物，无法计算热量"
+    lines = []
+    for item in items:
+        if item.matched:
+            basis = f"按营养数据库「{item.matched}」约{item.grams:.0f}克计算"
+        else:
+            basis = f"数据库未收录，按约{item.grams:.0f}克、每100克{DEFAULT_ENERGY_DENSITY}千卡估算"
+        lines.append(
+            f"{item.name}：{item.calories:.0f}千卡（估算依据：{basis}；"
+            f"蛋白质{item.protein}克，脂肪{item.fat}克，碳水{item.carbs}克）"
+        )
+    lines.append(f"总热量：{sum(item.calories for item in items):.0f}千卡")
+    return "\n".join(lines)
+
+
+# 全局营养数据库实例
+nutrition_db = NutritionDatabase(NUTRITION_TABLE)
@@ -0,0 +1,333 @@
+"""
+本地 POI 索引模块
+
+加载本地餐厅/POI 数据集，构建两类内存索引：
+- 空间索引：按经纬度划分的固定网格（geohash 式分桶），用于附近检索
+- 名称索引：中文字符二元组（bigram）倒排索引，用于模糊匹配店名
+
+用于把 LLM 推断的店名校准为真实坐标和地址，以及根据用户位置
+预筛选附近的候选店铺写入提示词。
+
+数据文件支持 CSV（表头含 name,address,latitude,longitude）或 JSONL。
+"""
+
+import csv
+import json
+import logging
+import heapq
+import math
+from array import array
+from collections import defaultdict
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from app.config import settings
+from app.utils.text_utils import normalize_text, char_ngrams
+
+logger = logging.getLogger(__name__)
+
+# 地球平均半径（米）
+_EARTH_RADIUS_M = 6371000.0
+# 每度纬度对应的米数
+_METERS_PER_DEGREE = 111320.0
+# 倒排列表超过该长度的高频二元组只给已有候选加分，不用于生成候选
+_COMMON_POSTING_SIZE = 2000
+
+
+@dataclass
+class Poi:
+    """POI 记录
+
+    Attributes:
+        name: 店名
+        address: 地址
+        latitude: 纬度
+        longitude: 经度
+    """
+    name: str
+    address: str
+    latitude: float
+    longitude: float
+
+    def to_dict(self) -> Dict[str, object]:
+        """导出为与 LLM 位置 JSON 一致的字段"""
+        return {
+            "name": self.name,
+            "address": self.address,
+            "latitude": self.latitude,
+            "longitude": self.longitude,
+        }
+
+
+def haversine_m(lat1: float, lng1: float, lat2: float, lng2: float) -> float:
+    """计算两点间球面距离（米）"""
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    d_phi = phi2 - phi1
+    d_lambda = math.radians(lng2 - lng1)
+    a = math.sin(d_phi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(d_lambda / 2) ** 2
+    return 2 * _EARTH_RADIUS_M * math.asin(math.sqrt(a))
+
+
+class PoiIndex:
+    """POI 内存索引
+
+    Args:
+        cell_degrees: 空间网格边长（度），0.01 度约 1.1 公里
+    """
+
+    def __init__(self, cell_degrees: float = 0.01):
+        self._cell = cell_degrees
+        self._names: List[str] = []
+        self._normalized: List[str] = []
+        self._addresses: List[str] = []
+        self._lats = array("d")
+        self._lngs = array("d")
+        self._grid: Dict[Tuple[int, int], List[int]] = defaultdict(list)
+        self._postings: Dict[str, List[int]] = defaultdict(list)
+
+    def __len__(self) -> int:
+        return len(self._names)
+
+    def add(self, poi: Poi) -> None:
+        """添加一个 POI 到索引"""
+        poi_id = len(self._names)
+        self._names.append(poi.name)
+        self._normalized.append(normalize_text(poi.name))
+        self._addresses.append(poi.address)
+        self._lats.append(poi.latitude)
+        self._lngs.append(poi.longitude)
+        self._grid[self._cell_of(poi.latitude, poi.longitude)].append(poi_id)
+        for gram in char_ngrams(poi.name):
+            self._postings[gram].append(poi_id)
+
+    def extend(self, pois: Iterable[Poi]) -> None:
+        """批量添加 POI"""
+        for poi in pois:
+            self.add(poi)
+
+    def get(self, poi_id: int) -> Poi:
+        """按内部ID取出 POI"""
+        return Poi(self._names[poi_id], self._addresses[poi_id], self._lats[poi_id], self._lngs[poi_id])
+
+    def nearby(self, latitude: float, longitude: float, radius_m: float, limit: int = 10) -> List[Tuple[Poi, float]]:
+        """检索半径内最近的 POI
+
+        Args:
+            latitude: 中心纬度
+            longitude: 中心经度
+            radius_m: 检索半径（米）
+            limit: 最多返回数量
+
+        Returns:
+            List[Tuple[Poi, float]]: (POI, 距离米) 列表，按距离升序
+        """
+        # 小范围内用等距矩形投影近似距离做筛选排序，仅对结果计算球面距离
+        lat_scale = _METERS_PER_DEGREE
+        lng_scale = _METERS_PER_DEGREE * math.cos(math.radians(latitude))
+        radius_sq = radius_m * radius_m
+        lats, lngs = self._lats, self._lngs
+        found = []
+        for i in self._ids_within(latitude, longitude, radius_m):
+            dy = (lats[i] - latitude) * lat_scale
+            dx = (lngs[i] - longitude) * lng_scale
+            distance_sq = dx * dx + dy * dy
+            if distance_sq <= radius_sq:
+                found.append((distance_sq, i))
+        return [
+            (self.get(i), haversine_m(latitude, longitude, lats[i], lngs[i]))
+            for _, i in heapq.nsmallest(limit, found)
+        ]
+
+    def match_name(
+        self,
+        name: str,
+        limit: int = 5,
+        near: Optional[Tuple[float, float]] = None,
+        radius_m: Optional[float] = None
+    ) -> List[Tuple[Poi, float]]:
+        """按店名模糊匹配
+
+        以二元组 Dice 系数打分。提供 near 和 radius_m 时先按空间网格取出
+        半径内的 POI 作为候选集，再统计候选名与查询共有的二元组；
+        否则候选集由最罕见的二元组生成，高频二元组（如“火锅”“餐厅”）
+        只给已有候选加分；查询只含高频二元组时返回空列表。
+
+        Args:
+            name: 待匹配的店名
+            limit: 最多返回数量
+            near: 可选的 (纬度, 经度) 约束中心
+            radius_m: near 的约束半径（米）
+
+        Returns:
+            List[Tuple[Poi, float]]: (POI, 相似度 0~1) 列表，按相似度降序
+        """
+        query_grams = char_ngrams(name)
+        if not query_grams:
+            return []
+
+        if near is not None and radius_m is not None:
+            counts = self._count_near(query_grams, set(self._ids_within(near[0], near[1], radius_m)))
+        else:
+            counts = self._count_all(query_grams)
+
+        scored = []
+        for poi_id, shared in counts.items():
+            if near is not None and radius_m is not None and haversine_m(
+                near[0], near[1], self._lats[poi_id], self._lngs[poi_id]
+            ) > radius_m:
+                continue
+            # 候选名的二元组数按长度近似，避免逐个重新切分
+            total = len(query_grams) + max(len(self._normalized[poi_id]) - 1, 1)
+            scored.append((min(2 * shared / total, 1.0), poi_id))
+        scored.sort(reverse=True)
+        return [(self.get(poi_id), score) for score, poi_id in scored[:limit]]
+
+    def _count_near(self, query_grams: set, candidates: set) -> Dict[int, int]:
+        """统计空间候选集中每个 POI 与查询共有的二元组数"""
+        counts: Dict[int, int] = defaultdict(int)
+        for gram in query_grams:
+            posting = self._postings.get(gram)
+            if not posting:
+                continue
+            # 从倒排列表和候选集中较短的一方遍历
+            if len(posting) <= len(candidates):
+                for poi_id in posting:
+                    if poi_id in candidates:
+                        counts[poi_id] += 1
+            else:
+                for poi_id in candidates:
+                    if gram in self._normalized[poi_id]:
+                        counts[poi_id] += 1
+        return counts
+
+    def _count_all(self, query_grams: set) -> Dict[int, int]:
+        """在全部 POI 中统计与查询共有的二元组数，候选集由最罕见的二元组生成
+
+        查询的二元组全部是高频二元组（如"火锅餐厅"）时，任何候选集都要遍历
+        一个很长的倒排列表，且无法区分候选，视为无匹配（有参考坐标时由
+        _count_near 在周边匹配）。
+        """
+        counts: Dict[int, int] = defaultdict(int)
+        for gram in sorted(query_grams, key=lambda g: len(self._postings.get(g, ()))):
+            posting = self._postings.get(gram)
+            if not posting:
+                continue
+            if len(posting) > _COMMON_POSTING_SIZE and not counts:
+                logger.debug(f"[POI] 查询只含高频二元组，跳过全量匹配: {sorted(query_grams)}")
+                break
+            if len(posting) > _COMMON_POSTING_SIZE:
+                for poi_id in counts:
+                    if gram in self._normalized[poi_id]:
+                        counts[poi_id] += 1
+            else:
+                for poi_id in posting:
+                    counts[poi_id] += 1
+        return counts
+
+    def snap(
+        self,
+        name: str,
+        latitude: Optional[float] = None,
+        longitude: Optional[float] = None,
+        min_score: float = 0.5,
+        radius_m: float = 50000.0
+    ) -> Optional[Poi]:
+        """把 LLM 给出的店名校准为索引中的真实 POI
+
+        有参考坐标（LLM 推断坐标或用户位置）时只在其周边匹配，
+        避免同名连锁店被校准到其他城市。
+
+        Args:
+            name: LLM 给出的店名
+            latitude: 参考纬度
+            longitude: 参考经度
+            min_score: 最低相似度
+            radius_m: 参考坐标周边的匹配半径（米）
+
+        Returns:
+            Optional[Poi]: 匹配到的 POI，未达到阈值时返回 None
+        """
+        near = (latitude, longitude) if latitude is not None and longitude is not None else None
+        matches = self.match_name(name, limit=1, near=near, radius_m=radius_m if near else None)
+        if matches and matches[0][1] >= min_score:
+            return matches[0][0]
+        return None
+
+    def _cell_of(self, latitude: float, longitude: float) -> Tuple[int, int]:
+        return int(math.floor(latitude / self._cell)), int(math.floor(longitude / self._cell))
+
+    def _ids_within(self, latitude: float, longitude: float, radius_m: float) -> List[int]:
+        """返回覆盖半径的网格内所有 POI ID（未做精确距离过滤）"""
+        lat_span = radius_m / _METERS_PER_DEGREE
+        lng_span = radius_m / (_METERS_PER_DEGREE * max(math.cos(math.radians(latitude)), 0.01))
+        min_x, min_y = self._cell_of(latitude - lat_span, longitude - lng_span)
+        max_x, max_y = self._cell_of(latitude + lat_span, longitude + lng_span)
+        ids: List[int] = []
+        for x in range(min_x, max_x + 1):
+            for y in range(min_y, max_y + 1):
+                ids.extend(self._grid.get((x, y), ()))
+        return ids
+
+
+def load_pois(path: str) -> Iterable[Poi]:
+    """从 CSV 或 JSONL 文件读取 POI
+
+    Args:
+        path: 数据文件路径，.jsonl 按 JSON 行解析，其他按 CSV 解析
+
+    Yields:
+        Poi: POI 记录，缺少坐标或无法解析的行被跳过
+    """
+    if path.endswith(".jsonl"):
+        # 按字节读取，逐行解码和解析，格式错误或非 UTF-8 的行被跳过
+        with open(path, "rb") as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                try:
+                    poi = _to_poi(json.loads(line))
+                except (AttributeError, KeyError, TypeError, ValueError):
+                    continue
+                yield poi
+        return
+    with open(path, encoding="utf-8", errors="replace", newline="") as f:
+        for row in csv.DictReader(f):
+            try:
+                poi = _to_poi(row)
+            except (AttributeError, KeyError, TypeError, ValueError):
+                continue
+            yield poi
+
+
+def _to_poi(row: Dict[str, object]) -> Poi:
+    """把一行数据转换为 POI，缺少字段或坐标无法解析时抛出异常"""
+    return Poi(
+        name=row["name"],
+        address=row.get("address") or "",
+        latitude=float(row["latitude"]),
+        longitude=float(row["longitude"]),
+    )
+
+
+_index: Optional[PoiIndex] = None
+_load_failed = False
+
+
+def get_poi_index() -> Optional[PoiIndex]:
+    """获取按配置加载的全局 POI 索引
+
+    Returns:
+        Optional[PoiIndex]: 未配置数据文件或加载失败时返回 None
+    """
+    global _index, _load_failed
+    poi_config = settings.poi
+    if _index is None and poi_config.poi_data_path and not _load_failed:
+        try:
+            index = PoiIndex(poi_config.poi_grid_cell_degrees)
+            index.extend(load_pois(poi_config.poi_data_path))
+            _index = index
+            logger.info(f"[POI] 已加载 {len(index)} 个 POI: {poi_config.poi_data_path}")
+        except (OSError, ValueError, csv.Error) as e:
+            logger.error(f"[POI] 加载 POI 数据失败: {e}")
+            _load_failed = True
+    return _index
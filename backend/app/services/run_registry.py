@@ -0,0 +1,565 @@
+"""
+流式运行注册表模块
+
+将分析运行与 HTTP 连接解耦：每次运行在后台任务中执行，产出的事件
+按序号写入有界重放缓冲区。客户端断线后可携带 Last-Event-ID 重新连接，
+从遗漏的事件处继续接收，而无需重新执行工作流。
+
+相同功能、相同图片、相同参数的并发请求会被合并（single-flight）：
+后到的请求订阅已在执行的运行，先收到已产出的事件前缀，再接收实时
+后续事件，N 个相同请求只消耗一次模型调用。已完成运行的事件序列写入
+结果缓存；使用共享缓存后端时，合并和缓存命中在同一主机的所有 worker
+之间生效。
+
+运行在以下情况下被回收：
+- 正常结束后超过 stream_replay_ttl_seconds
+- 最后一个订阅者断开且 stream_resume_grace_seconds 内无人重连（运行被取消）
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import time
+import uuid
+from collections import deque
+from typing import AsyncGenerator, Any, Callable, Deque, Dict, List, Optional, Tuple
+
+from app.config import settings
+from app.utils.metrics import metrics
+from app.utils.shared_cache import CacheBackend, get_cache_backend
+from app.utils.stream_utils import StreamEvent
+
+logger = logging.getLogger(__name__)
+
+
+class RunNotFoundError(Exception):
+    """运行不存在或已过期"""
+
+
+class ReplayWindowExceededError(Exception):
+    """请求的事件已超出重放缓冲区范围"""
+
+
+def parse_last_event_id(value: Optional[str]) -> Optional[Tuple[str, int]]:
+    """解析 Last-Event-ID
+
+    事件ID格式为 ``<run_id>-<seq>``。
+
+    Args:
+        value: 客户端回传的 Last-Event-ID
+
+    Returns:
+        Optional[Tuple[str, int]]: (run_id, seq)，格式不合法时返回 None
+    """
+    if not value:
+        return None
+    run_id, sep, seq = value.strip().rpartition("-")
+    if not sep or not run_id or not seq.isdigit():
+        return None
+    return run_id, int(seq)
+
+
+# 事件日志中标记运行结束的字段
+_END_MARKER = "__end__"
+
+
+def make_coalesce_key(feature: str, file_path: str, **params: Any) -> str:
+    """构建请求合并键
+
+    由功能名、图片标识和其余参数共同决定，参数顺序不影响结果。
+
+    Args:
+        feature: 功能名称
+        file_path: 图片URL或路径
+        **params: 其余影响结果的请求参数
+
+    Returns:
+        str: 合并键
+    """
+    identity = json.dumps(
+        {"feature": feature, "file_path": file_path.strip(), "params": params},
+        ensure_ascii=False,
+        sort_keys=True
+    )
+    return hashlib.sha1(identity.encode("utf-8")).hexdigest()
+
+
+def _payload_size(payload: Dict[str, Any]) -> int:
+    """估算事件携带的 token 数（按文本字符数近似）"""
+    return len(payload.get("thought") or payload.get("message") or "")
+
+
+async def _replay(events: List[Dict[str, Any]]) -> AsyncGenerator[Dict[str, Any], None]:
+    """重放已缓存的运行结果"""
+    for payload in events:
+        yield payload
+
+
+def _is_cacheable(events: List[Dict[str, Any]]) -> bool:
+    """运行中出现过错误事件（或组合分析中有功能失败）时不缓存结果"""
+    for payload in events:
+        if "error" in payload:
+            return False
+        done = payload.get("done")
+        if isinstance(done, dict) and done.get("status") == "failed":
+            return False
+    return True
+
+
+async def _lead(
+    backend: CacheBackend,
+    coalesce_key: str,
+    run_id: str,
+    generator: AsyncGenerator[Dict[str, Any], None]
+) -> AsyncGenerator[Dict[str, Any], None]:
+    """执行工作流并同步写入缓存后端
+
+    共享后端下把事件写入事件日志供其他 worker 跟随，并定期续期租约；
+    运行正常结束且没有错误事件时把完整事件序列写入结果缓存。
+
+    Args:
+        backend: 缓存后端
+        coalesce_key: 请求合并键
+        run_id: 本次运行ID（租约持有者）
+        generator: 业务事件生成器
+    """
+    cache_config = settings.cache
+    events: List[Dict[str, Any]] = []
+    completed = False
+    last_refresh = time.monotonic()
+    try:
+        async for payload in generator:
+            events.append(payload)
+            if backend.shared:
+                await backend.append_event(run_id, len(events), payload)
+                if time.monotonic() - last_refresh > cache_config.cache_lease_ttl_seconds / 3:
+                    last_refresh = time.monotonic()
+                    await backend.refresh_lease(
+                        coalesce_key, run_id, cache_config.cache_lease_ttl_seconds
+                    )
+            yield payload
+        completed = True
+        if cache_config.cache_result_ttl_seconds > 0 and _is_cacheable(events):
+            await backend.set(
+                f"result:{coalesce_key}", events, cache_config.cache_result_ttl_seconds
+            )
+    finally:
+        if backend.shared:
+            await backend.append_event(run_id, len(events) + 1, {_END_MARKER: completed})
+            await backend.release_lease(coalesce_key, run_id)
+
+
+async def _follow(
+    backend: CacheBackend,
+    coalesce_key: str,
+    owner: str
+) -> AsyncGenerator[Dict[str, Any], None]:
+    """跟随其他 worker 中执行的运行
+
+    轮询共享事件日志并逐个产出事件，直到遇到结束标记。
+
+    Args:
+        backend: 共享缓存后端
+        coalesce_key: 请求合并键
+        owner: 执行方的运行ID
+
+    Raises:
+        RuntimeError: 执行方运行失败或租约过期
+    """
+    cache_config = settings.cache
+    after_seq = 0
+    while True:
+        rows = await backend.read_events(owner, after_seq)
+        for seq, payload in rows:
+            if _END_MARKER in payload:
+                if not payload[_END_MARKER]:
+                    raise RuntimeError(f"跟随的运行 {owner} 未正常结束")
+                return
+            after_seq = seq
+            yield payload
+        if not rows and not await backend.lease_alive(coalesce_key, owner):
+            # 租约已释放或过期：再读一次，确认结束标记是否已写入
+            if not await backend.read_events(owner, after_seq):
+                raise RuntimeError(f"跟随的运行 {owner} 已失联")
+            continue
+        await asyncio.sleep(cache_config.cache_journal_poll_interval)
+
+
+class StreamRun:
+    """一次流式分析运行
+
+    在后台任务中消费业务事件生成器，为每个事件分配递增序号并写入
+    有界缓冲区，供任意数量的订阅者重放和实时接收。
+
+    Attributes:
+        run_id: 运行ID
+        feature: 功能名称（where-to-eat/check-premade/calories）
+        status: 运行状态（pending/running/completed/failed/cancelled）
+        detached: 是否与订阅者解耦；为 True 时无订阅者也不会被取消
+    """
+
+    def __init__(self, feature: str, max_events: int, detached: bool = False):
+        self.run_id = uuid.uuid4().hex
+        self.feature = feature
+        self.status = "pending"
+        self.detached = detached
+        self.created_at = time.monotonic()
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self._events: Deque[Dict[str, Any]] = deque(maxlen=max_events)
+        # 缓冲区中第一个事件的序号（序号从 1 开始）
+        self._first_seq = 1
+        self._last_seq = 0
+        self._emitted = 0
+        self._changed = asyncio.Event()
+        self._subscribers = 0
+        self._task: Optional[asyncio.Task] = None
+        self._cancel_handle: Optional[asyncio.TimerHandle] = None
+
+    @property
+    def done(self) -> bool:
+        """运行是否已结束"""
+        return self.status in ("completed", "failed", "cancelled")
+
+    def start(self, generator: AsyncGenerator[Dict[str, Any], None]) -> None:
+        """在后台任务中开始消费事件生成器
+
+        Args:
+            generator: 业务事件异步生成器
+        """
+        self.status = "running"
+        self.started_at = time.monotonic()
+        self._task = asyncio.create_task(self._execute(generator))
+
+    def publish(self, payload: Dict[str, Any]) -> None:
+        """写入一个事件并唤醒所有订阅者
+
+        Args:
+            payload: 业务事件字典
+        """
+        if len(self._events) == self._events.maxlen:
+            self._first_seq += 1
+        self._events.append(payload)
+        self._last_seq += 1
+        self._emitted += _payload_size(payload)
+        self._notify()
+
+    def cancel(self) -> None:
+        """取消运行（连同其中的图运行和模型请求）
+
+        尚未开始的运行直接标记为已取消。
+        """
+        if self._task is not None and not self._task.done():
+            self._task.cancel()
+        elif self.status == "pending":
+            self.status = "cancelled"
+            self.finished_at = time.monotonic()
+            self._notify()
+
+    async def wait(self) -> None:
+        """等待运行结束"""
+        while not self.done:
+            await self._changed.wait()
+
+    def ensure_replayable(self, after_seq: int) -> None:
+        """检查序号 after_seq 之后的事件是否仍在缓冲区内
+
+        Args:
+            after_seq: 客户端已收到的最后一个事件序号
+
+        Raises:
+            ReplayWindowExceededError: 需要的事件已被挤出缓冲区
+        """
+        if after_seq + 1 < self._first_seq:
+            raise ReplayWindowExceededError(
+                f"事件 {after_seq + 1} 已超出重放范围（最早 {self._first_seq}）"
+            )
+
+    def subscribe(self, after_seq: int = 0) -> "_Subscription":
+        """订阅运行事件
+
+        先重放序号大于 after_seq 的已缓冲事件，再实时接收后续事件，
+        直到运行结束。调用时即登记为订阅者（不等到开始迭代），客户端
+        在首帧之前断开时运行同样会在宽限期后被取消。
+
+        Args:
+            after_seq: 客户端已收到的最后一个事件序号，0 表示从头开始
+
+        Returns:
+            _Subscription: 事件异步迭代器，元素为带事件ID的 StreamEvent
+
+        Raises:
+            ReplayWindowExceededError: 需要的事件已被挤出缓冲区
+        """
+        self.ensure_replayable(after_seq)
+        return _Subscription(self, after_seq)
+
+    def _add_subscriber(self) -> None:
+        """登记订阅者，取消待执行的无订阅者取消"""
+        self._subscribers += 1
+        if self._cancel_handle is not None:
+            self._cancel_handle.cancel()
+            self._cancel_handle = None
+
+    def _remove_subscriber(self) -> None:
+        """注销订阅者，最后一个订阅者离开时安排取消"""
+        self._subscribers -= 1
+        if self._subscribers == 0 and not self.done and not self.detached:
+            self._schedule_cancel()
+
+    async def _iter_events(self, after_seq: int) -> AsyncGenerator[StreamEvent, None]:
+        """按序号输出 after_seq 之后的事件，直到运行结束
+
+        订阅者消费过慢、未读事件被挤出缓冲区时，输出一个 error 事件后结束
+        （该事件不带事件ID，客户端可用上一个事件ID续传或重新发起请求）。
+        """
+        next_seq = after_seq + 1
+        while True:
+            changed = self._changed
+            while next_seq <= self._last_seq:
+                if next_seq < self._first_seq:
+                    metrics.incr("sse.subscriber_overruns")
+                    logger.warning(f"[RUN] 运行 {self.run_id} 的订阅者落后过多，事件 {next_seq} 已被挤出缓冲区")
+                    yield StreamEvent(event_id="", payload={"error": "接收过慢，部分事件已丢失，请重新发起请求"})
+                    return
+                payload = self._events[next_seq - self._first_seq]
+                yield StreamEvent(event_id=f"{self.run_id}-{next_seq}", payload=payload)
+                next_seq += 1
+            if self.done:
+                return
+            await changed.wait()
+
+    def _notify(self) -> None:
+        """唤醒等待中的订阅者"""
+        changed, self._changed = self._changed, asyncio.Event()
+        changed.set()
+
+    def _schedule_cancel(self) -> None:
+        """无订阅者时在宽限期后取消运行"""
+        grace = settings.stream.stream_resume_grace_seconds
+        loop = asyncio.get_running_loop()
+        self._cancel_handle = loop.call_later(grace, self._cancel_if_abandoned)
+
+    def _cancel_if_abandoned(self) -> None:
+        """宽限期结束时仍无订阅者则取消运行"""
+        self._cancel_handle = None
+        if self._subscribers == 0 and not self.done:
+            logger.info(f"[RUN] 运行 {self.run_id} 无订阅者，取消执行")
+            self.cancel()
+
+    async def _execute(self, generator: AsyncGenerator[Dict[str, Any], None]) -> None:
+        """后台执行：消费生成器并发布事件"""
+        try:
+            async for payload in generator:
+                self.publish(payload)
+            self.status = "completed"
+        except asyncio.CancelledError:
+            self.status = "cancelled"
+            self._record_cancellation()
+        except Exception:
+            self.status = "failed"
+            logger.exception(f"[RUN] 运行 {self.run_id} 执行失败")
+        finally:
+            self.finished_at = time.monotonic()
+            if self.status == "completed":
+                metrics.observe("sse.run_seconds", self.finished_at - self.started_at)
+                metrics.observe("sse.run_tokens", self._emitted)
+            self._notify()
+
+    def _record_cancellation(self) -> None:
+        """记录取消节省量
+
+        以已完成运行的平均耗时和平均输出量为基准，估算本次取消节省的
+        秒数与 token 数。
+        """
+        elapsed = time.monotonic() - (self.started_at or self.created_at)
+        saved_seconds = max(metrics.mean("sse.run_seconds") - elapsed, 0.0)
+        saved_tokens = max(metrics.mean("sse.run_tokens") - self._emitted, 0.0)
+        metrics.incr("sse.cancelled_runs")
+        metrics.incr("sse.cancel_saved_seconds", saved_seconds)
+        metrics.incr("sse.cancel_saved_tokens", saved_tokens)
+        logger.info(
+            f"[RUN] 运行 {self.run_id} 已取消: elapsed={elapsed:.2f}s, "
+            f"saved≈{saved_seconds:.2f}s/{int(saved_tokens)} tokens"
+        )
+
+
+class _Subscription:
+    """StreamRun 的一个订阅
+
+    创建时登记为订阅者；迭代结束、出错、被取消、aclose，或从未迭代就被
+    回收时注销（只注销一次）。
+    """
+
+    def __init__(self, run: StreamRun, after_seq: int):
+        self._run = run
+        self._events = run._iter_events(after_seq)
+        self._registered = True
+        run._add_subscriber()
+
+    def __aiter__(self) -> "_Subscription":
+        return self
+
+    async def __anext__(self) -> StreamEvent:
+        try:
+            return await self._events.__anext__()
+        except BaseException:
+            self._release()
+            raise
+
+    async def aclose(self) -> None:
+        """停止订阅"""
+        self._release()
+        await self._events.aclose()
+
+    def _release(self) -> None:
+        if self._registered:
+            self._registered = False
+            self._run._remove_subscriber()
+
+    def __del__(self):
+        # 响应在开始迭代前被丢弃（如客户端在首帧前断开）
+        if self._registered:
+            try:
+                self._release()
+            except RuntimeError:
+                # 事件循环已关闭，无需再安排取消
+                pass
+
+
+class RunRegistry:
+    """运行注册表
+
+    按运行ID保存进行中和近期结束的运行，过期运行在访问时惰性清理。
+    """
+
+    def __init__(self):
+        self._runs: Dict[str, StreamRun] = {}
+        # 合并键 -> 执行中的运行
+        self._inflight: Dict[str, StreamRun] = {}
+
+    def create(self, feature: str, detached: bool = False) -> StreamRun:
+        """创建并登记一次尚未开始的运行
+
+        订阅者可以提前订阅，运行开始后即可收到事件。
+
+        Args:
+            feature: 功能名称
+            detached: 是否与订阅者解耦（后台任务使用）
+
+        Returns:
+            StreamRun: 处于 pending 状态的运行
+        """
+        self._evict_expired()
+        run = StreamRun(feature, settings.stream.stream_replay_max_events, detached)
+        self._runs[run.run_id] = run
+        return run
+
+    def start(
+        self,
+        feature: str,
+        generator: AsyncGenerator[Dict[str, Any], None]
+    ) -> StreamRun:
+        """创建并启动一次运行
+
+        Args:
+            feature: 功能名称
+            generator: 业务事件异步生成器
+
+        Returns:
+            StreamRun: 已启动的运行
+        """
+        run = self.create(feature)
+        run.start(generator)
+        return run
+
+    async def join_or_start(
+        self,
+        feature: str,
+        coalesce_key: str,
+        start: Callable[[], AsyncGenerator[Dict[str, Any], None]]
+    ) -> Tuple[StreamRun, bool]:
+        """加入相同请求的执行中运行，不存在时启动新运行
+
+        查找顺序：
+        1. 本进程内执行中的运行（前缀已被挤出重放缓冲区时跳过）
+        2. 缓存后端中已完成运行的结果，命中则直接重放
+        3. 共享后端中其他 worker 持有租约的运行，命中则跟随其事件日志
+        4. 以上均未命中时启动新运行
+
+        Args:
+            feature: 功能名称
+            coalesce_key: 请求合并键，见 make_coalesce_key
+            start: 创建业务事件生成器的工厂函数，仅在需要启动新运行时调用
+
+        Returns:
+            Tuple[StreamRun, bool]: (运行, 是否复用了已有结果或运行)
+        """
+        run = self._inflight.get(coalesce_key)
+        if run is not None and not run.done:
+            try:
+                run.ensure_replayable(0)
+                metrics.incr("coalesce.joined")
+                return run, True
+            except ReplayWindowExceededError:
+                pass
+        
+        backend = get_cache_backend()
+        cached = await backend.get(f"result:{coalesce_key}")
+        if cached is not None:
+            metrics.incr("cache.result_hits")
+            return self.start(feature, _replay(cached)), True
+        metrics.incr("cache.result_misses")
+        
+        run = self.create(feature)
+        if backend.shared:
+            owner = await backend.acquire_lease(
+                coalesce_key, run.run_id, settings.cache.cache_lease_ttl_seconds
+            )
+            if owner != run.run_id:
+                metrics.incr("coalesce.joined_remote")
+                run.start(_follow(backend, coalesce_key, owner))
+                self._inflight[coalesce_key] = run
+                return run, True
+        
+        run.start(_lead(backend, coalesce_key, run.run_id, start()))
+        self._inflight[coalesce_key] = run
+        metrics.incr("coalesce.started")
+        return run, False
+
+    def get(self, run_id: str) -> StreamRun:
+        """按ID获取运行
+
+        Args:
+            run_id: 运行ID
+
+        Returns:
+            StreamRun: 运行对象
+
+        Raises:
+            RunNotFoundError: 运行不存在或已过期
+        """
+        self._evict_expired()
+        run = self._runs.get(run_id)
+        if run is None:
+            raise RunNotFoundError(f"运行不存在或已过期: {run_id}")
+        return run
+
+    def _evict_expired(self) -> None:
+        """清理结束时间超过保留期的运行"""
+        ttl = settings.stream.stream_replay_ttl_seconds
+        now = time.monotonic()
+        expired = [
+            run_id for run_id, run in self._runs.items()
+            if run.finished_at is not None and now - run.finished_at > ttl
+        ]
+        for run_id in expired:
+            del self._runs[run_id]
+        finished = [key for key, run in self._inflight.items() if run.done]
+        for key in finished:
+            del self._inflight[key]
+
+
+# 全局运行注册表实例
+run_registry = RunRegistry()
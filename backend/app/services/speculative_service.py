@@ -0,0 +1,143 @@
+"""
+上传预分析模块
+
+图片上传完成到用户选择功能之间有一段空闲时间。开启预分析后，
+上传接口返回 file_path 的同时在后台启动一次子分析（当前为食物识别），
+结果按 (步骤, file_path) 短期缓存；随后的分析请求直接取用，
+省去这次模型调用的等待。
+
+浪费控制：
+- 同时存在的未使用条目数不超过 speculative_max_pending，超出时不再预分析
+- 条目超过 speculative_ttl_seconds 未被取用即丢弃（执行中的任务会被取消），计为浪费
+
+指标（/api/metrics）：
+- speculative.started / skipped / hits / misses / wasted / failed
+- speculative.saved_seconds: 每次命中节省的等待时间
+"""
+
+import asyncio
+import logging
+import time
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+from app.config import settings
+from app.utils.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class SpeculativeEntry:
+    """一条预分析
+
+    Attributes:
+        task: 执行子分析的后台任务
+        started_at: 开始时间（monotonic）
+        expires_at: 过期时间（monotonic）
+        finished_at: 完成时间（monotonic），未完成时为 None
+    """
+    task: asyncio.Task
+    started_at: float
+    expires_at: float
+    finished_at: Optional[float] = field(default=None)
+
+
+class SpeculativeCache:
+    """预分析结果缓存
+
+    仅在事件循环中使用（上传接口和工作流节点），不需要加锁。
+    """
+
+    def __init__(self):
+        self._entries: Dict[Tuple[str, str], SpeculativeEntry] = {}
+
+    def start(self, step: str, file_path: str, factory: Callable[[], Awaitable[Any]]) -> bool:
+        """在后台启动一次预分析
+
+        Args:
+            step: 子分析名称，如 "food_identification"
+            file_path: 上传返回的图片URL
+            factory: 执行子分析的协程工厂
+
+        Returns:
+            bool: 是否启动（未开启、已存在或超出上限时为 False）
+        """
+        config = settings.speculative
+        if not config.speculative_enabled:
+            return False
+        self._purge()
+        key = (step, file_path.strip())
+        if key in self._entries:
+            return False
+        if len(self._entries) >= config.speculative_max_pending:
+            metrics.incr("speculative.skipped")
+            return False
+
+        now = time.monotonic()
+        entry = SpeculativeEntry(
+            task=asyncio.create_task(factory()),
+            started_at=now,
+            expires_at=now + config.speculative_ttl_seconds
+        )
+        entry.task.add_done_callback(lambda _: setattr(entry, "finished_at", time.monotonic()))
+        self._entries[key] = entry
+        metrics.incr("speculative.started")
+        logger.info(f"[SPECULATIVE] 预分析已启动: {step} {file_path}")
+        return True
+
+    async def take(self, step: str, file_path: str) -> Optional[Any]:
+        """取用预分析结果，每条结果只能取用一次
+
+        结果仍在计算时等待其完成。
+
+        Args:
+            step: 子分析名称
+            file_path: 图片URL
+
+        Returns:
+            Optional[Any]: 子分析结果；未开启、未命中或预分析失败时为 None
+        """
+        if not settings.speculative.speculative_enabled:
+            return None
+        self._purge()
+        entry = self._entries.pop((step, (file_path or "").strip()), None)
+        if entry is None:
+            metrics.incr("speculative.misses")
+            return None
+
+        taken_at = time.monotonic()
+        try:
+            result = await asyncio.shield(entry.task)
+        except Exception as e:
+            metrics.incr("speculative.failed")
+            logger.warning(f"[SPECULATIVE] 预分析失败，改为实时分析: {e}")
+            return None
+
+        # 已完成则节省整个子分析耗时，否则节省取用前已执行的部分
+        finished_at = entry.finished_at if entry.finished_at is not None else time.monotonic()
+        saved = min(finished_at, taken_at) - entry.started_at
+        metrics.incr("speculative.hits")
+        metrics.observe("speculative.saved_seconds", saved)
+        return result
+
+    def _purge(self) -> None:
+        """丢弃过期未取用的条目，执行中的任务会被取消"""
+        now = time.monotonic()
+        expired = [key for key, entry in self._entries.items() if entry.expires_at <= now]
+        for key in expired:
+            entry = self._entries.pop(key)
+            if not entry.task.done():
+                entry.task.cancel()
+            metrics.incr("speculative.wasted")
+
+    def cancel_all(self) -> None:
+        """取消所有执行中的预分析（服务关闭时调用）"""
+        for entry in self._entries.values():
+            if not entry.task.done():
+                entry.task.cancel()
+        self._entries.clear()
+
+
+# 全局预分析缓存实例
+speculative_cache = SpeculativeCache()
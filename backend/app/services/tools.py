@@ -8,13 +8,15 @@ LangChain 工具函数模块
 from langchain_core.tools import tool
 import json
 
+from app.services.poi_index import get_poi_index
+
 
 @tool
 def search_location(query: str):
     """搜索位置并返回坐标和地址信息
     
     基于查询关键词搜索地理位置，返回位置名称、地址和经纬度坐标。
-    当前为Mock实现，实际应用中应调用高德/百度/Google地图API。
+    配置了本地POI数据集时按店名模糊匹配，否则使用Mock数据。
     
     Args:
         query: 位置搜索查询关键词
@@ -24,6 +26,18 @@ def search_location(query: str):
     """
     print(f"正在搜索位置: {query}")
     
+    index = get_poi_index()
+    if index is not None:
+        matches = index.match_name(query, limit=1)
+        if matches:
+            poi = matches[0][0]
+            return json.dumps({
+                "name": poi.name,
+                "address": poi.address,
+                "lat": poi.latitude,
+                "lng": poi.longitude
+            }, ensure_ascii=False)
+    
     # Mock实现：根据关键词返回模拟数据
     # 实际场景中应调用地图API（如高德、百度、Google Maps）
     if "杭州" in query or "Hangzhou" in query:
@@ -0,0 +1,76 @@
+"""
+运行事件通道模块
+
+为每次工作流运行提供一个进程内的事件队列（asyncio.Queue），
+节点通过 emit_event 直接把 thought/message/function_call 写入队列，
+FoodService 只消费这个队列。
+
+与 astream_events 相比，不需要为每个模型 token、每次链/节点的开始
+和结束构建并分发回调事件，流式输出的 CPU 开销只与实际推送的事件数有关。
+
+当前运行的通道保存在 contextvars 中：工作流在设置了通道的上下文中
+启动，节点所在的任务会继承该上下文，无需显式传参。
+"""
+
+import asyncio
+import contextlib
+from contextvars import ContextVar
+from typing import Any, AsyncGenerator, Awaitable, Callable, Optional, Tuple
+
+# 当前运行的事件队列，未在通道中运行时为 None
+_current_queue: ContextVar[Optional[asyncio.Queue]] = ContextVar("event_channel", default=None)
+
+# 队列中标记运行结束的哨兵
+_DONE = object()
+
+
+def emit_event(kind: str, content: Any) -> None:
+    """向当前运行的事件通道写入一个事件
+
+    不在通道中运行时（如直接调用工作流）静默丢弃。
+
+    Args:
+        kind: 事件类型（thought/message/function_call）
+        content: 事件内容，文本或可 JSON 序列化的字典
+    """
+    queue = _current_queue.get()
+    if queue is not None:
+        queue.put_nowait((kind, content))
+
+
+async def run_with_events(
+    runner: Callable[[], Awaitable[Any]]
+) -> AsyncGenerator[Tuple[str, Any], None]:
+    """在新的事件通道中执行工作流，并逐个产出节点写入的事件
+
+    工作流在后台任务中执行；消费方提前关闭生成器时任务会被取消。
+
+    Args:
+        runner: 启动工作流的协程工厂，如 lambda: graph.ainvoke(inputs)
+
+    Yields:
+        Tuple[str, Any]: (事件类型, 事件内容)
+
+    Raises:
+        Exception: 工作流执行中抛出的异常在事件消费完后重新抛出
+    """
+    queue: asyncio.Queue = asyncio.Queue()
+    token = _current_queue.set(queue)
+    try:
+        task = asyncio.create_task(runner())
+    finally:
+        _current_queue.reset(token)
+    task.add_done_callback(lambda _: queue.put_nowait(_DONE))
+
+    try:
+        while True:
+            item = await queue.get()
+            if item is _DONE:
+                break
+            yield item
+        await task
+    finally:
+        if not task.done():
+            task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await task
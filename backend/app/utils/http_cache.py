@@ -0,0 +1,152 @@
+"""
+HTTP 读缓存工具模块
+
+为读多写少的 JSON 接口（历史记录）提供：
+- ReadCache: 进程内 LRU 读缓存，写入时整体失效，另有 TTL 兜底
+  （其他 worker 的写入不会通知本进程）
+- ETag / If-None-Match: 内容未变时返回 304，不再传输响应体
+- gzip / brotli 压缩：按 Accept-Encoding 协商，压缩结果随缓存条目复用；
+  未安装 brotli 包时只使用 gzip
+
+ETag 由响应内容的哈希生成，不同 worker 对相同内容给出相同的 ETag。
+"""
+
+import gzip
+import hashlib
+import json
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, Tuple
+
+from fastapi import Request
+from fastapi.responses import Response
+
+from app.utils.metrics import metrics
+
+try:
+    import brotli
+except ImportError:  # brotli 为可选依赖
+    brotli = None
+
+
+@dataclass
+class CachedBody:
+    """一个已序列化的 JSON 响应体
+
+    Attributes:
+        body: UTF-8 编码的 JSON
+        etag: 弱 ETag，如 W/"<sha1>"
+        encoded: 已压缩的响应体，按编码名缓存
+    """
+    body: bytes
+    etag: str
+    encoded: Dict[str, bytes] = field(default_factory=dict)
+
+    @classmethod
+    def from_payload(cls, payload: Any) -> "CachedBody":
+        """序列化响应数据并计算 ETag"""
+        body = json.dumps(payload, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+        # 同一内容有不同的压缩编码，使用弱 ETag
+        return cls(body=body, etag=f'W/"{hashlib.sha1(body).hexdigest()}"')
+
+    def encode(self, encoding: str) -> bytes:
+        """按编码压缩响应体（结果缓存）"""
+        if encoding not in self.encoded:
+            if encoding == "br":
+                self.encoded[encoding] = brotli.compress(self.body)
+            else:
+                self.encoded[encoding] = gzip.compress(self.body, compresslevel=6)
+        return self.encoded[encoding]
+
+
+class ReadCache:
+    """进程内读缓存
+
+    Args:
+        name: 缓存名称，用于指标
+        ttl_seconds: 条目最长保留时间
+        max_entries: 最多保留的条目数（超出时淘汰最久未使用的）
+    """
+
+    def __init__(self, name: str, ttl_seconds: float, max_entries: int):
+        self.name = name
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Hashable, Tuple[float, CachedBody]]" = OrderedDict()
+        # 每次失效加一，加载期间发生过写入的结果不写回缓存
+        self._generation = 0
+
+    async def get_or_load(self, key: Hashable, loader: Callable[[], Awaitable[Any]]) -> Optional[CachedBody]:
+        """读取缓存，未命中时调用 loader 加载并缓存
+
+        Args:
+            key: 缓存键（包含影响结果的全部查询参数）
+            loader: 加载响应数据的协程工厂，异常直接抛出且不缓存
+
+        Returns:
+            Optional[CachedBody]: 序列化后的响应体；loader 返回 None（如记录不存在）时为 None，且不缓存
+        """
+        entry = self._entries.get(key)
+        if entry is not None and entry[0] > time.monotonic():
+            self._entries.move_to_end(key)
+            metrics.incr(f"cache.{self.name}.hits")
+            return entry[1]
+
+        metrics.incr(f"cache.{self.name}.misses")
+        generation = self._generation
+        payload = await loader()
+        if payload is None:
+            return None
+        cached = CachedBody.from_payload(payload)
+        if generation != self._generation:
+            return cached
+        self._entries[key] = (time.monotonic() + self.ttl_seconds, cached)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+        return cached
+
+    def invalidate(self) -> None:
+        """写入后清空缓存"""
+        self._generation += 1
+        self._entries.clear()
+
+
+def _choose_encoding(accept_encoding: str) -> Optional[str]:
+    """按 Accept-Encoding 选择压缩编码，优先 brotli"""
+    offered = {
+        part.split(";")[0].strip().lower()
+        for part in accept_encoding.split(",")
+        if not part.strip().endswith(";q=0")
+    }
+    if brotli is not None and "br" in offered:
+        return "br"
+    if "gzip" in offered:
+        return "gzip"
+    return None
+
+
+def cached_json_response(request: Request, cached: CachedBody, min_compress_bytes: int) -> Response:
+    """生成支持条件请求和压缩的 JSON 响应
+
+    Args:
+        request: 当前 HTTP 请求
+        cached: 序列化后的响应体
+        min_compress_bytes: 响应体小于该值时不压缩
+
+    Returns:
+        Response: 304（If-None-Match 命中）或 200 JSON 响应
+    """
+    headers = {"ETag": cached.etag, "Cache-Control": "no-cache", "Vary": "Accept-Encoding"}
+    if_none_match = request.headers.get("if-none-match", "")
+    if cached.etag in (tag.strip() for tag in if_none_match.split(",")) or if_none_match.strip() == "*":
+        metrics.incr("http.not_modified")
+        return Response(status_code=304, headers=headers)
+
+    body = cached.body
+    encoding = _choose_encoding(request.headers.get("accept-encoding", ""))
+    if encoding and len(body) >= min_compress_bytes:
+        body = cached.encode(encoding)
+        headers["Content-Encoding"] = encoding
+    return Response(content=body, media_type="application/json", headers=headers)
@@ -11,6 +11,8 @@ from typing import Tuple
 
 import httpx
 
+from app.utils.shared_results import shared_call
+
 
 def encode_image(image_path: str) -> str:
     """将本地图片文件编码为Base64字符串
@@ -38,6 +40,8 @@ async def prepare_image_url(image_path: str) -> Tuple[str, str | None]:
     - 远程URL: 直接返回原始URL，无需转换
     - 本地路径: 读取文件并编码为Base64数据URL
     
+    在 shared_results() 作用域内，同一图片只准备一次。
+    
     Args:
         image_path: 图片的远程URL或本地文件路径
         
@@ -50,6 +54,12 @@ async def prepare_image_url(image_path: str) -> Tuple[str, str | None]:
         >>> url, error = await prepare_image_url("https://example.com/image.jpg")
         >>> url, error = await prepare_image_url("/path/to/local/image.jpg")
     """
+    # 组合分析中多个工作流并发准备同一张图片时只处理一次
+    return await shared_call(("image", image_path), lambda: _prepare_image_url(image_path))
+
+
+async def _prepare_image_url(image_path: str) -> Tuple[str, str | None]:
+    """prepare_image_url 的实际实现，不经过共享结果"""
     if image_path.startswith("http"):
         # ===== 处理远程URL：直接返回，无需下载转换 =====
         return image_path, None
@@ -5,16 +5,39 @@ LLM调用工具模块
 封装与LangChain/OpenAI交互的通用逻辑，供各Agent节点复用。
 """
 
+import hashlib
+import json
 import re
 from typing import List, Dict, Any, AsyncGenerator
 
 from langchain_core.messages import SystemMessage, HumanMessage, AIMessage
 from langchain_core.runnables import RunnableConfig
-from langchain_core.callbacks.manager import adispatch_custom_event
 from langchain_openai import ChatOpenAI
 
 from app.config import settings
 from app.utils.stream_utils import ContentSplitter
+from app.utils.event_channel import emit_event
+from app.utils.shared_results import shared_call
+
+
+def configure_llm_cache() -> None:
+    """按配置启用 LangChain 全局 LLM 缓存
+    
+    非流式调用（如各分析分支的 ainvoke）会命中缓存。
+    sqlite 后端下缓存文件由同一主机的所有 worker 共享。
+    """
+    cache_config = settings.cache
+    if not cache_config.llm_cache_enabled:
+        return
+    
+    from langchain_core.globals import set_llm_cache
+    
+    if cache_config.cache_backend == "sqlite":
+        from langchain_community.cache import SQLiteCache
+        set_llm_cache(SQLiteCache(database_path=cache_config.llm_cache_sqlite_path))
+    else:
+        from langchain_core.caches import InMemoryCache
+        set_llm_cache(InMemoryCache())
 
 
 def create_chat_model(
@@ -44,8 +67,43 @@ def create_chat_model(
         base_url=llm_config.openai_api_base,
         api_key=llm_config.openai_api_key,
         timeout=timeout or llm_config.request_timeout,
-        max_retries=max_retries or llm_config.max_retries
+        max_retries=max_retries or llm_config.max_retries,
+        # 流式调用时在最后一个分片中返回 token 用量
+        stream_usage=True
+    )
+
+
+def usage_tokens(message: Any) -> int:
+    """读取模型响应（或流式分片）中的 token 总用量
+    
+    Args:
+        message: AIMessage 或 AIMessageChunk
+        
+    Returns:
+        int: token 总数，响应中没有用量信息时为 0
+    """
+    usage = getattr(message, "usage_metadata", None)
+    return usage.get("total_tokens", 0) if usage else 0
+
+
+async def ainvoke_shared(model: ChatOpenAI, messages: List) -> AIMessage:
+    """非流式调用模型，组合分析中相同模型和提示词的调用只执行一次
+    
+    在 shared_results() 作用域外等同于 model.ainvoke(messages)。
+    
+    Args:
+        model: ChatOpenAI模型实例
+        messages: 消息列表
+        
+    Returns:
+        AIMessage: 模型响应
+    """
+    identity = json.dumps(
+        [model.model_name, [(m.type, m.content) for m in messages]],
+        ensure_ascii=False
     )
+    key = ("llm", hashlib.sha1(identity.encode("utf-8")).hexdigest())
+    return await shared_call(key, lambda: model.ainvoke(messages))
 
 
 def build_vision_messages(
@@ -110,7 +168,7 @@ async def stream_llm_with_events(
         if hasattr(chunk, "additional_kwargs") and chunk.additional_kwargs:
             reasoning = chunk.additional_kwargs.get("reasoning_content", "")
             if reasoning:
-                await adispatch_custom_event("thought", {"content": reasoning}, config=config)
+                emit_event("thought", reasoning)
                 thought_content += reasoning
                 continue
         
@@ -124,7 +182,7 @@ async def stream_llm_with_events(
                 if block_type == "reasoning":
                     reasoning_text = block.get("reasoning", "")
                     if reasoning_text:
-                        await adispatch_custom_event("thought", {"content": reasoning_text}, config=config)
+                        emit_event("thought", reasoning_text)
                         thought_content += reasoning_text
                 
                 elif block_type == "text":
@@ -147,14 +205,14 @@ async def stream_llm_with_events(
                     event_content = event["content"]
                     
                     if event_type == "thought":
-                        await adispatch_custom_event("thought", {"content": event_content}, config=config)
+                        emit_event("thought", event_content)
                     elif event_type == "message":
                         clean_content = _clean_json_markers(event_content)
                         if clean_content.strip():
-                            await adispatch_custom_event("message", {"content": clean_content}, config=config)
+                            emit_event("message", clean_content)
             else:
                 # 不使用splitter，直接作为message发送
-                await adispatch_custom_event("message", {"content": chunk_content}, config=config)
+                emit_event("message", chunk_content)
     
     # ===== 刷新缓冲区 =====
     if splitter:
@@ -164,11 +222,11 @@ async def stream_llm_with_events(
             event_content = event["content"]
             
             if event_type == "thought":
-                await adispatch_custom_event("thought", {"content": event_content}, config=config)
+                emit_event("thought", event_content)
             elif event_type == "message":
                 clean_content = _clean_json_markers(event_content)
                 if clean_content.strip():
-                    await adispatch_custom_event("message", {"content": clean_content}, config=config)
+                    emit_event("message", clean_content)
     
     # 返回完整响应和思考内容供后续处理
     yield {"response_content": response_content, "thought_content": thought_content}
@@ -0,0 +1,131 @@
+"""
+运行指标工具模块
+
+提供进程内的轻量级指标收集能力（计数器 + 分布统计），
+用于观测流式分析的耗时、取消节省量等运行数据。
+"""
+
+import threading
+from collections import defaultdict, deque
+from dataclasses import dataclass, field
+from typing import Deque, Dict, Any
+
+
+# 每个分布指标保留的最近样本数，用于计算分位数
+_RESERVOIR_SIZE = 1024
+
+
+@dataclass
+class Summary:
+    """分布统计
+
+    记录样本数、总和、最值，并保留最近若干样本用于估算分位数。
+
+    Attributes:
+        count: 样本数
+        total: 样本总和
+        min_value: 最小值
+        max_value: 最大值
+        samples: 最近样本窗口
+    """
+    count: int = 0
+    total: float = 0.0
+    min_value: float = float("inf")
+    max_value: float = float("-inf")
+    samples: Deque[float] = field(default_factory=lambda: deque(maxlen=_RESERVOIR_SIZE))
+
+    def observe(self, value: float) -> None:
+        """记录一个样本"""
+        self.count += 1
+        self.total += value
+        self.min_value = min(self.min_value, value)
+        self.max_value = max(self.max_value, value)
+        self.samples.append(value)
+
+    @property
+    def mean(self) -> float:
+        """样本均值，无样本时为 0"""
+        return self.total / self.count if self.count else 0.0
+
+    def percentile(self, q: float) -> float:
+        """基于最近样本窗口估算分位数
+
+        Args:
+            q: 分位点，取值 0~1
+
+        Returns:
+            float: 分位数估计值，无样本时为 0
+        """
+        if not self.samples:
+            return 0.0
+        ordered = sorted(self.samples)
+        index = min(int(q * len(ordered)), len(ordered) - 1)
+        return ordered[index]
+
+    def to_dict(self) -> Dict[str, float]:
+        """导出为可序列化的字典"""
+        if not self.count:
+            return {"count": 0}
+        return {
+            "count": self.count,
+            "sum": round(self.total, 6),
+            "mean": round(self.mean, 6),
+            "min": round(self.min_value, 6),
+            "max": round(self.max_value, 6),
+            "p50": round(self.percentile(0.5), 6),
+            "p95": round(self.percentile(0.95), 6),
+        }
+
+
+class MetricsRegistry:
+    """进程内指标注册表
+
+    以指标名区分计数器和分布统计，所有操作线程安全。
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters: Dict[str, float] = defaultdict(float)
+        self._summaries: Dict[str, Summary] = defaultdict(Summary)
+
+    def incr(self, name: str, value: float = 1.0) -> None:
+        """累加计数器
+
+        Args:
+            name: 指标名
+            value: 增量，默认为 1
+        """
+        with self._lock:
+            self._counters[name] += value
+
+    def observe(self, name: str, value: float) -> None:
+        """向分布统计中记录一个样本
+
+        Args:
+            name: 指标名
+            value: 样本值
+        """
+        with self._lock:
+            self._summaries[name].observe(value)
+
+    def mean(self, name: str) -> float:
+        """获取分布统计的均值，不存在时为 0"""
+        with self._lock:
+            summary = self._summaries.get(name)
+            return summary.mean if summary else 0.0
+
+    def snapshot(self) -> Dict[str, Any]:
+        """导出当前所有指标
+
+        Returns:
+            Dict[str, Any]: {"counters": {...}, "summaries": {...}}
+        """
+        with self._lock:
+            return {
+                "counters": {k: round(v, 6) for k, v in self._counters.items()},
+                "summaries": {k: s.to_dict() for k, s in self._summaries.items()},
+            }
+
+
+# 全局指标实例
+metrics = MetricsRegistry()
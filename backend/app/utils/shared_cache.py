@@ -0,0 +1,244 @@
+"""
+共享缓存后端模块
+
+为结果缓存和跨进程请求合并提供统一的存储后端：
+- memory: 进程内字典，仅对当前 worker 生效（默认）
+- sqlite: 位于共享内存文件系统（/dev/shm）的 SQLite 数据库，
+  同一主机上的所有 uvicorn worker 共享缓存命中和执行中的运行
+
+sqlite 后端额外提供租约（lease）和事件日志（journal）：
+持有租约的 worker 执行工作流并把事件写入日志，其他 worker 轮询日志
+转发给各自的客户端，实现跨进程的 single-flight。
+"""
+
+import asyncio
+import json
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.config import settings
+
+
+class CacheBackend(ABC):
+    """缓存后端基类
+
+    Attributes:
+        shared: 是否在多个进程间共享（支持租约与事件日志）
+    """
+
+    shared = False
+
+    @abstractmethod
+    async def get(self, key: str) -> Optional[Any]:
+        """读取缓存值，不存在或已过期时返回 None"""
+
+    @abstractmethod
+    async def set(self, key: str, value: Any, ttl: float) -> None:
+        """写入缓存值
+
+        Args:
+            key: 缓存键
+            value: 可 JSON 序列化的值
+            ttl: 有效期（秒）
+        """
+
+
+class MemoryCacheBackend(CacheBackend):
+    """进程内缓存后端"""
+
+    def __init__(self):
+        self._items: Dict[str, Tuple[Any, float]] = {}
+
+    async def get(self, key: str) -> Optional[Any]:
+        item = self._items.get(key)
+        if item is None:
+            return None
+        value, expires_at = item
+        if expires_at < time.time():
+            del self._items[key]
+            return None
+        return value
+
+    async def set(self, key: str, value: Any, ttl: float) -> None:
+        self._items[key] = (value, time.time() + ttl)
+
+
+class SqliteCacheBackend(CacheBackend):
+    """基于 SQLite 文件的跨进程缓存后端
+
+    数据库文件建议放在 /dev/shm 等内存文件系统中。所有数据库操作在
+    线程池中执行，避免阻塞事件循环。
+
+    Args:
+        path: 数据库文件路径
+    """
+
+    shared = True
+
+    # 每执行多少次写操作清理一次过期数据
+    _PURGE_EVERY = 200
+
+    def __init__(self, path: str):
+        self._path = path
+        self._lock = threading.Lock()
+        self._writes = 0
+        self._conn = sqlite3.connect(path, timeout=5.0, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=OFF")
+        self._conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS kv (
+                key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS leases (
+                key TEXT PRIMARY KEY, owner TEXT NOT NULL, expires_at REAL NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS journal (
+                run_id TEXT NOT NULL, seq INTEGER NOT NULL, payload TEXT NOT NULL,
+                created_at REAL NOT NULL, PRIMARY KEY (run_id, seq)
+            );
+            """
+        )
+
+    async def get(self, key: str) -> Optional[Any]:
+        return await asyncio.to_thread(self.get_sync, key)
+
+    async def set(self, key: str, value: Any, ttl: float) -> None:
+        await asyncio.to_thread(self.set_sync, key, value, ttl)
+
+    async def acquire_lease(self, key: str, candidate: str, ttl: float) -> str:
+        """尝试获取租约
+
+        租约不存在或已过期时由 candidate 获得，否则保持原持有者。
+
+        Args:
+            key: 租约键（请求合并键）
+            candidate: 申请者ID（运行ID）
+            ttl: 租约有效期（秒）
+
+        Returns:
+            str: 当前租约持有者ID
+        """
+        return await asyncio.to_thread(self.acquire_lease_sync, key, candidate, ttl)
+
+    async def refresh_lease(self, key: str, owner: str, ttl: float) -> None:
+        """延长自己持有的租约"""
+        await asyncio.to_thread(
+            self._execute,
+            "UPDATE leases SET expires_at = ? WHERE key = ? AND owner = ?",
+            (time.time() + ttl, key, owner)
+        )
+
+    async def release_lease(self, key: str, owner: str) -> None:
+        """释放自己持有的租约"""
+        await asyncio.to_thread(
+            self._execute, "DELETE FROM leases WHERE key = ? AND owner = ?", (key, owner)
+        )
+
+    async def lease_alive(self, key: str, owner: str) -> bool:
+        """判断租约是否仍由 owner 持有且未过期"""
+        return await asyncio.to_thread(self._lease_alive_sync, key, owner)
+
+    async def append_event(self, run_id: str, seq: int, payload: Dict[str, Any]) -> None:
+        """向运行的事件日志追加一个事件"""
+        await asyncio.to_thread(
+            self._execute,
+            "INSERT OR REPLACE INTO journal (run_id, seq, payload, created_at) VALUES (?, ?, ?, ?)",
+            (run_id, seq, json.dumps(payload, ensure_ascii=False), time.time())
+        )
+
+    async def read_events(self, run_id: str, after_seq: int) -> List[Tuple[int, Dict[str, Any]]]:
+        """读取运行中序号大于 after_seq 的事件"""
+        return await asyncio.to_thread(self._read_events_sync, run_id, after_seq)
+
+    def get_sync(self, key: str) -> Optional[Any]:
+        """同步读取缓存值"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value FROM kv WHERE key = ? AND expires_at > ?", (key, time.time())
+            ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def set_sync(self, key: str, value: Any, ttl: float) -> None:
+        """同步写入缓存值"""
+        self._execute(
+            "INSERT OR REPLACE INTO kv (key, value, expires_at) VALUES (?, ?, ?)",
+            (key, json.dumps(value, ensure_ascii=False), time.time() + ttl)
+        )
+
+    def acquire_lease_sync(self, key: str, candidate: str, ttl: float) -> str:
+        """同步获取租约（在 IMMEDIATE 事务中保证原子性）"""
+        now = time.time()
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = self._conn.execute(
+                    "SELECT owner FROM leases WHERE key = ? AND expires_at > ?", (key, now)
+                ).fetchone()
+                if row is not None:
+                    owner = row[0]
+                else:
+                    owner = candidate
+                    self._conn.execute(
+                        "INSERT OR REPLACE INTO leases (key, owner, expires_at) VALUES (?, ?, ?)",
+                        (key, candidate, now + ttl)
+                    )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        return owner
+
+    def _lease_alive_sync(self, key: str, owner: str) -> bool:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT 1 FROM leases WHERE key = ? AND owner = ? AND expires_at > ?",
+                (key, owner, time.time())
+            ).fetchone()
+        return row is not None
+
+    def _read_events_sync(self, run_id: str, after_seq: int) -> List[Tuple[int, Dict[str, Any]]]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT seq, payload FROM journal WHERE run_id = ? AND seq > ? ORDER BY seq",
+                (run_id, after_seq)
+            ).fetchall()
+        return [(seq, json.loads(payload)) for seq, payload in rows]
+
+    def _execute(self, sql: str, params: tuple) -> None:
+        """执行写操作，并周期性清理过期数据"""
+        with self._lock:
+            self._conn.execute(sql, params)
+            self._writes += 1
+            if self._writes % self._PURGE_EVERY == 0:
+                self._purge()
+
+    def _purge(self) -> None:
+        """清理过期缓存、租约和超出保留期的事件日志（调用方持有锁）"""
+        now = time.time()
+        retention = settings.cache.cache_journal_retention_seconds
+        self._conn.execute("DELETE FROM kv WHERE expires_at <= ?", (now,))
+        self._conn.execute("DELETE FROM leases WHERE expires_at <= ?", (now,))
+        self._conn.execute("DELETE FROM journal WHERE created_at <= ?", (now - retention,))
+
+
+_backend: Optional[CacheBackend] = None
+
+
+def get_cache_backend() -> CacheBackend:
+    """获取按配置创建的全局缓存后端
+
+    Returns:
+        CacheBackend: 缓存后端实例
+    """
+    global _backend
+    if _backend is None:
+        cache_config = settings.cache
+        if cache_config.cache_backend == "sqlite":
+            _backend = SqliteCacheBackend(cache_config.cache_sqlite_path)
+        else:
+            _backend = MemoryCacheBackend()
+    return _backend
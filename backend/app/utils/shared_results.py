@@ -0,0 +1,62 @@
+"""
+运行内共享结果模块
+
+同一次组合分析会并发执行多个工作流，它们使用同一张图片，
+部分子步骤（图片准备、提示词相同的视觉调用）的结果完全相同。
+在 shared_results() 作用域内，按键对这些子步骤做单飞（single-flight）：
+第一个调用方执行，其余并发或后续调用方等待同一个结果。
+
+作用域保存在 contextvars 中，作用域内创建的任务（各工作流的事件通道）
+会继承同一个结果表；作用域外调用 shared_call 直接执行，不做缓存。
+"""
+
+import asyncio
+import contextlib
+from contextvars import ContextVar
+from typing import Any, Awaitable, Callable, Dict, Hashable, Iterator, Optional, Tuple
+
+from app.utils.metrics import metrics
+
+# 当前作用域的结果表，不在作用域内时为 None
+_current_results: ContextVar[Optional[Dict[Hashable, asyncio.Task]]] = ContextVar(
+    "shared_results", default=None
+)
+
+
+@contextlib.contextmanager
+def shared_results() -> Iterator[Dict[Hashable, asyncio.Task]]:
+    """开启一个共享结果作用域
+
+    Yields:
+        Dict[Hashable, asyncio.Task]: 本作用域的结果表
+    """
+    results: Dict[Hashable, asyncio.Task] = {}
+    token = _current_results.set(results)
+    try:
+        yield results
+    finally:
+        _current_results.reset(token)
+
+
+async def shared_call(key: Tuple[Hashable, ...], factory: Callable[[], Awaitable[Any]]) -> Any:
+    """在当前作用域内按键共享一次调用的结果
+
+    Args:
+        key: 结果键，首元素为子步骤类型，如 ("image", image_path)
+        factory: 执行调用的协程工厂
+
+    Returns:
+        Any: 调用结果；调用抛出的异常会传给所有等待方
+    """
+    results = _current_results.get()
+    if results is None:
+        return await factory()
+
+    task = results.get(key)
+    if task is None:
+        task = asyncio.ensure_future(factory())
+        results[key] = task
+    else:
+        metrics.incr(f"shared.{key[0]}.hits")
+    # 某个等待方被取消时不影响其他工作流继续使用该结果
+    return await asyncio.shield(task)
@@ -6,10 +6,19 @@
 
 import json
 import asyncio
+import contextlib
+import logging
 import re
-from typing import AsyncGenerator, Any, Tuple, Optional
+import time
+from typing import AsyncGenerator, Any, Callable, Tuple, Optional
 from dataclasses import dataclass
 
+from starlette.requests import Request
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
 
 # ========== 内容解析相关数据结构 ==========
 
@@ -233,11 +242,72 @@ def format_sse_data(content: str) -> str:
     return '\n'.join(formatted_lines) + '\n'
 
 
-async def stream_generator(generator: AsyncGenerator[Any, None]) -> AsyncGenerator[str, None]:
+@dataclass
+class StreamEvent:
+    """带序号的流式事件
+    
+    Attributes:
+        event_id: SSE 事件ID（客户端通过 Last-Event-ID 回传）
+        payload: 业务事件字典（thought/message/function_call）
+    """
+    event_id: str
+    payload: dict
+
+
+def format_sse_event(chunk: Any, event_id: Optional[str] = None) -> str:
+    """将业务事件转换为一帧 SSE 文本
+    
+    Args:
+        chunk: 业务事件字典（thought/message/function_call/error/history/done，可带 feature 标签）或普通字符串
+        event_id: 可选的 SSE 事件ID，用于断线续传
+        
+    Returns:
+        str: SSE 格式的事件文本，无法识别的事件返回空字符串
+    """
+    id_line = f"id: {event_id}\n" if event_id else ""
+    if isinstance(chunk, dict):
+        # 组合分析的事件带 feature 标签，事件名为 "<feature>.<type>"
+        prefix = f"{chunk['feature']}." if chunk.get("feature") else ""
+        if "thought" in chunk:
+            # Format thought content with proper SSE data lines
+            data_lines = format_sse_data(chunk['thought'])
+            return f"{id_line}event: {prefix}thought\n{data_lines}\n"
+        elif "message" in chunk:
+            # Format message content with proper SSE data lines
+            data_lines = format_sse_data(chunk['message'])
+            return f"{id_line}event: {prefix}message\n{data_lines}\n"
+        elif "function_call" in chunk:
+            # JSON is typically single-line, but handle it safely
+            json_str = json.dumps(chunk['function_call'], ensure_ascii=False)
+            return f"{id_line}event: {prefix}function_call\ndata: {json_str}\n\n"
+        elif "error" in chunk:
+            # 节点内捕获的失败说明
+            data_lines = format_sse_data(chunk['error'])
+            return f"{id_line}event: {prefix}error\n{data_lines}\n"
+        elif "history" in chunk:
+            # 自动保存的历史记录ID
+            json_str = json.dumps(chunk['history'], ensure_ascii=False)
+            return f"{id_line}event: {prefix}history\ndata: {json_str}\n\n"
+        elif "done" in chunk:
+            # 组合分析中单个功能结束
+            json_str = json.dumps(chunk['done'], ensure_ascii=False)
+            return f"{id_line}event: {prefix}done\ndata: {json_str}\n\n"
+        return ""
+    # Default to message if it's just a string
+    data_lines = format_sse_data(str(chunk))
+    return f"{id_line}event: message\n{data_lines}\n"
+
+
+async def stream_generator(
+    generator: AsyncGenerator[Any, None],
+    request: Optional[Request] = None,
+    on_first_frame: Optional[Callable[[], None]] = None
+) -> AsyncGenerator[str, None]:
     """
     Converts a LangGraph/LangChain stream into a custom SSE-like format for WeChat Mini Program.
     
     Format (SSE specification compliant):
+    id: <run_id>-<seq>
     event: thought
     data: <content line 1>
     data: <content line 2>
@@ -249,26 +319,62 @@ async def stream_generator(generator: AsyncGenerator[Any, None]) -> AsyncGenerat
     data: <json_content>
     
     Note: Multi-line data is handled by prefixing each line with 'data:'
+    
+    在等待下一个事件期间会定期检测客户端是否已断开，断开后立即关闭上游
+    生成器；长时间无事件时发送 SSE 注释帧作为心跳，防止代理断开空闲连接。
+    
+    Args:
+        generator: 业务事件异步生成器，元素为 StreamEvent 时输出 id 字段
+        request: 当前 HTTP 请求，用于检测客户端断开；为 None 时不检测
+        on_first_frame: 第一个事件帧（不含心跳）即将发出时的回调，用于统计首字节耗时
     """
-    async for chunk in generator:
-        # Handle different chunk types from LangGraph
-        if isinstance(chunk, dict):
-            if "thought" in chunk:
-                # Format thought content with proper SSE data lines
-                data_lines = format_sse_data(chunk['thought'])
-                yield f"event: thought\n{data_lines}\n"
-            elif "message" in chunk:
-                # Format message content with proper SSE data lines
-                data_lines = format_sse_data(chunk['message'])
-                yield f"event: message\n{data_lines}\n"
-            elif "function_call" in chunk:
-                # JSON is typically single-line, but handle it safely
-                json_str = json.dumps(chunk['function_call'], ensure_ascii=False)
-                yield f"event: function_call\ndata: {json_str}\n\n"
-        else:
-            # Default to message if it's just a string
-            data_lines = format_sse_data(str(chunk))
-            yield f"event: message\n{data_lines}\n"
+    stream_config = settings.stream
+    iterator = generator.__aiter__()
+    next_task: Optional[asyncio.Task] = None
+    last_sent = time.monotonic()
+    
+    try:
+        while True:
+            if next_task is None:
+                next_task = asyncio.ensure_future(iterator.__anext__())
+            
+            done, _ = await asyncio.wait(
+                {next_task}, timeout=stream_config.sse_disconnect_poll_interval
+            )
+            if not done:
+                # 等待期间检测断开并按需发送心跳
+                if request is not None and await request.is_disconnected():
+                    logger.info("[STREAM] 客户端已断开，停止推送")
+                    break
+                if time.monotonic() - last_sent >= stream_config.sse_heartbeat_interval:
+                    last_sent = time.monotonic()
+                    yield ": keep-alive\n\n"
+                continue
+            
+            try:
+                chunk = next_task.result()
+            except StopAsyncIteration:
+                break
+            finally:
+                next_task = None
+            
+            if isinstance(chunk, StreamEvent):
+                frame = format_sse_event(chunk.payload, chunk.event_id)
+            else:
+                frame = format_sse_event(chunk)
+            if frame:
+                last_sent = time.monotonic()
+                if on_first_frame is not None:
+                    on_first_frame()
+                    on_first_frame = None
+                yield frame
+    finally:
+        if next_task is not None and not next_task.done():
+            next_task.cancel()
+            with contextlib.suppress(asyncio.CancelledError, StopAsyncIteration, Exception):
+                await next_task
+        with contextlib.suppress(Exception):
+            await generator.aclose()
 
 async def mock_stream_generator():
     """Mock generator for testing"""
@@ -0,0 +1,42 @@
+"""
+文本处理工具模块
+
+提供中文名称的归一化与字符 n-gram 切分，供店名、菜名等
+短文本的模糊匹配和倒排索引复用。
+"""
+
+import re
+from typing import Set
+
+# 归一化时移除的字符：空白和常见中英文标点
+_TEXT_NOISE = re.compile(r"[\s\-_·•,，.。!！?？'\"“”()（）\[\]【】]+")
+
+
+def normalize_text(text: str) -> str:
+    """归一化短文本：小写并移除空白和标点
+
+    Args:
+        text: 原始文本
+
+    Returns:
+        str: 归一化后的文本
+    """
+    return _TEXT_NOISE.sub("", text or "").lower()
+
+
+def char_ngrams(text: str, n: int = 2) -> Set[str]:
+    """提取归一化文本的字符 n-gram 集合
+
+    文本长度不足 n 时返回整个文本（非空时）。
+
+    Args:
+        text: 原始文本
+        n: gram 长度，默认二元组
+
+    Returns:
+        Set[str]: n-gram 集合
+    """
+    normalized = normalize_text(text)
+    if len(normalized) < n:
+        return {normalized} if normalized else set()
+    return {normalized[i:i + n] for i in range(len(normalized) - n + 1)}
@@ -4,6 +4,8 @@ FoodieParadise Backend 主应用
 FastAPI应用的入口文件，负责应用初始化、中间件配置和路由注册。
 """
 
+import asyncio
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from dotenv import load_dotenv
@@ -13,13 +15,25 @@ import uvicorn
 load_dotenv()
 
 from app.controllers.food_controller import router as food_router
-from app.config.database import engine, Base
+from app.controllers.metrics_controller import router as metrics_router
+from app.controllers.job_controller import router as job_router
+from app.controllers.stats_controller import router as stats_router
+from app.config.database import engine, async_engine, Base
 from app.config import settings
+from app.services.job_service import job_service
+from app.services.history_writer import history_writer
+from app.services.history_search import history_search_index
+from app.services.speculative_service import speculative_cache
+from app.utils.llm_utils import configure_llm_cache
+from app.services.poi_index import get_poi_index
 
 # ========== 数据库初始化 ==========
 # 根据ORM模型自动创建数据库表
 Base.metadata.create_all(bind=engine)
 
+# ========== LLM缓存初始化 ==========
+configure_llm_cache()
+
 # ========== 创建FastAPI应用 ==========
 app = FastAPI(title=settings.app.app_title)
 
@@ -36,6 +50,61 @@ app.add_middleware(
 # ========== 路由注册 ==========
 # 注册食物相关的API路由
 app.include_router(food_router)
+# 注册运行指标路由
+app.include_router(metrics_router)
+# 注册异步任务路由
+app.include_router(job_router)
+# 注册统计路由
+app.include_router(stats_router)
+
+
+# ========== 生命周期事件 ==========
+@app.on_event("startup")
+async def start_job_workers():
+    """应用启动时创建异步任务工作池"""
+    job_service.start()
+
+
+@app.on_event("startup")
+async def load_poi_index():
+    """应用启动时预加载本地POI索引（未配置数据文件时跳过）"""
+    get_poi_index()
+
+
+@app.on_event("shutdown")
+async def stop_job_workers():
+    """应用关闭时等待执行中的任务完成并停止工作池"""
+    await job_service.shutdown()
+
+
+@app.on_event("shutdown")
+async def cancel_speculative_tasks():
+    """应用关闭时取消执行中的上传预分析"""
+    speculative_cache.cancel_all()
+
+
+@app.on_event("startup")
+async def start_history_writer():
+    """应用启动时创建历史记录批量写入协程"""
+    history_writer.start()
+
+
+@app.on_event("startup")
+async def build_history_search_index():
+    """应用启动时在后台加载历史记录搜索索引，不阻塞启动"""
+    app.state.search_index_task = asyncio.create_task(history_search_index.build())
+
+
+@app.on_event("shutdown")
+async def flush_history_writer():
+    """应用关闭时写完队列中的历史记录"""
+    await history_writer.shutdown()
+
+
+@app.on_event("shutdown")
+async def dispose_database_engine():
+    """应用关闭时释放异步数据库连接池"""
+    await async_engine.dispose()
 
 
 @app.get("/")
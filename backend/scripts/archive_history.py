@@ -0,0 +1,71 @@
+"""
+历史记录归档脚本
+
+按 HISTORY_RETENTION_DAYS / HISTORY_RETENTION_MAX_ROWS 把旧的历史记录
+分批迁移到 history_archive 表或 jsonl.gz 文件，并报告 history 表回收的空间。
+建议由 cron 在低峰期定时运行，例如每天凌晨：
+
+    0 4 * * * cd /path/to/backend && python scripts/archive_history.py --optimize
+
+Usage:
+    python scripts/archive_history.py --dry-run
+    python scripts/archive_history.py --days 180 --target file --optimize
+"""
+
+import argparse
+import logging
+import os
+import sys
+
+# 添加项目根目录到Python路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+from app.config.database import Base, engine
+from app.services.history_retention import RetentionPolicy, archive_history
+
+
+def _mb(size: int) -> str:
+    return f"{size / 1024 / 1024:.1f}MB"
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="历史记录归档")
+    parser.add_argument("--days", type=int, default=None, help="覆盖 HISTORY_RETENTION_DAYS")
+    parser.add_argument("--max-rows", type=int, default=None, help="覆盖 HISTORY_RETENTION_MAX_ROWS")
+    parser.add_argument("--target", choices=["table", "file"], default=None, help="覆盖 HISTORY_ARCHIVE_TARGET")
+    parser.add_argument("--dry-run", action="store_true", help="只统计需要归档的记录数")
+    parser.add_argument("--optimize", action="store_true", help="归档后执行 OPTIMIZE TABLE 回收空间")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(message)s")
+    policy = RetentionPolicy.from_settings()
+    if args.days is not None:
+        policy.max_age_days = args.days
+    if args.max_rows is not None:
+        policy.max_rows = args.max_rows
+    if not policy.enabled:
+        print("未配置保留策略（HISTORY_RETENTION_DAYS / HISTORY_RETENTION_MAX_ROWS），不做归档")
+        return
+
+    Base.metadata.create_all(bind=engine)
+    report = archive_history(policy, target=args.target, dry_run=args.dry_run, optimize=args.optimize)
+
+    print(f"待归档 {report.candidates} 条，已归档 {report.archived} 条（{report.batches} 批，{report.seconds:.1f}s）")
+    if report.archived:
+        ratio = report.compressed_bytes / report.raw_bytes if report.raw_bytes else 0
+        print(f"details {_mb(report.raw_bytes)} -> 归档 {_mb(report.compressed_bytes)}（{ratio:.0%}）")
+        for path in report.archive_files:
+            print(f"归档文件: {path}")
+    if report.before and report.after:
+        print(f"{'':<8} {'rows':>10} {'data':>10} {'index':>10} {'free':>10}")
+        for name, size in (("before", report.before), ("after", report.after)):
+            print(f"{name:<8} {size.rows:>10} {_mb(size.data_bytes):>10} {_mb(size.index_bytes):>10} {_mb(size.free_bytes):>10}")
+        print(f"history 表回收 {_mb(report.reclaimed_bytes)}" + ("" if args.optimize else "（未执行 OPTIMIZE，空间计入 free）"))
+
+
+if __name__ == "__main__":
+    main()
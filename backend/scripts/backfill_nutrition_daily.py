@@ -0,0 +1,64 @@
+"""
+每日热量汇总回填脚本
+
+汇总表只在新的"吃多少"记录写入时增量维护。启用前已有的历史记录
+需要运行本脚本一次：按 created_at 日期和餐次重新汇总所有 calories
+记录，并覆盖 nutrition_daily 中的数据。
+
+Usage:
+    python scripts/backfill_nutrition_daily.py
+"""
+
+import os
+import sys
+from collections import defaultdict
+
+# 添加项目根目录到Python路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+from sqlalchemy import delete, insert, select
+
+from app.config.database import Base, engine
+from app.models.history import HistoryModel
+from app.models.nutrition import NutritionDailyModel
+from app.services.history_service import extract_calorie_totals
+
+
+def main() -> None:
+    Base.metadata.create_all(bind=engine)
+    totals = defaultdict(lambda: [0.0, 0, 0])
+    scanned = 0
+
+    with engine.connect() as conn:
+        # 服务端游标逐批读取，不一次性加载全部记录
+        rows = conn.execution_options(stream_results=True, yield_per=1000).execute(
+            select(HistoryModel.created_at, HistoryModel.details).where(HistoryModel.type == "calories")
+        )
+        for created_at, details in rows:
+            scanned += 1
+            extracted = extract_calorie_totals(details)
+            if extracted is None or created_at is None:
+                continue
+            meal_time, kcal, item_count = extracted
+            total = totals[(created_at.date(), meal_time)]
+            total[0] += kcal
+            total[1] += item_count
+            total[2] += 1
+
+    with engine.begin() as conn:
+        conn.execute(delete(NutritionDailyModel))
+        if totals:
+            conn.execute(insert(NutritionDailyModel), [
+                {"day": day, "meal_time": meal_time, "total_kcal": kcal,
+                 "item_count": item_count, "record_count": record_count}
+                for (day, meal_time), (kcal, item_count, record_count) in totals.items()
+            ])
+    print(f"扫描 {scanned} 条 calories 记录，写入 {len(totals)} 行汇总")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+"""
+流式事件通道基准测试
+
+对比两种把节点事件传给 FoodService 的方式的 CPU 开销：
+- events: 节点调用 adispatch_custom_event，消费 astream_events(version="v2")（旧实现）
+- channel: 节点调用 emit_event，消费 run_with_events（当前实现）
+
+工作流只有一个节点，用假模型流式输出固定数量的 token，每个 token
+作为一个 message 事件推送，因此测得的 CPU 时间全部是框架与事件分发开销。
+
+"每核最大流数" 按模型输出速度（--tokens-per-second）折算：
+单核每秒可处理的 token 数 / 每条流每秒产生的 token 数。
+
+Usage:
+    python scripts/bench_event_stream.py --streams 50 --tokens 400
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+from typing import TypedDict
+
+# 添加项目根目录到Python路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from langchain_core.callbacks.manager import adispatch_custom_event
+from langchain_core.language_models.fake_chat_models import GenericFakeChatModel
+from langchain_core.messages import AIMessage
+from langchain_core.runnables import RunnableConfig
+from langgraph.graph import StateGraph, END
+
+from app.utils.event_channel import emit_event, run_with_events
+
+
+class BenchState(TypedDict):
+    text: str
+
+
+def _build_graph(use_channel: bool):
+    """构建单节点工作流，节点把假模型的每个 token 作为事件推送"""
+
+    async def node(state: BenchState, config: RunnableConfig):
+        model = GenericFakeChatModel(messages=iter([AIMessage(content=state["text"])]))
+        async for chunk in model.astream("go", config=config):
+            if use_channel:
+                emit_event("message", chunk.content)
+            else:
+                await adispatch_custom_event("message", {"content": chunk.content}, config=config)
+        return {}
+
+    workflow = StateGraph(BenchState)
+    workflow.add_node("agent", node)
+    workflow.set_entry_point("agent")
+    workflow.add_edge("agent", END)
+    return workflow.compile()
+
+
+async def _consume(mode: str, graph, text: str) -> int:
+    """消费一条流，返回收到的 message 事件数"""
+    received = 0
+    if mode == "channel":
+        async for kind, _ in run_with_events(lambda: graph.ainvoke({"text": text})):
+            received += kind == "message"
+    else:
+        async for event in graph.astream_events({"text": text}, version="v2"):
+            if event["event"] == "on_custom_event" and event["name"] == "message":
+                received += 1
+    return received
+
+
+async def run_mode(mode: str, streams: int, tokens: int) -> dict:
+    """并发运行 streams 条流，统计 CPU 时间"""
+    graph = _build_graph(mode == "channel")
+    # GenericFakeChatModel 按空白切分 token
+    text = " ".join(["词"] * tokens)
+    await _consume(mode, graph, text)  # 预热
+
+    cpu_started = time.process_time()
+    wall_started = time.perf_counter()
+    counts = await asyncio.gather(*(_consume(mode, graph, text) for _ in range(streams)))
+    cpu = time.process_time() - cpu_started
+    wall = time.perf_counter() - wall_started
+    total = sum(counts)
+    return {"mode": mode, "events": total, "cpu": cpu, "wall": wall, "cpu_per_token_us": cpu / total * 1e6}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="流式事件通道基准测试")
+    parser.add_argument("--streams", type=int, default=50)
+    parser.add_argument("--tokens", type=int, default=400)
+    parser.add_argument("--tokens-per-second", type=float, default=50.0, help="模型单条流的输出速度")
+    args = parser.parse_args()
+
+    print(f"{'mode':<8} {'events':>8} {'cpu':>8} {'wall':>8} {'cpu/token':>11} {'streams/core':>13}")
+    for mode in ("events", "channel"):
+        r = asyncio.run(run_mode(mode, args.streams, args.tokens))
+        streams_per_core = 1e6 / r["cpu_per_token_us"] / args.tokens_per_second
+        print(
+            f"{r['mode']:<8} {r['events']:>8} {r['cpu']:>7.2f}s {r['wall']:>7.2f}s "
+            f"{r['cpu_per_token_us']:>9.1f}us {streams_per_core:>13.0f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
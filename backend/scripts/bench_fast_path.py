@@ -0,0 +1,82 @@
+"""
+线性执行器基准测试
+
+对比同一工作流在 LangGraph 图和 LinearWorkflow 线性执行器下的
+单次请求框架开销。节点不调用模型，只推送少量事件并返回状态更新，
+因此测得的耗时全部来自调度、状态合并和事件通道。
+
+分别测试单节点（去哪吃的结构）和四节点链（吃多少的结构）。
+
+Usage:
+    python scripts/bench_fast_path.py --requests 2000
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+# 添加项目根目录到Python路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from langchain_core.messages import AIMessage, HumanMessage
+from langchain_core.runnables import RunnableConfig
+from langgraph.graph import StateGraph, END
+
+from app.models.state import AgentState
+from app.services.agents.base import LinearWorkflow
+from app.utils.event_channel import emit_event, run_with_events
+
+
+async def _node(state: AgentState, config: RunnableConfig):
+    """模拟节点：推送三个事件并追加一条消息"""
+    emit_event("thought", "分析中...")
+    emit_event("message", "结论")
+    emit_event("message", "。")
+    return {"messages": [AIMessage(content="done")]}
+
+
+def _build(node_count: int):
+    """构建 node_count 个节点串联的 LangGraph 图和线性执行器"""
+    names = [f"node_{i}" for i in range(node_count)]
+    workflow = StateGraph(AgentState)
+    for name in names:
+        workflow.add_node(name, _node)
+    workflow.set_entry_point(names[0])
+    for current, following in zip(names, names[1:]):
+        workflow.add_edge(current, following)
+    workflow.add_edge(names[-1], END)
+    return workflow.compile(), LinearWorkflow([_node] * node_count)
+
+
+async def _measure(workflow, requests: int) -> float:
+    """顺序执行 requests 次，返回单次请求平均耗时（微秒）"""
+    inputs = {"messages": [HumanMessage(content="bench")], "image_path": ""}
+
+    async def once():
+        async for _ in run_with_events(lambda: workflow.ainvoke(inputs)):
+            pass
+
+    await once()  # 预热
+    started = time.perf_counter()
+    for _ in range(requests):
+        await once()
+    return (time.perf_counter() - started) / requests * 1e6
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="线性执行器基准测试")
+    parser.add_argument("--requests", type=int, default=2000)
+    args = parser.parse_args()
+
+    print(f"{'nodes':>5} {'langgraph':>12} {'linear':>12} {'saved':>12}")
+    for node_count in (1, 4):
+        graph, linear = _build(node_count)
+        graph_us = asyncio.run(_measure(graph, args.requests))
+        linear_us = asyncio.run(_measure(linear, args.requests))
+        print(f"{node_count:>5} {graph_us:>10.1f}us {linear_us:>10.1f}us {graph_us - linear_us:>10.1f}us")
+
+
+if __name__ == "__main__":
+    main()
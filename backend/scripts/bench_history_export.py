@@ -0,0 +1,95 @@
+"""
+历史记录导出基准测试
+
+对比两种导出方式的耗时和 Python 堆内存峰值：
+- all: 一次查询 .all() 读出全部记录后序列化
+- stream: 服务端游标分批读取并序列化（stream_history_export）
+
+同时在导出期间每 10 毫秒调度一次心跳协程，记录其最大延迟，
+用来观察导出是否阻塞事件循环。需要 .env 中配置可用的 MySQL，
+测试数据可先用 scripts/bench_history_pagination.py 生成。
+
+Usage:
+    python scripts/bench_history_export.py --format ndjson
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+import tracemalloc
+
+# 添加项目根目录到Python路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+from sqlalchemy import select
+
+from app.config.database import AsyncSessionLocal, async_engine
+from app.models.history import HistoryModel
+from app.services.history_export import stream_history_export, _csv_chunk, _ndjson_chunk
+
+
+async def export_all(export_format: str) -> int:
+    """一次性读出全部记录再序列化，返回输出字节数"""
+    async with AsyncSessionLocal() as db:
+        records = (await db.execute(select(HistoryModel))).scalars().all()
+        rows = [
+            {"id": r.id, "type": r.type, "image_path": r.image_path, "summary": r.summary,
+             "created_at": r.created_at.isoformat() if r.created_at else None, "details": r.details}
+            for r in records
+        ]
+    serialize = _ndjson_chunk if export_format == "ndjson" else _csv_chunk
+    return len(serialize(rows))
+
+
+async def export_stream(export_format: str) -> int:
+    """服务端游标流式导出，返回输出字节数"""
+    size = 0
+    async for chunk in stream_history_export(export_format):
+        size += len(chunk)
+    return size
+
+
+async def run_mode(mode: str, export_format: str) -> tuple:
+    """返回 (耗时秒, 输出 MB, 内存峰值 MB, 心跳最大延迟毫秒)"""
+    stop = asyncio.Event()
+    worst_lag = 0.0
+
+    async def heartbeat():
+        nonlocal worst_lag
+        while not stop.is_set():
+            started = time.perf_counter()
+            await asyncio.sleep(0.01)
+            worst_lag = max(worst_lag, (time.perf_counter() - started - 0.01) * 1000)
+
+    beat = asyncio.create_task(heartbeat())
+    tracemalloc.start()
+    started = time.perf_counter()
+    size = await (export_all if mode == "all" else export_stream)(export_format)
+    elapsed = time.perf_counter() - started
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    stop.set()
+    await beat
+    await async_engine.dispose()
+    return elapsed, size / 1024 / 1024, peak / 1024 / 1024, worst_lag
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="历史记录导出基准测试")
+    parser.add_argument("--format", choices=["ndjson", "csv"], default="ndjson")
+    args = parser.parse_args()
+
+    print(f"{'mode':<8} {'seconds':>8} {'output MB':>10} {'peak MB':>8} {'max lag ms':>11}")
+    for mode in ("all", "stream"):
+        elapsed, size, peak, lag = asyncio.run(run_mode(mode, args.format))
+        print(f"{mode:<8} {elapsed:>8.2f} {size:>10.1f} {peak:>8.1f} {lag:>11.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,146 @@
+"""
+历史记录并发负载测试
+
+在同一个事件循环中模拟正在推送的 SSE 流（每条流每隔 --frame-interval
+秒发送一帧），同时让若干客户端不停地读写历史记录，统计帧的延迟
+（实际发送时间与计划时间之差）：
+
+- idle: 没有历史记录请求（基线）
+- sync: 在事件循环中直接调用同步会话（旧实现）
+- async: 调用 history_repo 的异步实现（当前实现）
+
+需要 .env 中配置可用的 MySQL；--seed 会先写入指定数量的测试记录。
+
+Usage:
+    python scripts/bench_history_load.py --streams 50 --clients 20 --duration 10 --seed 2000
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+
+# 添加项目根目录到Python路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+from app.config.database import Base, SessionLocal, async_engine, engine
+from app.models.history import HistoryModel
+from app.repositories.history_repo import get_user_history
+from app.services.history_service import save_history
+
+BENCH_TYPE = "bench"
+
+
+def _seed(rows: int) -> None:
+    """写入测试记录"""
+    db = SessionLocal()
+    try:
+        db.bulk_save_objects([
+            HistoryModel(type=BENCH_TYPE, image_path=f"https://example.com/{i}.jpg",
+                         summary="基准测试记录", details={"index": i})
+            for i in range(rows)
+        ])
+        db.commit()
+    finally:
+        db.close()
+
+
+def _cleanup() -> None:
+    """删除测试记录"""
+    db = SessionLocal()
+    try:
+        db.query(HistoryModel).filter(HistoryModel.type == BENCH_TYPE).delete()
+        db.commit()
+    finally:
+        db.close()
+
+
+def _sync_history_request(write: bool) -> None:
+    """旧实现：同步会话读或写一次"""
+    db = SessionLocal()
+    try:
+        if write:
+            db.add(HistoryModel(type=BENCH_TYPE, image_path="https://example.com/w.jpg",
+                                summary="基准测试记录", details={}))
+            db.commit()
+        else:
+            db.query(HistoryModel).order_by(HistoryModel.created_at.desc()).all()
+    finally:
+        db.close()
+
+
+async def _stream(frame_interval: float, deadline: float, lateness: list) -> None:
+    """模拟一条 SSE 流，记录每帧的延迟（毫秒）"""
+    scheduled = time.perf_counter()
+    while scheduled < deadline:
+        scheduled += frame_interval
+        await asyncio.sleep(max(0.0, scheduled - time.perf_counter()))
+        lateness.append((time.perf_counter() - scheduled) * 1000)
+
+
+async def _client(mode: str, deadline: float, counter: list) -> None:
+    """不停地发起历史记录请求，每 10 次中 1 次写入"""
+    i = 0
+    while time.perf_counter() < deadline:
+        write = i % 10 == 9
+        if mode == "sync":
+            _sync_history_request(write)
+            await asyncio.sleep(0)
+        elif write:
+            await save_history({"type": BENCH_TYPE, "image_path": "https://example.com/w.jpg",
+                                "summary": "基准测试记录", "details": {}})
+        else:
+            await get_user_history()
+        counter[0] += 1
+        i += 1
+
+
+async def run_mode(mode: str, streams: int, clients: int, duration: float, frame_interval: float) -> dict:
+    """运行一种模式，返回帧延迟分位数和历史请求数"""
+    deadline = time.perf_counter() + duration
+    lateness: list = []
+    counter = [0]
+    tasks = [_stream(frame_interval, deadline, lateness) for _ in range(streams)]
+    if mode != "idle":
+        tasks += [_client(mode, deadline, counter) for _ in range(clients)]
+    await asyncio.gather(*tasks)
+    await async_engine.dispose()
+    lateness.sort()
+    return {
+        "mode": mode,
+        "requests": counter[0],
+        "p50": statistics.median(lateness),
+        "p99": lateness[int(len(lateness) * 0.99) - 1],
+        "max": lateness[-1],
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="历史记录并发负载测试")
+    parser.add_argument("--streams", type=int, default=50)
+    parser.add_argument("--clients", type=int, default=20)
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--frame-interval", type=float, default=0.05)
+    parser.add_argument("--seed", type=int, default=0, help="预先写入的测试记录数")
+    args = parser.parse_args()
+
+    Base.metadata.create_all(bind=engine)
+    if args.seed:
+        _seed(args.seed)
+    try:
+        print(f"{'mode':<6} {'history req':>12} {'frame p50':>10} {'frame p99':>10} {'frame max':>10}")
+        for mode in ("idle", "sync", "async"):
+            r = asyncio.run(run_mode(mode, args.streams, args.clients, args.duration, args.frame_interval))
+            print(f"{r['mode']:<6} {r['requests']:>12} {r['p50']:>8.1f}ms {r['p99']:>8.1f}ms {r['max']:>8.1f}ms")
+    finally:
+        _cleanup()
+
+
+if __name__ == "__main__":
+    main()
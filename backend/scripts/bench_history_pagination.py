@@ -0,0 +1,149 @@
+"""
+历史记录分页基准测试
+
+向 history 表写入 --rows 条测试记录（默认一百万，三种类型均匀分布），
+比较不同翻页深度下：
+- keyset: 当前的 (created_at, id) 游标分页（history_repo.get_user_history）
+- offset: 同样排序下的 LIMIT/OFFSET 分页
+- type:   按类型筛选的游标分页
+
+每个深度重复 --repeat 次取中位数。测试记录的 image_path 以
+bench:// 开头，结束后删除（--keep 保留，便于多次运行）。
+
+需要 .env 中配置可用的 MySQL，并已创建 ix_history_created_at_id、
+ix_history_type_created_at 索引。
+
+Usage:
+    python scripts/bench_history_pagination.py --rows 1000000
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+from datetime import datetime, timedelta
+
+# 添加项目根目录到Python路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+from sqlalchemy import insert, select, delete, func
+
+from app.config.database import Base, SessionLocal, AsyncSessionLocal, async_engine, engine
+from app.models.history import HistoryModel
+from app.repositories.history_repo import get_user_history, encode_cursor
+
+TYPES = ("where-to-eat", "check-premade", "calories")
+BENCH_PREFIX = "bench://"
+PAGE_SIZE = 20
+
+
+def _seed(rows: int, batch: int = 10000) -> None:
+    """按批写入测试记录，创建时间逐条递增一秒"""
+    started = datetime(2020, 1, 1)
+    with engine.begin() as conn:
+        for offset in range(0, rows, batch):
+            conn.execute(insert(HistoryModel), [
+                {
+                    "type": TYPES[i % len(TYPES)],
+                    "image_path": f"{BENCH_PREFIX}{i}.jpg",
+                    "summary": "基准测试记录",
+                    "details": {"index": i},
+                    "created_at": started + timedelta(seconds=i),
+                }
+                for i in range(offset, min(offset + batch, rows))
+            ])
+            print(f"\r已写入 {min(offset + batch, rows)}/{rows}", end="", flush=True)
+    print()
+
+
+def _cleanup() -> None:
+    """删除测试记录"""
+    db = SessionLocal()
+    try:
+        db.execute(delete(HistoryModel).where(HistoryModel.image_path.like(f"{BENCH_PREFIX}%")))
+        db.commit()
+    finally:
+        db.close()
+
+
+async def _cursor_at(depth: int, record_type: str = None) -> str:
+    """定位到第 depth 页的游标（只取 created_at/id，不计入耗时）"""
+    if depth == 0:
+        return None
+    stmt = select(HistoryModel.created_at, HistoryModel.id)
+    if record_type:
+        stmt = stmt.where(HistoryModel.type == record_type)
+    stmt = stmt.order_by(HistoryModel.created_at.desc(), HistoryModel.id.desc())
+    stmt = stmt.offset(depth * PAGE_SIZE - 1).limit(1)
+    async with AsyncSessionLocal() as db:
+        created_at, record_id = (await db.execute(stmt)).one()
+    return encode_cursor(created_at, record_id)
+
+
+async def _offset_page(depth: int) -> None:
+    """OFFSET 分页读取第 depth 页"""
+    stmt = (
+        select(HistoryModel)
+        .order_by(HistoryModel.created_at.desc(), HistoryModel.id.desc())
+        .offset(depth * PAGE_SIZE)
+        .limit(PAGE_SIZE)
+    )
+    async with AsyncSessionLocal() as db:
+        list((await db.execute(stmt)).scalars())
+
+
+async def _median_ms(factory, repeat: int) -> float:
+    """重复执行取耗时中位数（毫秒）"""
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        await factory()
+        samples.append((time.perf_counter() - started) * 1000)
+    return statistics.median(samples)
+
+
+async def run(depths: list, repeat: int) -> None:
+    """按翻页深度输出三种查询的耗时"""
+    async with AsyncSessionLocal() as db:
+        total = (await db.execute(select(func.count()).select_from(HistoryModel))).scalar()
+    print(f"history 表记录数: {total}，每页 {PAGE_SIZE} 条")
+    print(f"{'page':>8} {'keyset':>10} {'offset':>10} {'type':>10}")
+    for depth in depths:
+        cursor = await _cursor_at(depth)
+        type_cursor = await _cursor_at(depth, TYPES[0])
+        keyset = await _median_ms(lambda: get_user_history(cursor=cursor, limit=PAGE_SIZE), repeat)
+        offset = await _median_ms(lambda: _offset_page(depth), repeat)
+        typed = await _median_ms(
+            lambda: get_user_history(cursor=type_cursor, limit=PAGE_SIZE, record_type=TYPES[0]), repeat
+        )
+        print(f"{depth:>8} {keyset:>8.2f}ms {offset:>8.2f}ms {typed:>8.2f}ms")
+    await async_engine.dispose()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="历史记录分页基准测试")
+    parser.add_argument("--rows", type=int, default=1000000)
+    parser.add_argument("--depths", type=str, default="0,10,100,1000,10000")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--skip-seed", action="store_true", help="使用已有的测试记录")
+    parser.add_argument("--keep", action="store_true", help="结束后保留测试记录")
+    args = parser.parse_args()
+
+    Base.metadata.create_all(bind=engine)
+    if not args.skip_seed:
+        _seed(args.rows)
+    try:
+        asyncio.run(run([int(d) for d in args.depths.split(",")], args.repeat))
+    finally:
+        if not args.keep:
+            _cleanup()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""
+历史记录搜索基准测试
+
+在内存中构建 --records 条合成历史记录的倒排索引（不访问数据库），
+每条记录含 2~4 个食物名或一个店名，按菜名、主食、店名、宽泛词、
+不存在的词，以及各二元组都常见但不出现在同一词条中的词（如"羊排骨"）
+分别查询，统计查询耗时分位数和索引内存占用。
+
+Usage:
+    python scripts/bench_history_search.py --records 1000000 --queries 1000
+"""
+
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+import tracemalloc
+
+# 添加项目根目录到Python路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+from app.services.history_search import HistorySearchIndex, extract_search_terms
+
+COOKING = ["红烧", "清蒸", "爆炒", "干煸", "糖醋", "麻辣", "香煎", "白灼", "凉拌", "酱爆"]
+INGREDIENTS = ["肉", "排骨", "鸡翅", "鱼", "虾", "豆腐", "茄子", "牛肉", "羊排", "土豆", "鸡丁", "猪蹄"]
+STAPLES = ["米饭", "面条", "馒头", "饺子", "炒饭"]
+SHOP_PREFIX = ["老", "阿", "小", "大", "新", "金"]
+SHOP_SUFFIX = ["家常菜", "火锅", "面馆", "烧烤", "小厨", "食堂"]
+
+
+def _record(rng: random.Random, index: int) -> tuple:
+    """生成一条合成记录 (类型, details)"""
+    if index % 3 == 0:
+        name = f"{rng.choice(SHOP_PREFIX)}{rng.choice('张王李赵刘陈杨黄周吴')}{rng.choice(SHOP_SUFFIX)}{index % 997}号店"
+        call = {"action": "open_map", "name": name, "address": f"上海市某区某路{index % 5000}号"}
+        return "where-to-eat", {"function_calls": [call]}
+    items = [{"name": rng.choice(COOKING) + rng.choice(INGREDIENTS)} for _ in range(rng.randint(1, 3))]
+    items.append({"name": rng.choice(STAPLES)})
+    return "calories", {"function_calls": [{"action": "calories_result", "food_items": items}]}
+
+
+def _cross_term_queries() -> list:
+    """首尾重叠拼接的词：每个二元组都很常见，但没有词条包含整个词"""
+    words = COOKING + INGREDIENTS
+    return [a + b[1:] for a in words for b in words if len(a) > 1 and len(b) > 1 and a != b and a[-1] == b[0]]
+
+
+def _timed(index: HistorySearchIndex, queries: list, limit: int) -> tuple:
+    """返回 (p50, p99, 最大耗时) 毫秒和平均命中数"""
+    samples, hits = [], 0
+    for query in queries:
+        started = time.perf_counter()
+        hits += len(index.search(query, limit))
+        samples.append((time.perf_counter() - started) * 1000)
+    samples.sort()
+    return statistics.median(samples), samples[int(len(samples) * 0.99) - 1], samples[-1], hits / len(queries)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="历史记录搜索基准测试")
+    parser.add_argument("--records", type=int, default=1000000)
+    parser.add_argument("--queries", type=int, default=1000)
+    parser.add_argument("--limit", type=int, default=20)
+    args = parser.parse_args()
+
+    rng = random.Random(42)
+    index = HistorySearchIndex()
+    tracemalloc.start()
+    started = time.perf_counter()
+    for record_id in range(1, args.records + 1):
+        record_type, details = _record(rng, record_id)
+        index.add(record_id, extract_search_terms(record_type, details))
+    build_seconds = time.perf_counter() - started
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"索引 {len(index)} 条记录，构建 {build_seconds:.1f}s，峰值内存 {peak / 1024 / 1024:.0f}MB")
+
+    cases = {
+        "common": [rng.choice(COOKING) + rng.choice(INGREDIENTS) for _ in range(args.queries)],
+        "staple": [rng.choice(STAPLES) for _ in range(args.queries)],
+        "shop": [f"{rng.choice(SHOP_SUFFIX)}{rng.randint(0, 996)}号" for _ in range(args.queries)],
+        "broad": [rng.choice(["号店", "上海市", "某路", "红烧"]) for _ in range(args.queries)],
+        "missing": [rng.choice(COOKING) + "龙虾" for _ in range(args.queries)],
+        "cross": [rng.choice(_cross_term_queries()) for _ in range(args.queries)],
+    }
+    print(f"{'case':<8} {'p50':>8} {'p99':>8} {'max':>8} {'hits':>6}")
+    for name, queries in cases.items():
+        p50, p99, worst, hits = _timed(index, queries, args.limit)
+        print(f"{name:<8} {p50:>6.2f}ms {p99:>6.2f}ms {worst:>6.2f}ms {hits:>6.1f}")
+
+
+if __name__ == "__main__":
+    main()
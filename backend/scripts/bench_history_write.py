@@ -0,0 +1,108 @@
+"""
+历史记录写入吞吐基准测试
+
+--clients 个并发客户端共写入 --records 条历史记录，对比：
+- per-row: 每条记录一个会话、一次提交（history_service.save_history）
+- batched: 进入批量写入队列，每批一个事务、一次提交（history_writer）
+
+数据库往返按执行的 SQL 语句计数，与提交次数分开报告。
+
+需要 .env 中配置可用的 MySQL。测试记录的 type 为 bench，结束后删除。
+
+Usage:
+    python scripts/bench_history_write.py --records 5000 --clients 50
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+# 添加项目根目录到Python路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+from sqlalchemy import delete, event
+
+from app.config.database import Base, SessionLocal, async_engine, engine
+from app.models.history import HistoryModel
+from app.services.history_service import save_history
+from app.services.history_writer import history_writer
+
+BENCH_TYPE = "bench"
+
+# 异步引擎上执行的语句数和提交数
+counters = {"statements": 0, "commits": 0}
+
+
+@event.listens_for(async_engine.sync_engine, "before_cursor_execute")
+def _count_statement(*args) -> None:
+    counters["statements"] += 1
+
+
+@event.listens_for(async_engine.sync_engine, "commit")
+def _count_commit(*args) -> None:
+    counters["commits"] += 1
+
+
+def _record(index: int) -> dict:
+    """构造一条与真实请求大小相近的测试记录"""
+    return {
+        "type": BENCH_TYPE,
+        "image_path": f"https://example.com/{index}.jpg",
+        "summary": "红烧肉，约 520 kcal",
+        "details": {"function_call": {"action": "show_food_cards", "items": [{"name": "红烧肉", "calories": 520}]}},
+    }
+
+
+def _cleanup() -> None:
+    """删除测试记录"""
+    db = SessionLocal()
+    try:
+        db.execute(delete(HistoryModel).where(HistoryModel.type == BENCH_TYPE))
+        db.commit()
+    finally:
+        db.close()
+
+
+async def run_mode(mode: str, records: int, clients: int) -> tuple:
+    """并发写入 records 条记录，返回 (每秒写入条数, 语句数, 提交数)"""
+    counters.update(statements=0, commits=0)
+    write = history_writer.submit if mode == "batched" else save_history
+    indexes = iter(range(records))
+
+    async def client():
+        for index in indexes:
+            await write(_record(index))
+
+    started = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(clients)))
+    elapsed = time.perf_counter() - started
+    if mode == "batched":
+        await history_writer.shutdown()
+    await async_engine.dispose()
+    return records / elapsed, counters["statements"], counters["commits"]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="历史记录写入吞吐基准测试")
+    parser.add_argument("--records", type=int, default=5000)
+    parser.add_argument("--clients", type=int, default=50)
+    args = parser.parse_args()
+
+    Base.metadata.create_all(bind=engine)
+    try:
+        print(f"{'mode':<8} {'records/s':>10} {'statements':>11} {'commits':>8}")
+        for mode in ("per-row", "batched"):
+            throughput, statements, commits = asyncio.run(run_mode(mode, args.records, args.clients))
+            print(f"{mode:<8} {throughput:>10.0f} {statements:>11} {commits:>8}")
+    finally:
+        _cleanup()
+
+
+if __name__ == "__main__":
+    main()
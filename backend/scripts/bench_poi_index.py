@@ -0,0 +1,94 @@
+"""
+POI 索引基准测试
+
+生成百万级合成餐厅 POI 数据，测量索引构建耗时以及附近检索、
+店名模糊匹配和店名校准的单次查询耗时分布。
+
+Usage:
+    python scripts/bench_poi_index.py --count 1000000
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+
+# 添加项目根目录到Python路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.poi_index import Poi, PoiIndex
+
+# 城市中心坐标
+CITIES = {
+    "杭州": (30.2741, 120.1551),
+    "成都": (30.5728, 104.0668),
+    "上海": (31.2304, 121.4737),
+    "北京": (39.9042, 116.4074),
+    "广州": (23.1291, 113.2644),
+}
+# 店名前缀从常用汉字中随机组合，贴近真实店名的多样性
+COMMON_CHARS = [chr(0x4E00 + i) for i in range(0, 6000, 2)]
+CUISINES = ["火锅", "串串", "面馆", "小笼包", "烤鱼", "烧烤", "酸菜鱼", "牛肉面", "麻辣烫", "咖啡", "甜品", "私房菜", "冒菜", "饺子馆"]
+SUFFIXES = ["", "", "总店", "旗舰店", "人民路店", "万象城店", "西湖店", "春熙路店", "湖滨店"]
+
+
+def generate(count: int, seed: int = 7) -> list:
+    """生成合成 POI 数据"""
+    rng = random.Random(seed)
+    cities = list(CITIES.items())
+    pois = []
+    for i in range(count):
+        city, (lat, lng) = cities[i % len(cities)]
+        brand = "".join(rng.choices(COMMON_CHARS, k=rng.randint(2, 4)))
+        name = f"{brand}{rng.choice(CUISINES)}{rng.choice(SUFFIXES)}"
+        pois.append(Poi(
+            name=name,
+            address=f"{city}市某区某路{rng.randint(1, 999)}号",
+            latitude=lat + rng.uniform(-0.3, 0.3),
+            longitude=lng + rng.uniform(-0.3, 0.3),
+        ))
+    return pois
+
+
+def timed(fn, queries: list) -> dict:
+    """对每个查询计时并返回耗时分布（毫秒）"""
+    samples = []
+    for query in queries:
+        started = time.perf_counter()
+        fn(query)
+        samples.append((time.perf_counter() - started) * 1000)
+    samples.sort()
+    return {
+        "p50": samples[len(samples) // 2],
+        "p99": samples[int(len(samples) * 0.99)],
+        "mean": sum(samples) / len(samples),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="POI 索引基准测试")
+    parser.add_argument("--count", type=int, default=1_000_000)
+    parser.add_argument("--queries", type=int, default=2000)
+    args = parser.parse_args()
+
+    pois = generate(args.count)
+    started = time.perf_counter()
+    index = PoiIndex()
+    index.extend(pois)
+    print(f"构建索引: {len(index)} 个 POI，耗时 {time.perf_counter() - started:.1f}s")
+
+    rng = random.Random(11)
+    samples = rng.sample(pois, args.queries)
+    cases = {
+        "nearby(1km)": lambda p: index.nearby(p.latitude, p.longitude, 1000, 10),
+        "match_name": lambda p: index.match_name(p.name, limit=5),
+        "snap(50km)": lambda p: index.snap(p.name[:-1], p.latitude + 0.01, p.longitude + 0.01),
+    }
+    for label, fn in cases.items():
+        stats = timed(fn, samples)
+        print(f"{label:<12} p50={stats['p50']:.3f}ms p99={stats['p99']:.3f}ms mean={stats['mean']:.3f}ms")
+
+
+if __name__ == "__main__":
+    main()
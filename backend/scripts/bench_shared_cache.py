@@ -0,0 +1,114 @@
+"""
+共享缓存基准测试
+
+模拟多个 uvicorn worker 同时处理针对少量热门图片的重复请求，
+对比进程内缓存（memory）与同主机共享缓存（sqlite）在 1/4/8 个
+worker 下的结果缓存命中率和吞吐。
+
+未命中时以固定延迟模拟一次完整分析。
+
+Usage:
+    python scripts/bench_shared_cache.py --requests 2000 --keys 50
+"""
+
+import argparse
+import asyncio
+import multiprocessing
+import os
+import random
+import sys
+import tempfile
+import time
+
+# 添加项目根目录到Python路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.utils.shared_cache import MemoryCacheBackend, SqliteCacheBackend
+
+
+async def _simulate(backend, keys: list, analysis_seconds: float) -> tuple:
+    """按顺序处理请求，返回 (命中数, 请求数)"""
+    hits = 0
+    for key in keys:
+        if await backend.get(key) is not None:
+            hits += 1
+            continue
+        await asyncio.sleep(analysis_seconds)
+        await backend.set(key, {"message": key}, 600)
+    return hits, len(keys)
+
+
+def _worker(backend_name: str, db_path: str, keys: list, analysis_seconds: float, queue) -> None:
+    """单个 worker 进程入口"""
+    if backend_name == "sqlite":
+        backend = SqliteCacheBackend(db_path)
+    else:
+        backend = MemoryCacheBackend()
+    queue.put(asyncio.run(_simulate(backend, keys, analysis_seconds)))
+
+
+def run_case(backend_name: str, workers: int, requests: int, key_count: int,
+             analysis_seconds: float) -> dict:
+    """运行一组基准测试
+
+    Args:
+        backend_name: memory 或 sqlite
+        workers: worker 进程数
+        requests: 请求总数
+        key_count: 不同图片数量
+        analysis_seconds: 未命中时模拟的分析耗时
+
+    Returns:
+        dict: 命中率、耗时和吞吐
+    """
+    rng = random.Random(42)
+    # 热门图片服从近似 Zipf 分布
+    weights = [1 / (rank + 1) for rank in range(key_count)]
+    all_keys = [f"result:{k}" for k in rng.choices(range(key_count), weights, k=requests)]
+    shards = [all_keys[i::workers] for i in range(workers)]
+
+    db_path = os.path.join(tempfile.mkdtemp(dir="/dev/shm" if os.path.isdir("/dev/shm") else None), "bench.db")
+    queue = multiprocessing.Queue()
+    processes = [
+        multiprocessing.Process(target=_worker, args=(backend_name, db_path, shard, analysis_seconds, queue))
+        for shard in shards
+    ]
+    started = time.perf_counter()
+    for process in processes:
+        process.start()
+    results = [queue.get() for _ in processes]
+    for process in processes:
+        process.join()
+    elapsed = time.perf_counter() - started
+
+    hits = sum(r[0] for r in results)
+    total = sum(r[1] for r in results)
+    return {
+        "backend": backend_name,
+        "workers": workers,
+        "hit_rate": hits / total,
+        "analyses": total - hits,
+        "elapsed": elapsed,
+        "req_per_sec": total / elapsed,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="共享缓存基准测试")
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--keys", type=int, default=50)
+    parser.add_argument("--analysis-ms", type=float, default=5.0)
+    args = parser.parse_args()
+
+    print(f"{'backend':<8} {'workers':>7} {'hit_rate':>9} {'analyses':>9} {'elapsed':>9} {'req/s':>9}")
+    for workers in (1, 4, 8):
+        for backend_name in ("memory", "sqlite"):
+            r = run_case(backend_name, workers, args.requests, args.keys, args.analysis_ms / 1000)
+            print(
+                f"{r['backend']:<8} {r['workers']:>7} {r['hit_rate']:>9.2%} "
+                f"{r['analyses']:>9} {r['elapsed']:>8.2f}s {r['req_per_sec']:>9.0f}"
+            )
+
+
+if __name__ == "__main__":
+    main()